@@ -1,17 +1,17 @@
 from google.adk.agents import Agent
-from google.adk.tools import AgentTool
 
+from .dispatch import TimedAgentTool
 from .tools.kubectl_agent import kubectl_agent
 from .tools.gcloud_agent import gcloud_agent
 from .tools.error_agent import error_agent
 from .tools.yaml_agent import yaml_agent
 
 
-# Convert agents → tools
-kubectl_tool = AgentTool(agent=kubectl_agent)
-gcloud_tool = AgentTool(agent=gcloud_agent)
-error_tool = AgentTool(agent=error_agent)
-yaml_tool = AgentTool(agent=yaml_agent)
+# Convert agents → tools (calls from one turn run concurrently, see dispatch.py)
+kubectl_tool = TimedAgentTool(agent=kubectl_agent)
+gcloud_tool = TimedAgentTool(agent=gcloud_agent)
+error_tool = TimedAgentTool(agent=error_agent)
+yaml_tool = TimedAgentTool(agent=yaml_agent)
 
 
 COPILOT_INSTRUCTION = """
@@ -27,9 +27,14 @@ TOOL ROUTING:
 
 WORKFLOW:
 1. Analyze the user's request
-2. Determine which tool is most appropriate
-3. Call the tool and wait for the result
-4. Present the result to the user with brief context if helpful
+2. Determine which tools are needed
+3. Call the tools and wait for the results
+4. Present the results to the user with brief context if helpful
+
+If the request has several independent parts, call ALL the needed tools in
+the same turn - they run in parallel. For example, for "my pod is in
+CrashLoopBackOff, how do I debug it?" call error_explainer_agent AND
+kubectl_agent together instead of one after the other.
 
 Do NOT generate kubectl commands, gcloud commands, or YAML yourself.
 Always delegate to the specialist tools.
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import time
+import weakref
+from typing import Any
+
+from google.adk.tools import AgentTool
+from google.adk.tools.tool_context import ToolContext
+
+
+# Specialist agents (each a full model call) running at the same time
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+
+# State key with the timing of each tool call in the latest batch, by function call id
+TIMINGS_KEY = "tool_timings"
+
+# One limit per event loop (asyncio primitives can't be shared across loops)
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _limits:
+        _limits[loop] = asyncio.Semaphore(AGENT_TOOL_CONCURRENCY)
+    return _limits[loop]
+
+
+class TimedAgentTool(AgentTool):
+    """AgentTool that shares a concurrency limit and reports its timing.
+
+    ADK runs all function calls from one model turn concurrently and merges
+    their responses in call order. This caps how many specialist agents run
+    at once (AGENT_TOOL_CONCURRENCY) and adds each call's queue wait and run
+    time to the function response event's state_delta under "tool_timings":
+
+        {"<function call id>": {"tool": "kubectl_agent", "wait_s": 0.0, "run_s": 1.42, "status": "ok"}}
+
+    Parallel calls' entries are merged into the same event.
+    """
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        queued = time.perf_counter()
+        status = "error"
+        async with _limit():
+            started = time.perf_counter()
+            try:
+                result = await super().run_async(args=args, tool_context=tool_context)
+                status = "ok"
+                return result
+            finally:
+                finished = time.perf_counter()
+                timing = {
+                    "tool": self.name,
+                    "wait_s": round(started - queued, 3),
+                    "run_s": round(finished - started, 3),
+                    "status": status,
+                }
+                tool_context.actions.state_delta[TIMINGS_KEY] = {tool_context.function_call_id: timing}
+                print(f"[{self.name}] {status}: waited {timing['wait_s']:.2f}s, ran {timing['run_s']:.2f}s")
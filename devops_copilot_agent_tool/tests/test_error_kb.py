@@ -0,0 +1,74 @@
+import pytest
+
+from devops_copilot_agent_tool.tools.error_kb import KNOWN_ERRORS, ErrorKnowledgeBase
+from devops_function_tool_agent.metrics import render_metrics
+
+
+@pytest.fixture
+def kb():
+    return ErrorKnowledgeBase(KNOWN_ERRORS)
+
+
+@pytest.mark.parametrize("text, error_id", [
+    ("Last State: Terminated\n  Reason: OOMKilled\n  Exit Code: 137", "oomkilled"),
+    ("Memory cgroup out of memory: Killed process 4242 (java) total-vm:2097152kB", "oomkilled"),
+    ("kernel: Out of memory: Killed process 881 (node)", "oomkilled"),
+    ("Warning  BackOff  kubelet  Back-off restarting failed container api", "crashloopbackoff"),
+    ("Failed to pull image \"gcr.io/acme/api:v9\": manifest unknown", "imagepullbackoff"),
+    ("Error: configmap \"api-config\" not found", "createcontainerconfigerror"),
+    ("0/3 nodes are available: 3 Insufficient cpu.", "insufficient-cpu"),
+    ("pods \"api-1\" is forbidden: exceeded quota: compute, requested: cpu=2", "k8s-resource-quota"),
+    ("ERROR: (gcloud.compute.instances.create) Quota 'CPUS' exceeded. Limit: 24.0", "gcp-quota-exceeded"),
+    ("PERMISSION_DENIED: caller does not have storage.objects.get access", "gcp-permission-denied"),
+    ("Status: Failed\nReason: Evicted\nMessage: The node was low on resource: memory.", "evicted"),
+])
+def test_known_errors_are_matched(kb, text, error_id):
+    known = kb.match(text)
+    assert known is not None and known.id == error_id
+
+
+@pytest.mark.parametrize("text", [
+    # Application messages that only share words with a known error
+    "my app logs say: out of memory while parsing json, exit code 1",
+    "java.lang.OutOfMemoryError: Java heap space",
+    "the key was evicted from cache after 30s",
+    # An exit code alone is only a hint
+    "container exited with code 137",
+    "",
+])
+def test_no_false_positives(kb, text):
+    assert kb.match(text) is None
+    assert kb.stats()["ambiguous"] == 0
+
+
+def test_exit_code_adds_to_a_pattern_match(kb):
+    # Pattern (2) + exit code (1) for OOM; the exit code alone matches nothing else
+    assert kb.match("Memory cgroup out of memory ... exited with code 137").id == "oomkilled"
+
+
+def test_several_errors_are_ambiguous(kb):
+    # The crash loop is caused by the OOM kill: the model should explain both
+    text = "api-7f9 0/1 CrashLoopBackOff, Last State: Terminated, Reason: OOMKilled"
+    assert kb.match(text) is None
+    assert kb.stats()["ambiguous"] == 1
+
+
+def test_reasons_are_whole_words(kb):
+    assert kb.match("NotOOMKilledHere") is None
+    assert kb.match("reason=oomkilled").id == "oomkilled"
+
+
+def test_stats_and_metrics(kb):
+    kb.match("Reason: OOMKilled")
+    kb.match("Reason: OOMKilled")
+    kb.match("everything is fine")
+    kb.match("CrashLoopBackOff after OOMKilled")
+    stats = kb.stats()
+    assert stats["lookups"] == 4 and stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["ambiguous"] == 1 and stats["hit_rate"] == 0.5
+    assert stats["by_error"] == {"oomkilled": 2}
+
+    metrics = render_metrics()
+    assert 'devops_error_kb_lookups_total{outcome="hit",error="oomkilled"}' in metrics
+    assert 'devops_error_kb_lookups_total{outcome="ambiguous",error=""}' in metrics
+    assert "devops_error_kb_lookup_seconds_count" in metrics
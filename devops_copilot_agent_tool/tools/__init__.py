@@ -1,6 +1,7 @@
 from .kubectl_agent import kubectl_agent
 from .gcloud_agent import gcloud_agent
 from .error_agent import error_agent, ErrorExplanation
+from .error_kb import knowledge_base, kb_stats
 from .yaml_agent import yaml_agent
 
 __all__ = [
@@ -8,5 +9,7 @@ __all__ = [
     "gcloud_agent",
     "error_agent",
     "ErrorExplanation",
+    "knowledge_base",
+    "kb_stats",
     "yaml_agent"
 ]
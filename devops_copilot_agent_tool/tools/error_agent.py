@@ -1,16 +1,7 @@
-from typing import List
-from pydantic import BaseModel, Field
 from google.adk.agents import Agent
 
-
-class ErrorExplanation(BaseModel):
-    """Structured output for error explanations"""
-    error_name: str = Field(description="The name or type of the error")
-    cause: str = Field(description="What causes this error to occur")
-    impact: str = Field(description="What happens when this error occurs")
-    fix_steps: List[str] = Field(description="Step-by-step instructions to resolve the error")
-    helpful_commands: List[str] = Field(description="Useful commands for debugging or fixing the issue")
-    prevention: str = Field(description="How to prevent this error in the future")
+from .error_kb import serve_known_error
+from .error_schema import ErrorExplanation
 
 
 error_agent = Agent(
@@ -19,6 +10,7 @@ error_agent = Agent(
     description="Explains infra and cloud errors with fixes",
     output_key="error_explanation",
     output_schema=ErrorExplanation,
+    before_agent_callback=serve_known_error,  # known errors never reach the model
     instruction="""
 You are a DevOps error specialist who explains infrastructure and cloud errors.
 
@@ -0,0 +1,417 @@
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from devops_function_tool_agent.metrics import Counter, Histogram
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .error_schema import ErrorExplanation
+
+
+# Answer known errors from the local knowledge base ("0" sends every error to the model)
+ERROR_KNOWLEDGE_BASE = os.getenv("ERROR_KNOWLEDGE_BASE", "1") == "1"
+
+# Points per kind of signature that matched.
+# A reason string names the failure, a regex matches its typical message,
+# an exit code is only a hint (137 is any SIGKILL, not just OOM).
+REASON_SCORE = 3
+PATTERN_SCORE = 2
+EXIT_CODE_SCORE = 1
+
+# An error needs a reason or regex hit to be served; an exit code alone is not enough
+MIN_SCORE = PATTERN_SCORE
+
+_WORD = re.compile(r"[A-Za-z_]+")
+_EXIT_CODE = re.compile(r"exit(?:ed)?\s*(?:with\s*)?(?:code|status)?\s*[:=]?\s*(\d{1,3})\b|exitCode\s*:\s*(\d{1,3})\b",
+                        re.IGNORECASE)
+
+
+# Published through the devops agent's registry, next to its tool metrics
+# (served on /metrics when DEVOPS_METRICS_PORT is set)
+KB_LOOKUPS = Counter(
+    "devops_error_kb_lookups_total", "Error knowledge base lookups by outcome (hit, miss, ambiguous).",
+    ["outcome", "error"])
+KB_LOOKUP_DURATION = Histogram(
+    "devops_error_kb_lookup_seconds", "Time to match one error text against the knowledge base.",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005))
+
+
+@dataclass
+class KnownError:
+    """A pre-validated explanation and the signatures that identify it."""
+
+    id: str
+    explanation: ErrorExplanation
+    reasons: list[str] = field(default_factory=list)
+    """Reason strings as Kubernetes/GCP print them, e.g. "CrashLoopBackOff" (whole word, any case)."""
+    patterns: list[str] = field(default_factory=list)
+    """Regexes for the typical message text (case-insensitive)."""
+    exit_codes: list[int] = field(default_factory=list)
+
+
+KNOWN_ERRORS = [
+    KnownError(
+        id="oomkilled",
+        reasons=["OOMKilled"],
+        # Kernel wording only: applications print a bare "out of memory" for
+        # their own allocation failures, which are not container OOM kills
+        patterns=[r"memory cgroup out of memory", r"\bout of memory: kill(?:ed)? process", r"oom[- ]?killer"],
+        exit_codes=[137],
+        explanation=ErrorExplanation(
+            error_name="OOMKilled (exit code 137)",
+            cause="The container used more memory than its memory limit, so the kernel's OOM killer "
+                  "terminated it with SIGKILL.",
+            impact="The container is killed immediately and restarted; repeated kills lead to "
+                   "CrashLoopBackOff and dropped in-flight requests.",
+            fix_steps=[
+                "Confirm the reason: check 'Last State: Terminated, Reason: OOMKilled' in kubectl describe pod",
+                "Compare real memory usage with the limit using kubectl top pod",
+                "Raise resources.limits.memory (and requests.memory) to fit the workload's peak usage",
+                "If usage keeps growing over time, look for a memory leak in the application",
+                "For JVM/Node.js apps, cap the heap below the container limit (e.g. -Xmx, --max-old-space-size)",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl top pod <pod-name> -n <namespace> --containers",
+                "kubectl get pod <pod-name> -n <namespace> -o jsonpath='{.spec.containers[*].resources}'",
+                "kubectl set resources deployment <name> -n <namespace> --limits=memory=512Mi --requests=memory=256Mi",
+            ],
+            prevention="Set memory requests and limits from measured usage, alert on memory near the limit, "
+                       "and load test before raising traffic.",
+        ),
+    ),
+    KnownError(
+        id="crashloopbackoff",
+        reasons=["CrashLoopBackOff"],
+        patterns=[r"back-?off restarting failed container"],
+        explanation=ErrorExplanation(
+            error_name="CrashLoopBackOff",
+            cause="The container starts and then exits (crashes or fails its liveness probe) over and over, "
+                  "so the kubelet waits longer and longer between restarts.",
+            impact="The pod is never Ready, so it receives no traffic; if every replica does this the "
+                   "service is down.",
+            fix_steps=[
+                "Read the logs of the crashed run with kubectl logs --previous",
+                "Check the exit code and reason under 'Last State' in kubectl describe pod",
+                "Exit code 137 with OOMKilled: raise the memory limit; exit code 1: fix the application error in the logs",
+                "Check the command/args, environment variables, ConfigMaps and Secrets the app needs at startup",
+                "If a liveness probe kills it, give it a longer initialDelaySeconds or use a startupProbe",
+            ],
+            helpful_commands=[
+                "kubectl logs <pod-name> -n <namespace> --previous",
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl get events -n <namespace> --sort-by=.lastTimestamp",
+                "kubectl get pod <pod-name> -n <namespace> -o yaml",
+            ],
+            prevention="Test the image locally with the same configuration, add a startupProbe for slow "
+                       "starts, and validate required configuration at startup with clear error messages.",
+        ),
+    ),
+    KnownError(
+        id="imagepullbackoff",
+        reasons=["ImagePullBackOff", "ErrImagePull", "InvalidImageName"],
+        patterns=[r"failed to pull image", r"pull access denied", r"manifest (?:for \S+ )?(?:unknown|not found)",
+                  r"repository does not exist"],
+        explanation=ErrorExplanation(
+            error_name="ImagePullBackOff / ErrImagePull",
+            cause="The kubelet can't pull the container image: the image name or tag is wrong, the "
+                  "registry needs credentials the pod doesn't have, or the node can't reach the registry.",
+            impact="The container never starts; the pod stays in Pending/Waiting and retries the pull with backoff.",
+            fix_steps=[
+                "Read the exact pull error in the Events section of kubectl describe pod",
+                "Check the image name and tag for typos and make sure the tag exists in the registry",
+                "For private registries, create an imagePullSecret and reference it in the pod spec "
+                "(or grant the node's service account read access for Artifact Registry)",
+                "Check that the nodes can reach the registry (firewall, proxy, private cluster egress)",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl create secret docker-registry <secret-name> --docker-server=<registry> "
+                "--docker-username=<user> --docker-password=<password> -n <namespace>",
+                "gcloud artifacts docker images list <region>-docker.pkg.dev/<project>/<repository>",
+                "docker pull <image>:<tag>",
+            ],
+            prevention="Pin images to tags that exist (never :latest), push images in CI before deploying, "
+                       "and manage registry credentials with the deployment.",
+        ),
+    ),
+    KnownError(
+        id="createcontainerconfigerror",
+        reasons=["CreateContainerConfigError"],
+        patterns=[r"configmap \"?[\w.-]+\"? not found", r"secret \"?[\w.-]+\"? not found",
+                  r"couldn't find key [\w.-]+ in (?:configmap|secret)"],
+        explanation=ErrorExplanation(
+            error_name="CreateContainerConfigError",
+            cause="The pod references a ConfigMap, Secret or key in one that doesn't exist in its namespace.",
+            impact="The container can't be created, so the pod stays in Waiting until the reference resolves.",
+            fix_steps=[
+                "Find the missing ConfigMap/Secret or key in the Events section of kubectl describe pod",
+                "Create it in the same namespace as the pod, or fix the name/key in the pod spec",
+                "Mark references as optional: true if the app can start without them",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl get configmaps,secrets -n <namespace>",
+                "kubectl create configmap <name> --from-file=<path> -n <namespace>",
+            ],
+            prevention="Deploy ConfigMaps and Secrets together with the workload (same manifest or chart) "
+                       "and in the same namespace.",
+        ),
+    ),
+    KnownError(
+        id="insufficient-cpu",
+        patterns=[r"insufficient cpu"],
+        explanation=ErrorExplanation(
+            error_name="Pending: FailedScheduling (Insufficient cpu)",
+            cause="No node has enough unreserved CPU for the pod's CPU request. The scheduler counts "
+                  "requests, not actual usage.",
+            impact="The pod stays Pending and never starts until capacity frees up or is added.",
+            fix_steps=[
+                "Read the scheduler message in the Events section of kubectl describe pod",
+                "Compare the pod's CPU request with the nodes' allocatable and requested CPU",
+                "Lower requests.cpu if it's set higher than the app needs",
+                "Add nodes, use a larger machine type, or enable the cluster autoscaler for the node pool",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl describe nodes | grep -A 8 'Allocated resources'",
+                "kubectl top nodes",
+                "gcloud container clusters update <cluster> --enable-autoscaling --min-nodes=1 "
+                "--max-nodes=5 --node-pool=<pool> --region=<region>",
+            ],
+            prevention="Size CPU requests from measured usage and enable cluster autoscaling so pending pods "
+                       "trigger new nodes.",
+        ),
+    ),
+    KnownError(
+        id="insufficient-memory",
+        patterns=[r"insufficient memory"],
+        explanation=ErrorExplanation(
+            error_name="Pending: FailedScheduling (Insufficient memory)",
+            cause="No node has enough unreserved memory for the pod's memory request.",
+            impact="The pod stays Pending and never starts until capacity frees up or is added.",
+            fix_steps=[
+                "Read the scheduler message in the Events section of kubectl describe pod",
+                "Compare the pod's memory request with the nodes' allocatable and requested memory",
+                "Lower requests.memory if it's set higher than the app needs",
+                "Add nodes, use a machine type with more memory, or enable the cluster autoscaler",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl describe nodes | grep -A 8 'Allocated resources'",
+                "kubectl top nodes",
+            ],
+            prevention="Size memory requests from measured usage and enable cluster autoscaling.",
+        ),
+    ),
+    KnownError(
+        id="k8s-resource-quota",
+        patterns=[r"exceeded quota", r"forbidden: .*quota"],
+        explanation=ErrorExplanation(
+            error_name="Forbidden: exceeded quota (Kubernetes ResourceQuota)",
+            cause="Creating the object would take the namespace over a ResourceQuota limit (CPU, memory, "
+                  "pods, or object count), or the pod has no requests/limits while the quota requires them.",
+            impact="The API server rejects the pod or object; Deployments and ReplicaSets can't create new pods.",
+            fix_steps=[
+                "See which quota and resource are exceeded in the error or the ReplicaSet's events",
+                "Compare used and hard limits with kubectl describe resourcequota",
+                "Set requests and limits on every container if the quota covers CPU or memory",
+                "Scale down or clean up unused workloads, or ask the cluster admin to raise the quota",
+            ],
+            helpful_commands=[
+                "kubectl describe resourcequota -n <namespace>",
+                "kubectl get events -n <namespace> --sort-by=.lastTimestamp",
+                "kubectl describe replicaset <replicaset-name> -n <namespace>",
+            ],
+            prevention="Track namespace usage against its quota and add a LimitRange so pods get default "
+                       "requests and limits.",
+        ),
+    ),
+    KnownError(
+        id="gcp-quota-exceeded",
+        reasons=["QUOTA_EXCEEDED"],
+        patterns=[r"quota '?[\w-]+'? exceeded", r"quota exceeded", r"exceeded (?:the )?quota for"],
+        explanation=ErrorExplanation(
+            error_name="Quota exceeded (Google Cloud)",
+            cause="The request needs more of a resource (CPUs, IP addresses, disks, GPUs, API requests) "
+                  "than the project's quota allows in that region.",
+            impact="The resource isn't created: VMs, GKE nodes or load balancers fail to provision until "
+                   "usage drops or the quota is raised.",
+            fix_steps=[
+                "Find the quota name (e.g. CPUS, IN_USE_ADDRESSES) and region in the error",
+                "Check current usage and limits for that region",
+                "Delete unused resources in the region, or deploy to a region with headroom",
+                "Request a quota increase in the console (IAM & Admin > Quotas)",
+            ],
+            helpful_commands=[
+                "gcloud compute regions describe <region> --format='table(quotas.metric,quotas.usage,quotas.limit)'",
+                "gcloud compute project-info describe --format='table(quotas.metric,quotas.usage,quotas.limit)'",
+                "gcloud compute instances list --filter='zone ~ <region>'",
+            ],
+            prevention="Monitor quota usage with alerts at 80% and request increases before planned growth.",
+        ),
+    ),
+    KnownError(
+        id="gcp-permission-denied",
+        reasons=["PERMISSION_DENIED"],
+        patterns=[r"does not have [\w.]+ (?:access|permission)", r"permission '[\w.]+' denied",
+                  r"required '[\w.]+' permission"],
+        explanation=ErrorExplanation(
+            error_name="PERMISSION_DENIED (Google Cloud IAM)",
+            cause="The user or service account making the call doesn't have an IAM role that grants the "
+                  "required permission on the resource.",
+            impact="The operation is rejected; deployments, CI jobs or workloads calling the API fail.",
+            fix_steps=[
+                "Find the missing permission and the principal in the error message",
+                "Check which roles the principal has on the project",
+                "Grant the narrowest predefined role that contains the permission",
+                "For GKE workloads, check the Workload Identity binding between the Kubernetes and Google service accounts",
+            ],
+            helpful_commands=[
+                "gcloud auth list",
+                "gcloud projects get-iam-policy <project> --flatten='bindings[].members' "
+                "--filter='bindings.members:<principal>' --format='table(bindings.role)'",
+                "gcloud projects add-iam-policy-binding <project> --member=<principal> --role=<role>",
+            ],
+            prevention="Grant least-privilege roles per service account and manage IAM bindings as code.",
+        ),
+    ),
+    KnownError(
+        id="evicted",
+        # "Evicted" on its own is too common a word ("evicted from cache"),
+        # so only eviction wording from the kubelet and kubectl counts
+        patterns=[r"the node was low on resource", r"low on resource: ephemeral-storage",
+                  r"reason:\s*\"?evicted\b", r"\bpods?\b[^.\n]{0,40}\bevicted\b", r"\d+/\d+\s+evicted\b"],
+        explanation=ErrorExplanation(
+            error_name="Evicted",
+            cause="The kubelet evicted the pod because its node ran low on memory, disk or ephemeral "
+                  "storage; pods using more than their requests are evicted first.",
+            impact="The pod is stopped and, if managed by a controller, recreated elsewhere; evicted pod "
+                   "objects stay behind until deleted.",
+            fix_steps=[
+                "Read the eviction message (which resource ran low) in kubectl describe pod",
+                "Set requests close to real usage so the pod isn't first in line",
+                "Set ephemeral-storage requests/limits if the app writes to its local filesystem or logs heavily",
+                "Clean up the evicted pod objects",
+            ],
+            helpful_commands=[
+                "kubectl describe pod <pod-name> -n <namespace>",
+                "kubectl get pods -A --field-selector=status.phase=Failed",
+                "kubectl delete pods -n <namespace> --field-selector=status.phase=Failed",
+                "kubectl describe node <node-name>",
+            ],
+            prevention="Give pods accurate requests (Guaranteed QoS for critical ones) and watch node "
+                       "disk and memory pressure.",
+        ),
+    ),
+]
+
+
+class ErrorKnowledgeBase:
+    """Matches pasted errors against KNOWN_ERRORS by signature.
+
+    Reason strings and exit codes are looked up in dicts, and all regexes
+    run as one combined pattern, so a lookup is a single pass over the text.
+    Only a single confident match is served: texts matching no error above
+    MIN_SCORE, or several different errors, are left to the model.
+    """
+
+    def __init__(self, known_errors: list[KnownError]):
+        self.known_errors = known_errors
+        self._by_reason: dict[str, list[int]] = {}
+        self._by_exit_code: dict[int, list[int]] = {}
+        groups = []
+        for index, known in enumerate(known_errors):
+            for reason in known.reasons:
+                self._by_reason.setdefault(reason.lower(), []).append(index)
+            for code in known.exit_codes:
+                self._by_exit_code.setdefault(code, []).append(index)
+            for n, pattern in enumerate(known.patterns):
+                groups.append(f"(?P<e{index}_{n}>{pattern})")
+        self._patterns = re.compile("|".join(groups), re.IGNORECASE) if groups else None
+
+        self.lookups = 0
+        self.ambiguous = 0
+        self.hits: dict[str, int] = {known.id: 0 for known in known_errors}
+        self.lookup_time = 0.0
+
+    def match(self, text: str) -> Optional[KnownError]:
+        """The one known error the text matches, or None (no match or ambiguous)."""
+        start = time.perf_counter()
+        scores: dict[int, int] = {}
+        for word in set(_WORD.findall(text)):
+            for index in self._by_reason.get(word.lower(), []):
+                scores[index] = scores.get(index, 0) + REASON_SCORE
+        if self._patterns is not None:
+            matched = {int(m.lastgroup[1:].split("_")[0]) for m in self._patterns.finditer(text)}
+            for index in matched:
+                scores[index] = scores.get(index, 0) + PATTERN_SCORE
+        codes = {int(a or b) for a, b in _EXIT_CODE.findall(text)}
+        for code in codes:
+            for index in self._by_exit_code.get(code, []):
+                scores[index] = scores.get(index, 0) + EXIT_CODE_SCORE
+
+        self.lookups += 1
+        known = None
+        outcome = "miss"
+        candidates = [index for index, score in scores.items() if score >= MIN_SCORE]
+        if len(candidates) == 1:
+            known = self.known_errors[candidates[0]]
+            self.hits[known.id] += 1
+            outcome = "hit"
+        elif candidates:
+            # e.g. CrashLoopBackOff caused by OOMKilled: the model explains how they relate
+            self.ambiguous += 1
+            outcome = "ambiguous"
+        elapsed = time.perf_counter() - start
+        self.lookup_time += elapsed
+        KB_LOOKUPS.inc(outcome=outcome, error=known.id if known else "")
+        KB_LOOKUP_DURATION.observe(elapsed)
+        return known
+
+    def stats(self) -> dict:
+        """Lookups, hit rate, ambiguous matches and hits per known error."""
+        total_hits = sum(self.hits.values())
+        return {
+            "lookups": self.lookups,
+            "hits": total_hits,
+            "misses": self.lookups - total_hits,
+            "ambiguous": self.ambiguous,
+            "hit_rate": round(total_hits / self.lookups, 3) if self.lookups else 0.0,
+            "avg_lookup_us": round(self.lookup_time / self.lookups * 1e6, 1) if self.lookups else 0.0,
+            "by_error": {error_id: count for error_id, count in self.hits.items() if count},
+        }
+
+
+knowledge_base = ErrorKnowledgeBase(KNOWN_ERRORS)
+
+
+def kb_stats() -> dict:
+    """Hit-rate stats of the error knowledge base."""
+    return knowledge_base.stats()
+
+
+def serve_known_error(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: answer known errors from the knowledge base.
+
+    On a match the pre-validated ErrorExplanation is returned as the
+    agent's JSON output (and stored under error_explanation, like the
+    model's answer would be), so no model call is made. Unmatched and
+    ambiguous errors return None and go to the model as usual. Each
+    lookup logs the running kb_stats() hit rate.
+    """
+    if not ERROR_KNOWLEDGE_BASE or callback_context.user_content is None:
+        return None
+    text = " ".join(part.text or "" for part in callback_context.user_content.parts or [])
+    known = knowledge_base.match(text)
+    stats = knowledge_base.stats()
+    summary = f"hit rate {stats['hit_rate']:.0%} over {stats['lookups']} lookups, {stats['avg_lookup_us']}us avg"
+    if known is None:
+        print(f"[error_kb] miss - asking the model ({summary})")
+        return None
+    print(f"[error_kb] hit: {known.id} ({summary})")
+    callback_context.state["error_explanation"] = known.explanation.model_dump()
+    return types.Content(role="model", parts=[types.Part(text=known.explanation.model_dump_json())])
@@ -0,0 +1,12 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class ErrorExplanation(BaseModel):
+    """Structured output for error explanations"""
+    error_name: str = Field(description="The name or type of the error")
+    cause: str = Field(description="What causes this error to occur")
+    impact: str = Field(description="What happens when this error occurs")
+    fix_steps: List[str] = Field(description="Step-by-step instructions to resolve the error")
+    helpful_commands: List[str] = Field(description="Useful commands for debugging or fixing the issue")
+    prevention: str = Field(description="How to prevent this error in the future")
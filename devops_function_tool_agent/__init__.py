@@ -1,15 +1,27 @@
 from .agent import root_agent
-from .tools import (
+# The async tools the agent registers. The blocking versions in tools.py are
+# legacy: import them from devops_function_tool_agent.tools in scripts.
+from .async_tools import (
     check_pod_status,
+    check_pods_bulk,
     get_gcp_instance,
+    find_gcp_instances,
     scale_deployment,
-    check_service_health
+    scale_deployments,
+    check_service_health,
+    check_services_health,
+    read_command_output
 )
 
 __all__ = [
     "root_agent",
     "check_pod_status",
+    "check_pods_bulk",
     "get_gcp_instance",
+    "find_gcp_instances",
     "scale_deployment",
-    "check_service_health"
+    "scale_deployments",
+    "check_service_health",
+    "check_services_health",
+    "read_command_output"
 ]
@@ -1,12 +1,27 @@
+import os
+
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 
-from .tools import (
+# Async tools: kubectl/gcloud run as asyncio subprocesses and HTTP checks use a
+# pooled keep-alive client, so one slow call doesn't block other sessions
+from .async_tools import (
     check_pod_status,
+    check_pods_bulk,
     get_gcp_instance,
+    find_gcp_instances,
     scale_deployment,
-    check_service_health
+    scale_deployments,
+    check_service_health,
+    check_services_health,
+    read_command_output
 )
+from .metrics import start_metrics_server
+
+
+# Expose Prometheus metrics on http://127.0.0.1:<port>/metrics when configured
+if os.getenv("DEVOPS_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("DEVOPS_METRICS_PORT")))
 
 
 DEVOPS_INSTRUCTION = """
@@ -16,17 +31,41 @@ You can execute actual commands on Kubernetes clusters and GCP projects.
 AVAILABLE TOOLS:
 1. check_pod_status - Get pod status in a Kubernetes namespace
    Use when: User asks about pods, wants to see what's running, or troubleshoot pod issues
+   Returns compact per-pod summaries; use unhealthy_only=True to focus on problems
+
+2. check_pods_bulk - Get pod status across many namespaces (or all) in one call
+   Use when: User asks about several namespaces, the whole cluster, or pods matching
+   a label selector (e.g. "app=web") or field selector (e.g. "spec.nodeName=node-1")
+   Prefer this over calling check_pod_status once per namespace
 
-2. get_gcp_instance - Get details of a GCP Compute Engine VM
+3. get_gcp_instance - Get details of a GCP Compute Engine VM
    Use when: User asks about VM details, status, or configuration
 
-3. scale_deployment - Scale a Kubernetes deployment (MODIFIES INFRASTRUCTURE)
+4. find_gcp_instances - Find many VMs across projects/zones by name pattern or label
+   Use when: User asks about several VMs, VMs matching a pattern (e.g. "web-*") or
+   label (e.g. "env=prod"), or doesn't know a VM's zone
+   Prefer this over calling get_gcp_instance once per VM
+
+5. scale_deployment - Scale a Kubernetes deployment (MODIFIES INFRASTRUCTURE)
    Use when: User wants to scale up/down a deployment
    IMPORTANT: Always ask for confirmation before scaling!
 
-4. check_service_health - Check if an HTTP endpoint is responding
+6. scale_deployments - Scale several deployments at once (MODIFIES INFRASTRUCTURE)
+   Use when: User wants to scale a group of deployments, e.g. a whole service tier
+   Call with dry_run=True first and show the diff, then confirm before scaling
+   Use wait=True to report readiness progress and time-to-ready per deployment
+
+7. check_service_health - Check if an HTTP endpoint is responding
    Use when: User wants to verify a service is up or check response times
 
+8. check_services_health - Check many HTTP endpoints concurrently
+   Use when: User wants to check several endpoints at once or compare latency
+   Returns per-URL results plus p50/p95/p99 response times
+
+9. read_command_output - Page through a kubectl/gcloud output that was truncated
+   Use when: A tool result has "truncated": true and you need a part that is not
+   in the head/tail shown; pass "output_handle" and then "next_offset"
+
 GUIDELINES:
 - Always use the appropriate tool instead of guessing answers
 - For scaling operations, ALWAYS confirm with the user before executing
@@ -48,9 +87,14 @@ root_agent = Agent(
     # Explicitly wrap Python functions as FunctionTool
     tools=[
         FunctionTool(func=check_pod_status),
+        FunctionTool(func=check_pods_bulk),
         FunctionTool(func=get_gcp_instance),
+        FunctionTool(func=find_gcp_instances),
         FunctionTool(func=scale_deployment),
-        FunctionTool(func=check_service_health)
+        FunctionTool(func=scale_deployments),
+        FunctionTool(func=check_service_health),
+        FunctionTool(func=check_services_health),
+        FunctionTool(func=read_command_output)
     ],
 
     instruction=DEVOPS_INSTRUCTION
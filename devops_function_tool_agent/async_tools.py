@@ -0,0 +1,690 @@
+import asyncio
+import codecs
+import json
+import os
+import re
+from typing import Optional, Sequence
+
+from .cache import tool_cache
+from .commands import COMMAND_TIMEOUT, CommandResult, output_fields, run_command
+from .health import probe_url, summarize_latencies
+from .informer import get_pod_informer, selector_filters
+from .metrics import instrument_tool
+from .output import READ_CHUNK, read_output
+from .pods import PodListParser, aggregate_pods, is_unhealthy, summarize_pod
+from .rollout import get_deployment_replicas, progress_exporter, wait_for_rollout
+
+
+# Async counterparts of the tools in tools.py. They keep the same names,
+# arguments and return shapes, so the LLM sees identical tool declarations,
+# but run kubectl/gcloud as asyncio subprocesses. A slow command only
+# suspends its own session instead of blocking the whole event loop.
+#
+# Read-only tools go through the shared tool_cache: identical calls within the
+# TTL are answered from memory and concurrent identical calls share a single
+# subprocess. scale_deployment invalidates the namespace it touched.
+# Namespaces with a synced pod informer are answered from memory instead.
+
+# check_pods_bulk switches to a single --all-namespaces query at this many namespaces.
+BULK_ALL_NAMESPACES_THRESHOLD = int(os.getenv("DEVOPS_BULK_ALL_NAMESPACES_THRESHOLD", "4"))
+
+_json_decoder = json.JSONDecoder()
+
+
+@instrument_tool("namespace")
+async def check_pod_status(namespace: str = "default", unhealthy_only: bool = False, raw: bool = False) -> dict:
+    """Check the status of pods in a Kubernetes namespace.
+
+    Use this tool when the user wants to see what pods are running,
+    check pod health, or troubleshoot pod issues.
+
+    Args:
+        namespace: The Kubernetes namespace to check. Defaults to "default".
+        unhealthy_only: Only list pods that are not Running/Succeeded or have
+            containers that are not ready. Defaults to False.
+        raw: Return the full `kubectl get pods -o json` output instead of
+            compact summaries. Only use this when a field that is not in the
+            summary is needed. Defaults to False.
+
+    Returns:
+        dict with "summary" (pod counts by phase and status, unhealthy count,
+        total restarts), "pods" (one compact record per pod with phase,
+        status, ready containers, restarts, node, age and
+        last_termination_reason), and "error" if any errors occurred.
+        With raw=True, "output" contains the full JSON instead.
+    """
+    informer = None if raw else get_pod_informer(namespace)
+    if informer is not None and informer.synced:
+        pods = informer.list_pods()
+        result = {
+            "success": True,
+            "namespace": namespace,
+            "summary": aggregate_pods(pods),
+            "pods": pods,
+            "error": None
+        }
+    else:
+        result = await tool_cache.get_or_call(
+            ("check_pod_status", namespace, raw),
+            lambda: _check_pod_status(namespace, raw),
+            tags=[f"namespace:{namespace}"],
+        )
+    if unhealthy_only and "pods" in result:
+        result["pods"] = [pod for pod in result["pods"] if is_unhealthy(pod)]
+    return result
+
+
+async def _list_pods(args: Sequence[str]) -> tuple[list[dict], CommandResult]:
+    """Run a `kubectl get pods -o json` command, summarizing pods as they stream in."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = PodListParser()
+    pods = []
+
+    def on_stdout(chunk: bytes) -> None:
+        for pod in parser.feed(decoder.decode(chunk)):
+            pods.append(summarize_pod(pod))
+
+    result = await run_command(args, on_stdout=on_stdout)
+    if result.returncode == 0:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return pods, result
+
+
+async def _get_pods(args: Sequence[str]) -> dict:
+    """Run a pod listing command and return {"success", "pods", "error"}."""
+    try:
+        pods, result = await _list_pods(args)
+        if result.returncode != 0:
+            return {"success": False, "error": result.stderr or f"kubectl exited with code {result.returncode}"}
+        return {
+            "success": True,
+            "pods": pods,
+            "error": result.stderr if result.stderr else None
+        }
+    except asyncio.TimeoutError:
+        return {"success": False, "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {"success": False, "error": "kubectl not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+
+async def _check_pod_status(namespace: str, raw: bool) -> dict:
+    args = ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
+    if not raw:
+        result = await _get_pods(args)
+        if not result["success"]:
+            return result
+        return {
+            "success": True,
+            "namespace": namespace,
+            "summary": aggregate_pods(result["pods"]),
+            "pods": result["pods"],
+            "error": result["error"]
+        }
+
+    try:
+        result = await run_command(args)
+        return {
+            "success": result.returncode == 0,
+            **output_fields(result),
+            "error": result.stderr if result.stderr else None
+        }
+    except asyncio.TimeoutError:
+        return {"success": False, "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {"success": False, "error": "kubectl not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+
+@instrument_tool("namespaces")
+async def check_pods_bulk(
+    namespaces: Optional[list[str]] = None,
+    all_namespaces: bool = False,
+    label_selector: str = "",
+    field_selector: str = "",
+    unhealthy_only: bool = False,
+) -> dict:
+    """Check pod status across many Kubernetes namespaces in one call.
+
+    Use this tool instead of calling check_pod_status repeatedly when the
+    user asks about pods in several namespaces, the whole cluster, or pods
+    matching a label (e.g. "app=web") or field selector
+    (e.g. "status.phase!=Running").
+
+    Args:
+        namespaces: The namespaces to check. Ignored when all_namespaces is True.
+        all_namespaces: Check every namespace in the cluster. Defaults to False.
+        label_selector: kubectl label selector, e.g. "app=web,tier!=cache".
+        field_selector: kubectl field selector, e.g. "spec.nodeName=node-1".
+        unhealthy_only: Only list pods that are not Running/Succeeded or have
+            containers that are not ready. Defaults to False.
+
+    Returns:
+        dict with "namespaces" mapping each namespace to its "summary" and
+        compact "pods", an overall "summary", and "errors" for namespaces
+        that could not be queried.
+    """
+    namespaces = sorted(set(namespaces or []))
+    if not namespaces and not all_namespaces:
+        return {"success": False, "error": "Provide at least one namespace or set all_namespaces=True"}
+
+    selectors = []
+    if label_selector:
+        selectors += ["-l", label_selector]
+    if field_selector:
+        selectors += ["--field-selector", field_selector]
+
+    grouped: dict[str, list[dict]] = {ns: [] for ns in namespaces}
+    errors = {}
+
+    # Namespaces with a synced informer answer equality selectors from its indexes
+    filters = None if all_namespaces else selector_filters(label_selector, field_selector)
+    queried = namespaces
+    if filters is not None:
+        queried = []
+        for ns in namespaces:
+            informer = get_pod_informer(ns)
+            if informer is not None and informer.synced:
+                grouped[ns] = informer.list_pods(**filters)
+            else:
+                queried.append(ns)
+
+    if all_namespaces or len(queried) >= BULK_ALL_NAMESPACES_THRESHOLD:
+        # One cluster-wide list is cheaper than many per-namespace processes
+        result = await tool_cache.get_or_call(
+            ("check_pods_bulk", "*", label_selector, field_selector),
+            lambda: _get_pods(["kubectl", "get", "pods", "--all-namespaces", "-o", "json", *selectors]),
+            tags=["namespace:*"],
+        )
+        if not result["success"]:
+            return result
+        for pod in result["pods"]:
+            if all_namespaces or pod["namespace"] in queried:
+                grouped.setdefault(pod["namespace"], []).append(pod)
+    else:
+        results = await asyncio.gather(*(
+            tool_cache.get_or_call(
+                ("check_pods_bulk", ns, label_selector, field_selector),
+                lambda ns=ns: _get_pods(["kubectl", "get", "pods", "-n", ns, "-o", "json", *selectors]),
+                tags=[f"namespace:{ns}"],
+            )
+            for ns in queried
+        ))
+        for ns, result in zip(queried, results):
+            if result["success"]:
+                grouped[ns] = result["pods"]
+            else:
+                del grouped[ns]
+                errors[ns] = result["error"]
+
+    all_pods = [pod for pods in grouped.values() for pod in pods]
+    by_namespace = {}
+    for ns in sorted(grouped):
+        pods = grouped[ns]
+        by_namespace[ns] = {
+            "summary": aggregate_pods(pods),
+            "pods": [pod for pod in pods if is_unhealthy(pod)] if unhealthy_only else pods,
+        }
+    return {
+        "success": not errors,
+        "summary": aggregate_pods(all_pods),
+        "namespaces": by_namespace,
+        "errors": errors or None,
+    }
+
+
+@instrument_tool("project")
+async def get_gcp_instance(instance_name: str, zone: str, project: str) -> dict:
+    """Get details of a GCP Compute Engine VM instance.
+
+    Use this tool when the user wants to see VM details like status,
+    machine type, IP addresses, disks, or other instance configuration.
+
+    Args:
+        instance_name: The name of the VM instance.
+        zone: The GCP zone where the instance is located (e.g., "us-central1-a").
+        project: The GCP project ID.
+
+    Returns:
+        dict with "output" containing instance details in JSON format,
+        and "error" if any errors occurred.
+    """
+    return await tool_cache.get_or_call(
+        ("get_gcp_instance", instance_name, zone, project),
+        lambda: _get_gcp_instance(instance_name, zone, project),
+        tags=[f"project:{project}"],
+    )
+
+
+async def _get_gcp_instance(instance_name: str, zone: str, project: str) -> dict:
+    try:
+        result = await run_command(
+            ["gcloud", "compute", "instances", "describe", instance_name,
+             "--zone", zone, "--project", project, "--format", "json"]
+        )
+        return {
+            "success": result.returncode == 0,
+            **output_fields(result),
+            "error": result.stderr if result.stderr else None
+        }
+    except asyncio.TimeoutError:
+        return {"success": False, "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {"success": False, "error": "gcloud not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Convert a shell-style name pattern ("web-*") to an anchored RE2 regex."""
+    return "^" + re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".") + "$"
+
+
+def _instance_filter(name_patterns: list[str], labels: list[str]) -> str:
+    clauses = []
+    if name_patterns:
+        names = " OR ".join(f"name~'{_glob_to_regex(p)}'" for p in name_patterns)
+        clauses.append(f"({names})")
+    for label in labels:
+        key, _, value = label.partition("=")
+        clauses.append(f"labels.{key.strip()}={value.strip()}" if value else f"labels.{key.strip()}:*")
+    return " AND ".join(clauses)
+
+
+def _instance_row(instance: dict) -> list:
+    interfaces = instance.get("networkInterfaces") or [{}]
+    access_configs = interfaces[0].get("accessConfigs") or [{}]
+    return [
+        instance.get("name"),
+        (instance.get("zone") or "").rsplit("/", 1)[-1],
+        instance.get("status"),
+        (instance.get("machineType") or "").rsplit("/", 1)[-1],
+        interfaces[0].get("networkIP"),
+        access_configs[0].get("natIP"),
+    ]
+
+
+class _JsonArrayParser:
+    """Incremental parser for a top-level JSON array (gcloud --format json).
+
+    Returns each element as soon as it is complete, so only the element
+    being read is buffered.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+        self._done = False
+
+    def feed(self, chunk: str) -> list:
+        self._buffer += chunk
+        items = []
+        pos = 0
+        while not self._done:
+            while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(self._buffer):
+                break
+            if not self._started:
+                if self._buffer[pos] != "[":
+                    raise ValueError("gcloud output is not a JSON list")
+                self._started = True
+                pos += 1
+                continue
+            if self._buffer[pos] == "]":
+                self._done = True
+                pos += 1
+                break
+            try:
+                item, pos = _json_decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break
+            items.append(item)
+        self._buffer = self._buffer[pos:]
+        return items
+
+    def close(self) -> None:
+        """Raise ValueError if the stream ended in the middle of the list."""
+        # gcloud prints nothing at all when no instance matches
+        if self._started and not self._done:
+            raise ValueError("Truncated instance list in gcloud output")
+
+
+async def _list_instances(project: str, zone: Optional[str], filter_expr: str) -> dict:
+    args = ["gcloud", "compute", "instances", "list", "--project", project,
+            "--format", "json(name,zone,status,machineType,networkInterfaces)"]
+    if zone:
+        args += ["--zones", zone]
+    if filter_expr:
+        args += ["--filter", filter_expr]
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = _JsonArrayParser()
+    rows = []
+
+    def on_stdout(chunk: bytes) -> None:
+        rows.extend(_instance_row(instance) for instance in parser.feed(decoder.decode(chunk)))
+
+    try:
+        result = await run_command(args, on_stdout=on_stdout)
+        if result.returncode != 0:
+            return {"success": False, "error": result.stderr or f"gcloud exited with code {result.returncode}"}
+        rows.extend(_instance_row(instance) for instance in parser.feed(decoder.decode(b"", final=True)))
+        parser.close()
+        return {"success": True, "rows": rows}
+    except asyncio.TimeoutError:
+        return {"success": False, "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {"success": False, "error": "gcloud not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+
+
+@instrument_tool("projects")
+async def find_gcp_instances(
+    projects: list[str],
+    zones: Optional[list[str]] = None,
+    name_patterns: Optional[list[str]] = None,
+    labels: Optional[list[str]] = None,
+) -> dict:
+    """Find GCP Compute Engine VMs across projects and zones in one call.
+
+    Use this tool instead of calling get_gcp_instance repeatedly when the
+    user asks about several VMs, VMs matching a name pattern or label, or
+    VMs whose exact zone is unknown.
+
+    Args:
+        projects: The GCP project IDs to search.
+        zones: Zones to search (e.g. ["us-central1-a", "us-east1-b"]).
+            Searches all zones when omitted.
+        name_patterns: Instance name patterns with * wildcards (e.g. ["web-*"]).
+        labels: Label filters as "key=value" (or just "key" to require the label).
+
+    Returns:
+        dict with "columns" and "rows" (one row per VM: name, zone, status,
+        machine type, internal IP, external IP, project), "count", and
+        "errors" for project/zone combinations that could not be listed.
+    """
+    filter_expr = _instance_filter(name_patterns or [], labels or [])
+    targets = [(project, zone) for project in projects for zone in (zones or [None])]
+    results = await asyncio.gather(*(
+        tool_cache.get_or_call(
+            ("find_gcp_instances", project, zone, filter_expr),
+            lambda project=project, zone=zone: _list_instances(project, zone, filter_expr),
+            tags=[f"project:{project}"],
+        )
+        for project, zone in targets
+    ))
+
+    rows = []
+    errors = {}
+    for (project, zone), result in zip(targets, results):
+        if not result["success"]:
+            errors[f"{project}/{zone or '*'}"] = result["error"]
+            continue
+        rows += [row + [project] for row in result["rows"]]
+    rows.sort(key=lambda row: (row[6], row[1], row[0]))
+    return {
+        "success": not errors,
+        "columns": ["name", "zone", "status", "machine_type", "internal_ip", "external_ip", "project"],
+        "rows": rows,
+        "count": len(rows),
+        "errors": errors or None,
+    }
+
+
+@instrument_tool("namespace")
+async def scale_deployment(deployment: str, replicas: int, namespace: str = "default") -> dict:
+    """Scale a Kubernetes deployment to the specified number of replicas.
+
+    IMPORTANT: This modifies infrastructure. Always confirm with the user before calling.
+
+    Use this tool when the user wants to scale up or scale down a deployment.
+
+    Args:
+        deployment: The name of the Kubernetes deployment to scale.
+        replicas: The target number of replicas (must be 0-100).
+        namespace: The Kubernetes namespace. Defaults to "default".
+
+    Returns:
+        dict with "success" boolean and "message" describing the result.
+    """
+    return await _scale_deployment(deployment, replicas, namespace)
+
+
+async def _scale_deployment(deployment: str, replicas: int, namespace: str) -> dict:
+    # Safety check: limit replicas to reasonable range
+    if replicas < 0 or replicas > 100:
+        return {
+            "success": False,
+            "message": f"Replicas must be between 0 and 100. Got: {replicas}"
+        }
+
+    try:
+        result = await run_command(
+            ["kubectl", "scale", "deployment", deployment,
+             f"--replicas={replicas}", "-n", namespace]
+        )
+        return {
+            "success": result.returncode == 0,
+            "message": result.stdout if result.returncode == 0 else result.stderr
+        }
+    except asyncio.TimeoutError:
+        return {"success": False, "message": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {"success": False, "message": "kubectl not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {"success": False, "message": f"Unexpected error: {str(e)}"}
+    finally:
+        # Even a failed or timed-out scale may have changed the pods
+        tool_cache.invalidate(f"namespace:{namespace}")
+        tool_cache.invalidate("namespace:*")
+
+
+def _parse_scale_target(target: str, namespace: str) -> tuple[str, str, int]:
+    """Parse "deployment=replicas" or "namespace/deployment=replicas"."""
+    name, sep, replicas = target.partition("=")
+    if not sep or not name.strip():
+        raise ValueError(f"Invalid target {target!r}; expected 'deployment=replicas'")
+    if "/" in name:
+        namespace, name = name.split("/", 1)
+    try:
+        count = int(replicas)
+    except ValueError:
+        raise ValueError(f"Invalid replica count in {target!r}") from None
+    return namespace.strip(), name.strip(), count
+
+
+async def _scale_one(deployment: str, namespace: str, replicas: int, dry_run: bool, wait: bool, wait_timeout: int) -> dict:
+    outcome = {"deployment": deployment, "namespace": namespace, "target_replicas": replicas}
+    try:
+        current = await get_deployment_replicas(deployment, namespace)
+    except asyncio.TimeoutError:
+        return {**outcome, "success": False, "message": f"Command timed out after {COMMAND_TIMEOUT} seconds"}
+    except FileNotFoundError:
+        return {**outcome, "success": False, "message": "kubectl not found. Is it installed and in PATH?"}
+    except Exception as e:
+        return {**outcome, "success": False, "message": str(e)}
+
+    change = replicas - current["replicas"]
+    outcome["previous_replicas"] = current["replicas"]
+    outcome["diff"] = f"{current['replicas']} -> {replicas} ({change:+d})" if change else f"{replicas} (no change)"
+    if dry_run:
+        return {**outcome, "success": True, "message": "Dry run: not scaled"}
+
+    scaled = await _scale_deployment(deployment, replicas, namespace)
+    outcome.update(scaled)
+    if not scaled["success"] or not wait:
+        return outcome
+
+    try:
+        rollout = await wait_for_rollout(
+            deployment, namespace, wait_timeout, on_progress=progress_exporter(deployment, namespace, replicas)
+        )
+    except asyncio.TimeoutError:
+        rollout = {"ready": False, "time_to_ready_s": None, "progress": [],
+                   "error": f"Rollout status timed out after {wait_timeout} seconds"}
+    except Exception as e:
+        rollout = {"ready": False, "time_to_ready_s": None, "progress": [], "error": f"Unexpected error: {str(e)}"}
+    outcome.update(rollout)
+    outcome["success"] = rollout["ready"]
+    return outcome
+
+
+def _scaled_namespaces(arguments: dict) -> set[str]:
+    """Namespaces named by scale_deployments targets, for its "target" label."""
+    namespaces = set()
+    for target in arguments.get("targets") or []:
+        name = str(target).partition("=")[0]
+        namespaces.add(name.split("/", 1)[0].strip() if "/" in name else arguments.get("namespace"))
+    return namespaces
+
+
+@instrument_tool(_scaled_namespaces)
+async def scale_deployments(
+    targets: list[str],
+    namespace: str = "default",
+    dry_run: bool = False,
+    wait: bool = False,
+    wait_timeout: int = 300,
+    max_parallel: int = 4,
+) -> dict:
+    """Scale several Kubernetes deployments at once, optionally waiting until they are ready.
+
+    IMPORTANT: This modifies infrastructure. Always show the dry-run diff and
+    confirm with the user before calling with dry_run=False.
+
+    Use this tool when the user wants to scale more than one deployment,
+    e.g. a whole service tier during an incident.
+
+    Args:
+        targets: Deployments and replica counts as "deployment=replicas" or
+            "namespace/deployment=replicas" (e.g. ["api=10", "prod/worker=6"]).
+            Every count must be 0-100.
+        namespace: Namespace for targets that don't include one. Defaults to "default".
+        dry_run: Only report current -> target replicas, don't scale. Defaults to False.
+        wait: Wait for each rollout to become ready and report progress and
+            time-to-ready. Defaults to False. The "progress" list is only
+            returned once every rollout has finished; while waiting, each
+            status line is logged and the available/desired replicas are
+            exported as the devops_rollout_*_replicas metrics.
+        wait_timeout: Seconds to wait for each rollout. Defaults to 300.
+        max_parallel: Maximum deployments scaled at the same time. Defaults to 4.
+
+    Returns:
+        dict with "success" (True if every deployment succeeded) and
+        "results", one per target in input order, each with "diff"
+        (e.g. "3 -> 5 (+2)"), "success", "message" and, when waiting,
+        "ready", "time_to_ready_s" and "progress".
+    """
+    try:
+        parsed = [_parse_scale_target(target, namespace) for target in targets]
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+    # Safety check: validate the whole batch before touching anything
+    invalid = [f"{ns}/{name}={count}" for ns, name, count in parsed if count < 0 or count > 100]
+    if invalid:
+        return {
+            "success": False,
+            "message": f"Replicas must be between 0 and 100. Got: {', '.join(invalid)}"
+        }
+
+    slots = asyncio.Semaphore(max(1, max_parallel))
+
+    async def scale(ns: str, name: str, count: int) -> dict:
+        async with slots:
+            return await _scale_one(name, ns, count, dry_run, wait, wait_timeout)
+
+    results = await asyncio.gather(*(scale(ns, name, count) for ns, name, count in parsed))
+    return {
+        "success": all(r["success"] for r in results),
+        "dry_run": dry_run,
+        "results": results,
+    }
+
+
+@instrument_tool()
+async def check_service_health(url: str, timeout: int = 5) -> dict:
+    """Check if an HTTP service endpoint is healthy and responding.
+
+    Use this tool when the user wants to verify if a service is up,
+    check response times, or troubleshoot connectivity issues.
+
+    Args:
+        url: The full URL to check (e.g., "https://api.example.com/health").
+        timeout: Request timeout in seconds. Defaults to 5.
+
+    The request is made with requests over a shared keep-alive pool, so
+    redirects, proxies, CA bundles and .netrc work as with requests.get.
+
+    Returns:
+        dict with "healthy" boolean, "status_code" (of the final response
+        after redirects), "response_time_ms" (time to first byte),
+        "connect_time_ms" (TCP/TLS setup, 0 when a pooled connection was
+        reused), "redirects", and "error" if the request failed.
+    """
+    return await probe_url(url, timeout)
+
+
+@instrument_tool()
+async def check_services_health(urls: list[str], timeout: int = 5, max_concurrency: int = 20) -> dict:
+    """Check many HTTP endpoints at once and summarize their latency.
+
+    Use this tool when the user wants to check several services or endpoints
+    together, compare response times, or get latency percentiles.
+
+    Args:
+        urls: The full URLs to check (e.g., ["https://api.example.com/health"]).
+        timeout: Per-request timeout in seconds. Defaults to 5.
+        max_concurrency: Maximum number of requests in flight. Defaults to 20.
+
+    Returns:
+        dict with "results" (one entry per URL, in input order, each with
+        "healthy", "status_code", "response_time_ms", "connect_time_ms" or
+        "error") and "summary" with healthy/unhealthy counts and p50/p95/p99
+        of response_time_ms and connect_time_ms.
+    """
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def probe(url: str) -> dict:
+        async with slots:
+            return await probe_url(url, timeout)
+
+    results = await asyncio.gather(*(probe(url) for url in urls))
+    answered = [r for r in results if "status_code" in r]
+    healthy = sum(1 for r in results if r["healthy"])
+    return {
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "healthy": healthy,
+            "unhealthy": len(results) - healthy,
+            "response_time": summarize_latencies([r["response_time_ms"] for r in answered]),
+            "connect_time": summarize_latencies(
+                [r["connect_time_ms"] for r in answered if not r["reused_connection"]]
+            ),
+        },
+    }
+
+
+@instrument_tool()
+async def read_command_output(handle: str, offset: int = 0, max_bytes: int = READ_CHUNK) -> dict:
+    """Read more of a kubectl/gcloud output that was too large to return at once.
+
+    Use this tool when a previous tool result has "truncated": true and the
+    part you need is not in the head or tail shown. Page through the output
+    by passing "next_offset" back as offset until "eof" is true.
+
+    Args:
+        handle: The "output_handle" from the truncated tool result.
+        offset: Byte offset to start reading from. Defaults to 0.
+        max_bytes: Bytes to read (at most 65536). Defaults to 65536.
+
+    Returns:
+        dict with "output", "next_offset", "total_bytes", "eof",
+        and "error" if the handle is unknown or expired.
+    """
+    return read_output(handle, offset, max_bytes)
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+
+# Seconds a read-only tool result stays fresh, and how many results to keep.
+CACHE_TTL = float(os.getenv("DEVOPS_TOOL_CACHE_TTL", "15"))
+CACHE_MAX_ENTRIES = int(os.getenv("DEVOPS_TOOL_CACHE_SIZE", "256"))
+
+
+class ToolCache:
+    """TTL + LRU cache for read-only tool results with single-flight calls.
+
+    Results are keyed by a hashable (tool, args...) tuple. While a call for a
+    key is running, identical calls await the same task instead of starting
+    another kubectl/gcloud process. Each entry can carry tags (for example
+    "namespace:prod") so writes can invalidate every result they affect.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, tags, value), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple[float, frozenset, Any]]" = OrderedDict()
+        # key -> (task, tags) for calls that are still running
+        self._inflight: dict[Hashable, tuple[asyncio.Task, frozenset]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_call(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[dict]],
+        tags: Iterable[str] = (),
+    ) -> dict:
+        """Return the cached result for `key`, or run `call` once to produce it.
+
+        Only results with "success": True are stored, so errors and timeouts
+        are retried on the next call.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            task = inflight[0]
+        else:
+            self.misses += 1
+            tags = frozenset(tags)
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = (task, tags)
+            task.add_done_callback(lambda t: self._finish(key, t, tags))
+
+        # shield: one caller being cancelled must not cancel the shared call
+        return dict(await asyncio.shield(task))
+
+    def _finish(self, key: Hashable, task: asyncio.Task, tags: frozenset) -> None:
+        inflight = self._inflight.get(key)
+        if inflight is None or inflight[0] is not task:
+            # Invalidated while running; the result may already be stale
+            return
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if not value.get("success"):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, tags, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tag: str) -> int:
+        """Drop cached and in-flight results carrying `tag`. Returns the count."""
+        stale = [key for key, (_, tags, _) in self._entries.items() if tag in tags]
+        for key in stale:
+            del self._entries[key]
+        running = [key for key, (_, tags) in self._inflight.items() if tag in tags]
+        for key in running:
+            del self._inflight[key]
+        return len(stale) + len(running)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Shared by every session in the process
+tool_cache = ToolCache()
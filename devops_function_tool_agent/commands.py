@@ -0,0 +1,281 @@
+import asyncio
+import os
+import subprocess
+import threading
+import time
+import weakref
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from .metrics import (
+    COMMAND_DURATION,
+    COMMAND_FAILURES,
+    COMMAND_QUEUE_WAIT,
+    COMMAND_STDOUT_BYTES,
+    COMMAND_TIMEOUTS,
+    COMMANDS_IN_FLIGHT,
+    current_tool,
+)
+from .output import OutputCapture
+
+
+# Upper bound on kubectl/gcloud processes running at the same time in this
+# process. Calls beyond the limit wait for a free slot instead of forking.
+MAX_CONCURRENT_COMMANDS = int(os.getenv("DEVOPS_TOOL_MAX_CONCURRENCY", "8"))
+
+# Separate limit for long-running waits (`kubectl rollout status`), so a batch
+# of rollouts can't hold every MAX_CONCURRENT_COMMANDS slot for minutes.
+MAX_CONCURRENT_WAITS = int(os.getenv("DEVOPS_TOOL_MAX_WAITS", "32"))
+
+# Default per-command timeout in seconds (matches the synchronous tools).
+COMMAND_TIMEOUT = 30
+
+_READ_CHUNK = 64 * 1024
+
+# kubectl/gcloud put the useful part of an error at the end; keep that much.
+STDERR_CAP = 64 * 1024
+
+# One pair of semaphores (commands, waits) per event loop, so the module works
+# under `adk web` as well as in scripts that call asyncio.run() more than once.
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[asyncio.Semaphore, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class CommandResult(NamedTuple):
+    """Outcome of a finished command.
+
+    When stdout exceeded the output cap, `stdout` holds its head and tail and
+    `output_handle` names the spilled copy (see output.read_output).
+    """
+    returncode: int
+    stdout: str
+    stderr: str
+    stdout_bytes: int = 0
+    output_handle: Optional[str] = None
+
+
+def _command_slots(long_running: bool = False) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = (
+            asyncio.Semaphore(MAX_CONCURRENT_COMMANDS),
+            asyncio.Semaphore(MAX_CONCURRENT_WAITS),
+        )
+    return slots[1] if long_running else slots[0]
+
+
+async def terminate_process(process: asyncio.subprocess.Process) -> None:
+    """Kill a still-running process and reap it so no zombie is left behind."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+class _StderrTail:
+    """Keep the last STDERR_CAP bytes of stderr."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        self.data += chunk
+        del self.data[:-STDERR_CAP]
+
+    def text(self) -> str:
+        return bytes(self.data).decode(errors="replace")
+
+
+async def _drain(stream: asyncio.StreamReader, write: Callable[[bytes], None]) -> None:
+    while True:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            break
+        write(chunk)
+
+
+async def _stream_output(
+    process: asyncio.subprocess.Process,
+    on_stdout: Callable[[bytes], None],
+    stderr: _StderrTail,
+) -> None:
+    """Pass stdout to `on_stdout` and stderr to `stderr` chunk by chunk."""
+    stderr_task = asyncio.ensure_future(_drain(process.stderr, stderr.write))
+    try:
+        await _drain(process.stdout, on_stdout)
+        await process.wait()
+        await stderr_task
+    finally:
+        stderr_task.cancel()
+
+
+async def run_command(
+    args: Sequence[str],
+    timeout: float = COMMAND_TIMEOUT,
+    on_stdout: Optional[Callable[[bytes], None]] = None,
+    max_output: Optional[int] = None,
+    long_running: bool = False,
+) -> CommandResult:
+    """Run a command without blocking the event loop.
+
+    The command waits for one of MAX_CONCURRENT_COMMANDS slots, then runs as an
+    asyncio subprocess. If the caller is cancelled or the timeout expires the
+    process is killed before the exception propagates.
+
+    Output is read incrementally. Stdout beyond `max_output` bytes spills to a
+    temporary file, and only the last STDERR_CAP bytes of stderr are kept, so
+    memory per command stays bounded however much it prints.
+
+    Args:
+        args: The program and its arguments, e.g. ["kubectl", "get", "pods"].
+        timeout: Seconds to wait for the command to finish.
+        on_stdout: Optional callback that receives stdout in chunks as it is
+            produced. When set, stdout is not kept and CommandResult.stdout
+            is empty; exceptions raised by the callback kill the process.
+        max_output: Bytes of stdout to keep in memory. Defaults to
+            DEVOPS_TOOL_OUTPUT_CAP.
+        long_running: The command waits on the cluster (e.g. `kubectl
+            rollout status`) rather than doing work. It takes one of the
+            MAX_CONCURRENT_WAITS slots instead, leaving the command slots to
+            short calls.
+
+    Returns:
+        CommandResult with the exit code, decoded stdout/stderr and, if stdout
+        was truncated, the handle of the full output.
+
+    Raises:
+        asyncio.TimeoutError: The command did not finish within `timeout`.
+        FileNotFoundError: The program is not installed or not in PATH.
+    """
+    tool, target = current_tool.get()
+    program = os.path.basename(args[0])
+    capture = OutputCapture(max_output) if max_output is not None else OutputCapture()
+    stderr = _StderrTail()
+    queued_at = time.perf_counter()
+    async with _command_slots(long_running):
+        started_at = time.perf_counter()
+        COMMAND_QUEUE_WAIT.observe(started_at - queued_at, tool=tool, program=program)
+        stdout_bytes = 0
+
+        def read_stdout(chunk: bytes) -> None:
+            nonlocal stdout_bytes
+            stdout_bytes += len(chunk)
+            if on_stdout is None:
+                capture.write(chunk)
+            else:
+                on_stdout(chunk)
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        COMMANDS_IN_FLIGHT.inc(program=program)
+        try:
+            await asyncio.wait_for(_stream_output(process, read_stdout, stderr), timeout)
+        except BaseException as e:
+            # Timeout or cancellation: don't leave kubectl/gcloud running
+            if isinstance(e, asyncio.TimeoutError):
+                COMMAND_TIMEOUTS.inc(tool=tool, target=target, program=program)
+            await terminate_process(process)
+            capture.discard()
+            raise
+        finally:
+            COMMANDS_IN_FLIGHT.dec(program=program)
+            COMMAND_DURATION.observe(time.perf_counter() - started_at, tool=tool, target=target, program=program)
+            COMMAND_STDOUT_BYTES.inc(stdout_bytes, tool=tool, target=target, program=program)
+
+    if process.returncode != 0:
+        COMMAND_FAILURES.inc(tool=tool, target=target, program=program, code=process.returncode)
+    stdout, handle = capture.finish()
+    return CommandResult(
+        returncode=process.returncode,
+        stdout=stdout,
+        stderr=stderr.text(),
+        stdout_bytes=stdout_bytes,
+        output_handle=handle,
+    )
+
+
+def _drain_sync(stream, write: Callable[[bytes], None]) -> None:
+    for chunk in iter(lambda: stream.read1(_READ_CHUNK), b""):
+        write(chunk)
+
+
+def run_command_sync(
+    args: Sequence[str],
+    timeout: float = COMMAND_TIMEOUT,
+    max_output: Optional[int] = None,
+) -> CommandResult:
+    """Blocking counterpart of run_command() for the synchronous tools.
+
+    Same bounded capture as run_command(): stdout past `max_output` spills to a
+    temporary file and stderr keeps its last STDERR_CAP bytes. Not limited by
+    the async command slots.
+
+    Raises:
+        subprocess.TimeoutExpired: The command did not finish within `timeout`
+            (the process is killed first).
+        FileNotFoundError: The program is not installed or not in PATH.
+    """
+    tool, target = current_tool.get()
+    program = os.path.basename(args[0])
+    capture = OutputCapture(max_output) if max_output is not None else OutputCapture()
+    stderr = _StderrTail()
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    COMMANDS_IN_FLIGHT.inc(program=program)
+    readers = [
+        threading.Thread(target=_drain_sync, args=(process.stdout, capture.write), daemon=True),
+        threading.Thread(target=_drain_sync, args=(process.stderr, stderr.write), daemon=True),
+    ]
+    try:
+        for reader in readers:
+            reader.start()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            COMMAND_TIMEOUTS.inc(tool=tool, target=target, program=program)
+            process.kill()
+            process.wait()
+            for reader in readers:
+                reader.join()
+            capture.discard()
+            raise
+        for reader in readers:
+            reader.join()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        COMMANDS_IN_FLIGHT.dec(program=program)
+        COMMAND_DURATION.observe(time.perf_counter() - started_at, tool=tool, target=target, program=program)
+        COMMAND_STDOUT_BYTES.inc(capture.size, tool=tool, target=target, program=program)
+
+    if process.returncode != 0:
+        COMMAND_FAILURES.inc(tool=tool, target=target, program=program, code=process.returncode)
+    stdout, handle = capture.finish()
+    return CommandResult(
+        returncode=process.returncode,
+        stdout=stdout,
+        stderr=stderr.text(),
+        stdout_bytes=capture.size,
+        output_handle=handle,
+    )
+
+
+def output_fields(result: CommandResult) -> dict:
+    """The "output" entry of a tool result, plus truncation details if stdout spilled."""
+    fields = {"output": result.stdout}
+    if result.output_handle is not None:
+        fields.update(
+            truncated=True,
+            output_bytes=result.stdout_bytes,
+            output_handle=result.output_handle,
+        )
+    return fields
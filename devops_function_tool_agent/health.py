@@ -0,0 +1,188 @@
+import asyncio
+import functools
+import http.cookiejar
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared with the model scheduler and the multi-agent runner (repository root)
+from latency_stats import percentile
+
+from .metrics import HTTP_PROBE_CONNECT, HTTP_PROBE_TTFB, HTTP_PROBES, current_tool
+
+
+# Worker threads running probes. The pool keeps as many keep-alive
+# connections per host, so a full batch to one host never discards one.
+PROBE_WORKERS = int(os.getenv("DEVOPS_HEALTH_PROBE_WORKERS", "20"))
+
+# Redirects followed before a probe gives up (requests follows up to 30).
+MAX_REDIRECTS = 10
+
+# Connection setup done by the current worker thread since its last response
+_setup = threading.local()
+
+
+class _TimedConnect:
+    """Connection mixin that adds the time spent in connect() to `_setup`.
+
+    connect() covers DNS, TCP, any proxy tunnel and (for https) the TLS
+    handshake. It only runs for new connections, not reused ones.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _setup.connect_s += time.perf_counter() - start
+            _setup.connections += 1
+
+
+@functools.lru_cache(maxsize=None)
+def _timed_pool(pool_cls: type) -> type:
+    connection_cls = type(pool_cls.ConnectionCls.__name__, (_TimedConnect, pool_cls.ConnectionCls), {})
+    return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": connection_cls})
+
+
+def _time_connections(manager):
+    """Make a urllib3 PoolManager (direct, proxy or SOCKS) open timed connections."""
+    manager.pool_classes_by_scheme = {
+        scheme: _timed_pool(pool_cls) for scheme, pool_cls in manager.pool_classes_by_scheme.items()
+    }
+    return manager
+
+
+class _ProbeAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        _time_connections(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        return _time_connections(super().proxy_manager_for(proxy, **proxy_kwargs))
+
+
+def _record_hop(response: requests.Response, **kwargs) -> None:
+    """Response hook: attach the connection setup this hop needed to the response."""
+    response.connect_s = _setup.connect_s
+    response.new_connection = _setup.connections > 0
+    _setup.connect_s = 0.0
+    _setup.connections = 0
+
+
+def new_session(workers: int = PROBE_WORKERS) -> requests.Session:
+    """A requests.Session for probes, keeping `workers` connections per host.
+
+    The session honors the same environment as requests.get: HTTP(S)_PROXY,
+    NO_PROXY, SOCKS proxies (with PySocks installed), REQUESTS_CA_BUNDLE /
+    CURL_CA_BUNDLE and .netrc credentials.
+    """
+    session = requests.Session()
+    adapter = _ProbeAdapter(pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.max_redirects = MAX_REDIRECTS
+    session.headers["User-Agent"] = "devops-health-probe"
+    # Probes are independent: don't carry cookies from one to the next
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    session.hooks["response"].append(_record_hop)
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="health-probe")
+
+
+def get_session() -> requests.Session:
+    """Return the probe session shared by all tool calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+def _probe_once(session: requests.Session, url: str, timeout: float) -> dict:
+    """GET `url` in the calling (worker) thread and time each hop."""
+    _setup.connect_s = 0.0
+    _setup.connections = 0
+    start = time.perf_counter()
+    response = session.get(url, timeout=timeout)
+    total_ms = (time.perf_counter() - start) * 1000
+    hops = [*response.history, response]
+
+    result = {
+        "url": url,
+        "healthy": response.status_code == 200,
+        "status_code": response.status_code,
+        # elapsed runs from sending the request to the parsed headers; without
+        # connection setup that is the final request's time to first byte
+        "response_time_ms": round(max(0.0, response.elapsed.total_seconds() - response.connect_s) * 1000, 2),
+        "connect_time_ms": round(sum(hop.connect_s for hop in hops) * 1000, 2),
+        "total_time_ms": round(total_ms, 2),
+        "reused_connection": not any(hop.new_connection for hop in hops),
+        "redirects": len(response.history),
+    }
+    if response.history:
+        result["final_url"] = response.url
+    return result
+
+
+async def probe_url(url: str, timeout: float = 5, session: Optional[requests.Session] = None) -> dict:
+    """Probe one URL over a pooled keep-alive connection.
+
+    The request is a requests GET run in one of PROBE_WORKERS threads, so
+    redirects (up to MAX_REDIRECTS), proxies, CA bundles and .netrc behave
+    exactly as with requests.get.
+
+    Args:
+        url: The http:// or https:// URL to request with GET.
+        timeout: Seconds allowed to connect and between bytes of the
+            response (requests' timeout, applied to each redirect hop).
+        session: Session to use. Defaults to the shared session.
+
+    Returns:
+        dict with "healthy", "status_code" (of the final response),
+        "response_time_ms" (time to first byte of the final response,
+        excluding connection setup), "connect_time_ms" (0 when only existing
+        connections were reused), "total_time_ms", "redirects" (and
+        "final_url" when redirected), or "error".
+    """
+    if not url.startswith(("http://", "https://")):
+        return {"url": url, "healthy": False, "error": "URL must start with http:// or https://"}
+
+    tool, _ = current_tool.get()
+    host = urlsplit(url).netloc.rsplit("@", 1)[-1]
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(_executor, _probe_once, session or get_session(), url, timeout)
+    except requests.Timeout:
+        HTTP_PROBES.inc(tool=tool, host=host, result="timeout")
+        return {"url": url, "healthy": False, "error": f"Request timed out after {timeout} seconds"}
+    except requests.ConnectionError:
+        HTTP_PROBES.inc(tool=tool, host=host, result="connection_error")
+        return {"url": url, "healthy": False, "error": "Connection failed. Check if the URL is correct and accessible."}
+    except Exception as e:
+        HTTP_PROBES.inc(tool=tool, host=host, result="error")
+        return {"url": url, "healthy": False, "error": str(e)}
+
+    HTTP_PROBES.inc(tool=tool, host=host, result=str(result["status_code"]))
+    HTTP_PROBE_TTFB.observe(result["response_time_ms"] / 1000, tool=tool, host=host)
+    if not result["reused_connection"]:
+        HTTP_PROBE_CONNECT.observe(result["connect_time_ms"] / 1000, tool=tool, host=host)
+    return result
+
+
+def summarize_latencies(values: list[float]) -> dict:
+    """p50/p95/p99 summary used by the batch probe."""
+    return {
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+    }
@@ -0,0 +1,428 @@
+import asyncio
+import codecs
+import json
+import logging
+import os
+import random
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from .commands import run_command, terminate_process
+from .metrics import current_tool
+from .pods import PodListParser, format_age, summarize_pod
+
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated namespaces that check_pod_status should serve from an
+# in-memory informer instead of forking kubectl on every call.
+INFORMER_NAMESPACES = [
+    ns.strip() for ns in os.getenv("DEVOPS_POD_INFORMER_NAMESPACES", "").split(",") if ns.strip()
+]
+
+# Full relist + watch restart interval, to heal any missed events.
+RESYNC_PERIOD = float(os.getenv("DEVOPS_POD_INFORMER_RESYNC", "300"))
+
+# Seconds the initial list may take before the informer backs off and retries.
+LIST_TIMEOUT = float(os.getenv("DEVOPS_POD_INFORMER_LIST_TIMEOUT", "30"))
+
+# A watch that stays up this long counts as healthy and resets the backoff.
+STABLE_AFTER = float(os.getenv("DEVOPS_POD_INFORMER_STABLE_AFTER", "60"))
+
+# A watch process still running this long after it started is considered
+# established (it may not print anything until a pod changes).
+WATCH_ESTABLISHED_AFTER = 1.0
+
+# Lines of kubectl stderr kept to explain why a watch ended
+STDERR_TAIL_LINES = 5
+
+_LABEL_TERM = re.compile(r"([\w./-]+)\s*==?\s*([\w.-]*)")
+_FIELD_TERM = re.compile(r"(spec\.nodeName|status\.phase)\s*==?\s*([\w.-]+)")
+
+_decoder = json.JSONDecoder()
+
+
+class WatchEventParser:
+    """Incremental parser for a pod watch stream (`kubectl get --raw ...?watch=1`).
+
+    The API server writes one {"type": ..., "object": ...} document per event,
+    so the stream is split by decoding one JSON value at a time (whitespace
+    between documents, including pretty-printing, is ignored).
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> list[dict]:
+        self._buffer += chunk
+        events = []
+        pos = 0
+        while True:
+            while pos < len(self._buffer) and self._buffer[pos].isspace():
+                pos += 1
+            if pos == len(self._buffer):
+                break
+            try:
+                event, pos = _decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break
+            events.append(event)
+        self._buffer = self._buffer[pos:]
+        return events
+
+
+def selector_filters(label_selector: str = "", field_selector: str = "") -> Optional[dict]:
+    """list_pods() filters equivalent to kubectl selectors, or None.
+
+    Only what the indexes can answer is translated: equality label terms
+    ("app=web,tier==frontend") and the "spec.nodeName=<node>" and
+    "status.phase=<phase>" fields. Anything else (!=, set-based terms,
+    other fields) returns None and must go to kubectl.
+    """
+    labels: dict[str, str] = {}
+    for term in filter(None, (term.strip() for term in label_selector.split(","))):
+        match = _LABEL_TERM.fullmatch(term)
+        if not match or labels.get(match.group(1), match.group(2)) != match.group(2):
+            return None
+        labels[match.group(1)] = match.group(2)
+    fields: dict[str, str] = {}
+    for term in filter(None, (term.strip() for term in field_selector.split(","))):
+        match = _FIELD_TERM.fullmatch(term)
+        if not match or fields.get(match.group(1), match.group(2)) != match.group(2):
+            return None
+        fields[match.group(1)] = match.group(2)
+    return {"labels": labels, "node": fields.get("spec.nodeName"), "phase": fields.get("status.phase")}
+
+
+class PodInformer:
+    """Watch-backed, indexed in-memory table of the pods in one namespace.
+
+    The informer lists the namespace once (`kubectl get --raw`), then opens a
+    long-lived watch starting at the list's resourceVersion and applies
+    ADDED/MODIFIED/DELETED events to the table. Because the watch resumes
+    exactly where the list ended, changes made between the two are replayed
+    rather than lost. Pods are indexed by name, label, node and phase, so
+    queries (including check_pods_bulk's equality selectors, see
+    selector_filters) are dictionary lookups instead of kubectl calls.
+
+    The informer is synced once the list is applied and the watch is
+    established (it delivered data or is still running after a moment).
+    If the watch stream ends or kubectl fails, it marks itself unsynced,
+    backs off exponentially (with jitter) and relists. The backoff only
+    resets after a watch stays up for `stable_after` seconds, so a watch
+    that fails right away (RBAC allows list but not watch, repeated 410
+    Gone) doesn't relist in a tight loop. Every `resync_period` seconds it
+    relists and restarts the watch even if the stream looks healthy.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        kubectl: str = "kubectl",
+        resync_period: float = RESYNC_PERIOD,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+        list_timeout: float = LIST_TIMEOUT,
+        stable_after: float = STABLE_AFTER,
+    ):
+        self.namespace = namespace
+        self.kubectl = kubectl
+        self.resync_period = resync_period
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.list_timeout = list_timeout
+        self.stable_after = stable_after
+        self.last_error: Optional[str] = None
+        self.relists = 0
+        self.events = 0
+
+        self._pods: dict[str, dict] = {}
+        self._created: dict[str, Optional[str]] = {}
+        self._labels: dict[str, dict[str, str]] = {}
+        self._by_label: dict[tuple[str, str], set[str]] = {}
+        self._by_node: dict[Optional[str], set[str]] = {}
+        self._by_phase: dict[str, set[str]] = {}
+        self._synced = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def synced(self) -> bool:
+        """True once the table reflects a full list and the watch continues from it."""
+        return self._synced.is_set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._synced.clear()
+
+    async def wait_synced(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._synced.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # Queries
+
+    def get(self, name: str) -> Optional[dict]:
+        """Return the summary for one pod, or None if it doesn't exist."""
+        if name not in self._pods:
+            return None
+        return self._with_age(name, datetime.now(timezone.utc))
+
+    def list_pods(
+        self,
+        labels: Optional[dict[str, str]] = None,
+        node: Optional[str] = None,
+        phase: Optional[str] = None,
+    ) -> list[dict]:
+        """Return pod summaries matching every given filter, sorted by name.
+
+        Args:
+            labels: Exact label matches, e.g. {"app": "web"}.
+            node: Node name the pods are scheduled on.
+            phase: Pod phase, e.g. "Running" or "Pending".
+        """
+        candidates = []
+        for key, value in (labels or {}).items():
+            candidates.append(self._by_label.get((key, value), set()))
+        if node is not None:
+            candidates.append(self._by_node.get(node, set()))
+        if phase is not None:
+            candidates.append(self._by_phase.get(phase, set()))
+
+        if candidates:
+            candidates.sort(key=len)
+            names = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            names = self._pods.keys()
+        now = datetime.now(timezone.utc)
+        return [self._with_age(name, now) for name in sorted(names)]
+
+    def _with_age(self, name: str, now: datetime) -> dict:
+        return dict(self._pods[name], age=format_age(self._created[name], now))
+
+    # Table maintenance
+
+    def _index(self, name: str) -> None:
+        summary = self._pods[name]
+        for item in self._labels[name].items():
+            self._by_label.setdefault(item, set()).add(name)
+        self._by_node.setdefault(summary["node"], set()).add(name)
+        self._by_phase.setdefault(summary["phase"], set()).add(name)
+
+    def _unindex(self, name: str) -> None:
+        summary = self._pods[name]
+        indexes = [(self._by_label, item) for item in self._labels[name].items()]
+        indexes += [(self._by_node, summary["node"]), (self._by_phase, summary["phase"])]
+        for index, key in indexes:
+            names = index.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del index[key]
+
+    def _upsert(self, pod: dict) -> None:
+        metadata = pod.get("metadata", {})
+        name = metadata.get("name")
+        if not name:
+            return
+        if name in self._pods:
+            self._unindex(name)
+        self._pods[name] = summarize_pod(pod)
+        self._created[name] = metadata.get("creationTimestamp")
+        self._labels[name] = dict(metadata.get("labels") or {})
+        self._index(name)
+
+    def _delete(self, pod: dict) -> None:
+        name = pod.get("metadata", {}).get("name")
+        if name in self._pods:
+            self._unindex(name)
+            del self._pods[name], self._created[name], self._labels[name]
+
+    def _replace_all(self, pods: list[dict]) -> None:
+        self._pods.clear()
+        self._created.clear()
+        self._labels.clear()
+        self._by_label.clear()
+        self._by_node.clear()
+        self._by_phase.clear()
+        for pod in pods:
+            self._upsert(pod)
+
+    def _apply(self, event: dict) -> None:
+        event_type = event.get("type")
+        obj = event.get("object") or {}
+        if event_type in ("ADDED", "MODIFIED"):
+            self._upsert(obj)
+        elif event_type == "DELETED":
+            self._delete(obj)
+        elif event_type == "BOOKMARK":
+            # Progress marker only; carries no pod changes
+            return
+        elif event_type == "ERROR":
+            # e.g. 410 Gone: the watch can't continue, relist
+            raise ConnectionError(f"Watch error: {obj.get('message', obj)}")
+        self.events += 1
+
+    # Watch loop
+
+    async def _relist(self) -> str:
+        """Replace the table with a fresh list; returns the list's resourceVersion."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parser = PodListParser()
+        pods = []
+
+        def on_stdout(chunk: bytes) -> None:
+            pods.extend(parser.feed(decoder.decode(chunk)))
+
+        try:
+            result = await run_command(
+                [self.kubectl, "get", "--raw", f"/api/v1/namespaces/{self.namespace}/pods"],
+                on_stdout=on_stdout,
+                timeout=self.list_timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise ConnectionError(f"Listing pods timed out after {self.list_timeout:g}s") from e
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"kubectl exited with code {result.returncode}")
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        resource_version = parser.metadata.get("resourceVersion")
+        if not resource_version:
+            raise RuntimeError("Pod list has no resourceVersion to watch from")
+        self._replace_all(pods)
+        self.relists += 1
+        # The watch resumes exactly where this list ends, so nothing is missed
+        # between the two even though the watch process starts later.
+        return resource_version
+
+    async def _watch(self, resource_version: str) -> None:
+        """Apply watch events from `resource_version` until the stream ends.
+
+        Not bounded by the command slots. kubectl's stderr is kept so RBAC or
+        connection errors end up in last_error.
+        """
+        process = await asyncio.create_subprocess_exec(
+            self.kubectl, "get", "--raw",
+            f"/api/v1/namespaces/{self.namespace}/pods?watch=1&allowWatchBookmarks=true"
+            f"&resourceVersion={resource_version}",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+
+        async def read_stderr() -> None:
+            async for line in process.stderr:
+                line = line.decode("utf-8", errors="replace").rstrip()
+                if line:
+                    stderr_tail.append(line)
+
+        async def mark_established() -> None:
+            await asyncio.sleep(WATCH_ESTABLISHED_AFTER)
+            if process.returncode is None:
+                self._synced.set()
+
+        stderr_task = asyncio.ensure_future(read_stderr())
+        established_task = asyncio.ensure_future(mark_established())
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parser = WatchEventParser()
+        try:
+            while True:
+                chunk = await process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                for event in parser.feed(decoder.decode(chunk)):
+                    self._apply(event)
+                self._synced.set()
+            # stdout closed: let stderr drain so the error below is complete
+            await asyncio.wait({stderr_task}, timeout=1.0)
+        finally:
+            self._synced.clear()
+            established_task.cancel()
+            await terminate_process(process)
+            stderr_task.cancel()
+            await asyncio.gather(stderr_task, established_task, return_exceptions=True)
+        detail = f": {' | '.join(stderr_tail)}" if stderr_tail else ""
+        raise ConnectionError(f"Watch stream ended (exit code {process.returncode}){detail}")
+
+    async def _run(self) -> None:
+        current_tool.set(("pod_informer", self.namespace))
+        loop = asyncio.get_running_loop()
+        backoff = self.backoff_initial
+        while True:
+            watch_started = None
+            try:
+                resource_version = await self._relist()
+                watch_started = loop.time()
+                try:
+                    await asyncio.wait_for(self._watch(resource_version), self.resync_period)
+                except asyncio.TimeoutError:
+                    # Periodic resync after a healthy watch: relist and restart it
+                    backoff = self.backoff_initial
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if watch_started is not None and loop.time() - watch_started >= self.stable_after:
+                    # The watch was healthy for a while; this is a fresh failure
+                    backoff = self.backoff_initial
+                self._synced.clear()
+                self.last_error = str(e) or type(e).__name__
+                delay = backoff * random.uniform(0.5, 1.0)
+                logger.warning("Pod informer for %s lost its stream (%s); retrying in %.1fs",
+                               self.namespace, self.last_error, delay)
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, self.backoff_max)
+
+    def stats(self) -> dict:
+        return {
+            "namespace": self.namespace,
+            "synced": self.synced,
+            "pods": len(self._pods),
+            "relists": self.relists,
+            "events": self.events,
+            "last_error": self.last_error,
+        }
+
+
+_informers: dict[str, PodInformer] = {}
+
+
+def get_pod_informer(namespace: str) -> Optional[PodInformer]:
+    """Return the informer for `namespace`, starting it if the namespace is
+    listed in DEVOPS_POD_INFORMER_NAMESPACES. Returns None otherwise."""
+    informer = _informers.get(namespace)
+    if informer is None and namespace in INFORMER_NAMESPACES:
+        informer = start_pod_informer(namespace)
+    return informer
+
+
+def start_pod_informer(namespace: str, **kwargs) -> PodInformer:
+    """Start (or return the running) informer for `namespace`.
+
+    Must be called from within the event loop that serves the agent.
+    """
+    informer = _informers.get(namespace)
+    if informer is None:
+        informer = _informers[namespace] = PodInformer(namespace, **kwargs)
+    informer.start()
+    return informer
+
+
+async def stop_pod_informers() -> None:
+    for informer in list(_informers.values()):
+        await informer.stop()
+    _informers.clear()
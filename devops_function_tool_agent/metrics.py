@@ -0,0 +1,271 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Sequence, Union
+
+
+# Latency buckets in seconds, from cache hits to slow kubectl/gcloud calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# (tool, target) of the tool call running in the current task. run_command()
+# and the HTTP probes read it, so their metrics carry the labels of the tool
+# that started them.
+current_tool: contextvars.ContextVar[tuple[str, str]] = contextvars.ContextVar(
+    "current_tool", default=("none", "")
+)
+
+# Updates come from the event loop, scrapes from the metrics server thread
+_lock = threading.Lock()
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Sequence[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._values.items()):
+            lines += self._render_sample(list(zip(self.labelnames, key)), value)
+        return lines
+
+    def _render_sample(self, labels: list[tuple[str, str]], value) -> list[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _render_sample(self, labels: list[tuple[str, str]], value) -> list[str]:
+        counts, total = value
+        lines = [
+            f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {count}"
+            for bound, count in zip(self.buckets, counts)
+        ]
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(round(total, 6))}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {counts[-1]}")
+        return lines
+
+
+# Tool calls (one per FunctionTool invocation)
+TOOL_CALLS = Counter(
+    "devops_tool_calls_total", "Tool calls by tool, target (namespace/project) and outcome.",
+    ["tool", "target", "outcome"])
+TOOL_DURATION = Histogram(
+    "devops_tool_duration_seconds", "Tool call latency in seconds.", ["tool", "target"])
+TOOL_IN_FLIGHT = Gauge(
+    "devops_tool_in_flight", "Tool calls currently running.", ["tool"])
+
+# kubectl/gcloud subprocesses started by the tools
+COMMAND_DURATION = Histogram(
+    "devops_command_duration_seconds", "kubectl/gcloud run time in seconds, excluding queueing.",
+    ["tool", "target", "program"])
+COMMAND_QUEUE_WAIT = Histogram(
+    "devops_command_queue_wait_seconds", "Time spent waiting for a free command slot.",
+    ["tool", "program"])
+COMMAND_TIMEOUTS = Counter(
+    "devops_command_timeouts_total", "Commands killed after exceeding their timeout.",
+    ["tool", "target", "program"])
+COMMAND_FAILURES = Counter(
+    "devops_command_nonzero_exit_total", "Commands that exited with a non-zero code.",
+    ["tool", "target", "program", "code"])
+COMMAND_STDOUT_BYTES = Counter(
+    "devops_command_stdout_bytes_total", "Bytes read from command stdout.",
+    ["tool", "target", "program"])
+COMMANDS_IN_FLIGHT = Gauge(
+    "devops_commands_in_flight", "kubectl/gcloud processes currently running.", ["program"])
+
+# HTTP health probes
+HTTP_PROBES = Counter(
+    "devops_http_probes_total", "HTTP probes by host and result (status code or error).",
+    ["tool", "host", "result"])
+HTTP_PROBE_TTFB = Histogram(
+    "devops_http_probe_ttfb_seconds", "Time from request to first response byte.",
+    ["tool", "host"])
+HTTP_PROBE_CONNECT = Histogram(
+    "devops_http_probe_connect_seconds", "TCP/TLS connection setup time for new connections.",
+    ["tool", "host"])
+
+# Rollouts followed by scale_deployments(wait=True), updated as kubectl reports progress
+ROLLOUT_AVAILABLE_REPLICAS = Gauge(
+    "devops_rollout_available_replicas", "Updated replicas available in the latest followed rollout.",
+    ["namespace", "deployment"])
+ROLLOUT_DESIRED_REPLICAS = Gauge(
+    "devops_rollout_desired_replicas", "Replicas the latest followed rollout is waiting for.",
+    ["namespace", "deployment"])
+
+
+def _target_label(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple, set)):
+        # Bulk calls: one label value per call shape, not per argument list
+        return "*" if len(value) != 1 else str(next(iter(value)))
+    return str(value)
+
+
+def _succeeded(result) -> bool:
+    if not isinstance(result, dict):
+        return True
+    return bool(result.get("success", "error" not in result))
+
+
+def instrument_tool(target_arg: Union[str, Callable[[dict], object], None] = None) -> Callable:
+    """Decorator recording call count, latency and in-flight calls for a tool.
+
+    `target_arg` names the argument used as the "target" label (the
+    namespace or project), or is a function that computes the label value
+    from the bound arguments when no single argument holds it. Works for both sync and async tools and keeps the
+    function signature, so FunctionTool builds the same declaration.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        tool = func.__name__
+
+        def target_of(args, kwargs) -> str:
+            if target_arg is None:
+                return ""
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            if callable(target_arg):
+                return _target_label(target_arg(bound.arguments))
+            return _target_label(bound.arguments.get(target_arg))
+
+        def finish(target: str, start: float, ok: bool) -> None:
+            TOOL_IN_FLIGHT.dec(tool=tool)
+            TOOL_DURATION.observe(time.perf_counter() - start, tool=tool, target=target)
+            TOOL_CALLS.inc(tool=tool, target=target, outcome="success" if ok else "error")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                target = target_of(args, kwargs)
+                token = current_tool.set((tool, target))
+                TOOL_IN_FLIGHT.inc(tool=tool)
+                start = time.perf_counter()
+                ok = False
+                try:
+                    result = await func(*args, **kwargs)
+                    ok = _succeeded(result)
+                    return result
+                finally:
+                    finish(target, start, ok)
+                    current_tool.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = target_of(args, kwargs)
+            token = current_tool.set((tool, target))
+            TOOL_IN_FLIGHT.inc(tool=tool)
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = _succeeded(result)
+                return result
+            finally:
+                finish(target, start, ok)
+                current_tool.reset(token)
+        return wrapper
+
+    return decorator
+
+
+def render_metrics() -> str:
+    """Return every metric in Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        lines = [line for metric in _registry for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics for Prometheus from a background thread (idempotent)."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="devops-metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,152 @@
+import atexit
+import codecs
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+# Bytes of stdout kept in memory per command. Output beyond this spills to a
+# temporary file and the tool returns a head/tail excerpt plus a handle.
+OUTPUT_CAP = int(os.getenv("DEVOPS_TOOL_OUTPUT_CAP", str(256 * 1024)))
+
+# Bytes shown from the start and end of spilled output.
+EXCERPT_BYTES = int(os.getenv("DEVOPS_TOOL_OUTPUT_EXCERPT", str(8 * 1024)))
+
+# Spill files kept for read_command_output; the oldest is deleted first.
+MAX_SPILL_FILES = int(os.getenv("DEVOPS_TOOL_OUTPUT_SPILL_MAX", "32"))
+
+# Default and maximum chunk size returned by read_output.
+READ_CHUNK = 64 * 1024
+
+# Commands run on the event loop and in sync tools' threads
+_lock = threading.Lock()
+_spills: "OrderedDict[str, tuple[str, int]]" = OrderedDict()
+
+
+class OutputCapture:
+    """Collect command output in memory up to `cap` bytes, then spill to disk.
+
+    Until the cap is reached, output is buffered as usual. The first write
+    past the cap moves the buffer into a temporary file and every later
+    chunk is appended there, so memory stays at the cap plus the head/tail
+    excerpt however much the command prints.
+    """
+
+    def __init__(self, cap: int = OUTPUT_CAP, excerpt: int = EXCERPT_BYTES):
+        self.cap = cap
+        self.excerpt = min(excerpt, cap // 2)
+        self.size = 0
+        self._buffer = bytearray()
+        self._tail = bytearray()
+        self._file = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._file is None:
+            self._buffer += chunk
+            if len(self._buffer) <= self.cap:
+                return
+            self._file = tempfile.NamedTemporaryFile(prefix="devops-output-", suffix=".log", delete=False)
+            self._file.write(self._buffer)
+            # Keep only the head in memory from here on
+            chunk = bytes(self._buffer)
+            del self._buffer[self.excerpt:]
+        else:
+            self._file.write(chunk)
+        self._tail += chunk[-self.excerpt:]
+        del self._tail[:-self.excerpt]
+
+    def finish(self) -> tuple[str, Optional[str]]:
+        """Close the capture and return (text, handle).
+
+        `text` is the whole output, or for spilled output its head and tail
+        around an omission marker. `handle` is None unless output spilled;
+        pass it to read_output() to page through the full text.
+        """
+        if self._file is None:
+            return bytes(self._buffer).decode(errors="replace"), None
+        self._file.close()
+        handle = _register_spill(self._file.name, self.size)
+        head = bytes(self._buffer).decode(errors="ignore")
+        tail = bytes(self._tail).decode(errors="ignore")
+        omitted = self.size - len(self._buffer) - len(self._tail)
+        marker = (f"\n... [{omitted} bytes omitted of {self.size}; "
+                  f"call read_command_output(handle=\"{handle}\") for the full output] ...\n")
+        return head + marker + tail, handle
+
+    def discard(self) -> None:
+        """Drop the capture without registering a handle (e.g. after a timeout)."""
+        if self._file is not None:
+            self._file.close()
+            _unlink(self._file.name)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _register_spill(path: str, size: int) -> str:
+    handle = uuid.uuid4().hex[:12]
+    with _lock:
+        _spills[handle] = (path, size)
+        while len(_spills) > MAX_SPILL_FILES:
+            _, (old_path, _) = _spills.popitem(last=False)
+            _unlink(old_path)
+    return handle
+
+
+def read_output(handle: str, offset: int = 0, max_bytes: int = READ_CHUNK) -> dict:
+    """Read part of a spilled command output.
+
+    Args:
+        handle: The handle returned with truncated output.
+        offset: Byte offset to start reading from.
+        max_bytes: Bytes to read, at most READ_CHUNK.
+
+    Returns:
+        dict with "success", "output", "offset", "next_offset", "total_bytes"
+        and "eof", or "error" if the handle is unknown or expired.
+    """
+    with _lock:
+        spill = _spills.get(handle)
+    if spill is None:
+        return {"success": False, "error": f"Unknown or expired output handle: {handle}"}
+    path, size = spill
+    offset = max(0, min(offset, size))
+    max_bytes = max(4, min(max_bytes, READ_CHUNK))
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(max_bytes)
+    except OSError as e:
+        return {"success": False, "error": f"Output no longer available: {e}"}
+    # Stop before a UTF-8 sequence split by the end of the chunk
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    text = decoder.decode(data, final=offset + len(data) >= size)
+    next_offset = offset + len(data) - len(decoder.getstate()[0])
+    return {
+        "success": True,
+        "output": text,
+        "offset": offset,
+        "next_offset": next_offset,
+        "total_bytes": size,
+        "eof": next_offset >= size,
+    }
+
+
+@atexit.register
+def _remove_spills() -> None:
+    with _lock:
+        for path, _ in _spills.values():
+            _unlink(path)
+        _spills.clear()
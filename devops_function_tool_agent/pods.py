@@ -0,0 +1,208 @@
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+
+# Phases that never count as unhealthy on their own
+_HEALTHY_PHASES = ("Running", "Succeeded")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class PodListParser:
+    """Incremental parser for `kubectl get pods -o json` output.
+
+    Feed stdout chunks as they arrive; each call returns the pods from the
+    "items" array that are complete so far. Only the pod currently being
+    read is buffered, so memory stays flat however many pods the namespace
+    has.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        # start -> key -> colon -> (value -> key | items) -> done
+        self._state = "start"
+        self._key = None
+        # The list's own metadata (e.g. resourceVersion), if it precedes "items"
+        self.metadata: dict = {}
+
+    def feed(self, chunk: str) -> list[dict]:
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        items = []
+        while self._state != "done" and self._step(items):
+            pass
+        return items
+
+    def close(self) -> None:
+        """Raise ValueError if the stream ended in the middle of the list."""
+        if self._state != "done":
+            raise ValueError("Truncated pod list in kubectl output")
+
+    def _skip(self, chars: str = _WHITESPACE) -> Optional[str]:
+        """Skip `chars`, returning the next character or None if more data is needed."""
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in chars:
+            pos += 1
+        self._pos = pos
+        return buffer[pos] if pos < len(buffer) else None
+
+    def _decode(self):
+        """Decode one JSON value at the cursor. Returns (value, False) if more data is needed."""
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return None, False
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not isinstance(value, (dict, list, str)):
+            return None, False
+        self._pos = end
+        return value, True
+
+    def _step(self, items: list[dict]) -> bool:
+        if self._state == "start":
+            char = self._skip()
+            if char is None:
+                return False
+            if char != "{":
+                raise ValueError("kubectl output is not a JSON object")
+            self._pos += 1
+            self._state = "key"
+            return True
+
+        if self._state == "key":
+            char = self._skip(_WHITESPACE + ",")
+            if char is None:
+                return False
+            if char == "}":
+                # Object ended without an "items" key: empty list
+                self._pos += 1
+                self._state = "done"
+                return True
+            key, ok = self._decode()
+            if not ok:
+                return False
+            self._key = key
+            self._state = "colon"
+            return True
+
+        if self._state == "colon":
+            char = self._skip(_WHITESPACE + ":")
+            if char is None:
+                return False
+            if self._key == "items":
+                if char != "[":
+                    raise ValueError('"items" is not a list')
+                self._pos += 1
+                self._state = "items"
+                return True
+            # apiVersion/kind/metadata: small values, decode and keep only metadata
+            value, ok = self._decode()
+            if not ok:
+                return False
+            if self._key == "metadata" and isinstance(value, dict):
+                self.metadata = value
+            self._state = "key"
+            return True
+
+        # self._state == "items"
+        char = self._skip(_WHITESPACE + ",")
+        if char is None:
+            return False
+        if char == "]":
+            # Keys after "items" (kind, metadata) are not needed
+            self._pos += 1
+            self._state = "done"
+            return True
+        value, ok = self._decode()
+        if not ok:
+            return False
+        items.append(value)
+        return True
+
+
+def format_age(created: Optional[str], now: datetime) -> Optional[str]:
+    """kubectl-style age ("45s", "12m", "3h", "5d") from an RFC 3339 timestamp."""
+    if not created:
+        return None
+    try:
+        started = datetime.fromisoformat(created.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    seconds = max(0, int((now - started).total_seconds()))
+    if seconds < 120:
+        return f"{seconds}s"
+    if seconds < 7200:
+        return f"{seconds // 60}m"
+    if seconds < 172800:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 86400}d"
+
+
+def summarize_pod(pod: dict, now: Optional[datetime] = None) -> dict:
+    """Project a full Pod object onto the few fields needed for troubleshooting.
+
+    Returns:
+        dict with "name", "namespace", "phase", "status" (the kubectl STATUS
+        column, e.g. "CrashLoopBackOff"), "ready" ("1/2"), "restarts",
+        "node", "age" and "last_termination_reason".
+    """
+    now = now or datetime.now(timezone.utc)
+    metadata = pod.get("metadata", {})
+    spec = pod.get("spec", {})
+    status = pod.get("status", {})
+    container_statuses = status.get("containerStatuses") or []
+
+    phase = status.get("phase", "Unknown")
+    display_status = status.get("reason") or phase
+    last_termination_reason = None
+    for container in container_statuses:
+        state = container.get("state", {})
+        waiting = state.get("waiting") or {}
+        terminated = state.get("terminated") or {}
+        if waiting.get("reason"):
+            display_status = waiting["reason"]
+        elif terminated.get("reason") and phase != "Succeeded":
+            display_status = terminated["reason"]
+        last_terminated = (container.get("lastState") or {}).get("terminated") or {}
+        if last_terminated.get("reason"):
+            last_termination_reason = last_terminated["reason"]
+    if metadata.get("deletionTimestamp"):
+        display_status = "Terminating"
+
+    total = len(spec.get("containers") or container_statuses)
+    ready = sum(1 for c in container_statuses if c.get("ready"))
+    return {
+        "name": metadata.get("name"),
+        "namespace": metadata.get("namespace"),
+        "phase": phase,
+        "status": display_status,
+        "ready": f"{ready}/{total}",
+        "restarts": sum(c.get("restartCount", 0) for c in container_statuses),
+        "node": spec.get("nodeName"),
+        "age": format_age(metadata.get("creationTimestamp"), now),
+        "last_termination_reason": last_termination_reason,
+    }
+
+
+def is_unhealthy(summary: dict) -> bool:
+    """True if the pod is not Running/Succeeded or not all containers are ready."""
+    if summary["phase"] not in _HEALTHY_PHASES or summary["status"] not in _HEALTHY_PHASES:
+        return True
+    ready, _, total = summary["ready"].partition("/")
+    return summary["phase"] == "Running" and ready != total
+
+
+def aggregate_pods(summaries: Iterable[dict]) -> dict:
+    """Counts by phase and status plus totals for a list of pod summaries."""
+    summaries = list(summaries)
+    return {
+        "total": len(summaries),
+        "unhealthy": sum(1 for s in summaries if is_unhealthy(s)),
+        "restarts": sum(s["restarts"] for s in summaries),
+        "by_phase": dict(Counter(s["phase"] for s in summaries)),
+        "by_status": dict(Counter(s["status"] for s in summaries)),
+    }
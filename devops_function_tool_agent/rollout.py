@@ -0,0 +1,115 @@
+import codecs
+import json
+import logging
+import re
+import time
+from typing import Callable, Optional
+
+from .commands import run_command
+from .metrics import ROLLOUT_AVAILABLE_REPLICAS, ROLLOUT_DESIRED_REPLICAS
+
+
+logger = logging.getLogger(__name__)
+
+# "... rollout to finish: 3 of 5 updated replicas are available..."
+_AVAILABLE = re.compile(r"(\d+) of (\d+) updated replicas are available")
+
+
+async def get_deployment_replicas(deployment: str, namespace: str) -> dict:
+    """Return {"replicas", "ready_replicas"} for a deployment.
+
+    Raises:
+        RuntimeError: kubectl could not read the deployment.
+    """
+    result = await run_command(
+        ["kubectl", "get", "deployment", deployment, "-n", namespace, "-o", "json"]
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"kubectl exited with code {result.returncode}")
+    obj = json.loads(result.stdout)
+    return {
+        "replicas": obj.get("spec", {}).get("replicas", 1),
+        "ready_replicas": obj.get("status", {}).get("readyReplicas", 0),
+    }
+
+
+def progress_exporter(deployment: str, namespace: str, desired: int) -> Callable[[dict], None]:
+    """An on_progress handler that publishes the rollout's replicas as metrics.
+
+    The desired count is set right away; available is updated from each
+    "N of M updated replicas are available" line and set to desired when
+    kubectl reports the rollout done.
+    """
+    labels = {"namespace": namespace, "deployment": deployment}
+    ROLLOUT_DESIRED_REPLICAS.set(desired, **labels)
+
+    def on_progress(update: dict) -> None:
+        match = _AVAILABLE.search(update["status"])
+        if match:
+            ROLLOUT_AVAILABLE_REPLICAS.set(int(match.group(1)), **labels)
+            ROLLOUT_DESIRED_REPLICAS.set(int(match.group(2)), **labels)
+        elif "successfully rolled out" in update["status"]:
+            ROLLOUT_AVAILABLE_REPLICAS.set(desired, **labels)
+
+    return on_progress
+
+
+async def wait_for_rollout(
+    deployment: str,
+    namespace: str,
+    timeout: float,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """Follow `kubectl rollout status` until the deployment is ready.
+
+    Each status line kubectl prints ("3 of 5 updated replicas are
+    available...") is logged and passed to `on_progress` as soon as it
+    arrives, as {"deployment", "namespace", "elapsed_s", "status"}.
+
+    Returns:
+        dict with "ready" boolean, "time_to_ready_s" (None if not ready),
+        "progress" (every status update with its elapsed time) and "error".
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    start = time.monotonic()
+    progress = []
+    pending = ""
+
+    def report(line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        update = {
+            "deployment": deployment,
+            "namespace": namespace,
+            "elapsed_s": round(time.monotonic() - start, 2),
+            "status": line,
+        }
+        progress.append({"elapsed_s": update["elapsed_s"], "status": line})
+        logger.info("rollout %s/%s +%.1fs: %s", namespace, deployment, update["elapsed_s"], line)
+        if on_progress is not None:
+            on_progress(update)
+
+    def on_stdout(chunk: bytes) -> None:
+        nonlocal pending
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            report(line)
+
+    result = await run_command(
+        ["kubectl", "rollout", "status", f"deployment/{deployment}",
+         "-n", namespace, f"--timeout={int(timeout)}s"],
+        # kubectl enforces --timeout; allow it time to report before killing
+        timeout=timeout + 10,
+        on_stdout=on_stdout,
+        long_running=True,
+    )
+    report(pending + decoder.decode(b"", final=True))
+    ready = result.returncode == 0
+    return {
+        "ready": ready,
+        "time_to_ready_s": round(time.monotonic() - start, 2) if ready else None,
+        "progress": progress,
+        "error": None if ready else (result.stderr.strip() or f"kubectl exited with code {result.returncode}"),
+    }
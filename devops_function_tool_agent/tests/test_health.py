@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from devops_function_tool_agent import health
+from devops_function_tool_agent.async_tools import check_services_health
+from devops_function_tool_agent.health import new_session, probe_url
+
+
+# Minimal HTTP/1.1 server: /old redirects to /new, /new answers with an
+# interim 100 Continue before its 200, /loop redirects to itself.
+async def _handle(reader, writer, targets):
+    while True:
+        request_line = await reader.readline()
+        if not request_line:
+            break
+        target = request_line.decode().split()[1]
+        targets.append(target)
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        path = "/" + target.split("/", 3)[-1] if target.startswith("http://") else target
+        if path == "/old":
+            writer.write(b"HTTP/1.1 301 Moved Permanently\r\nLocation: /new\r\nContent-Length: 0\r\n\r\n")
+        elif path == "/loop":
+            writer.write(b"HTTP/1.1 302 Found\r\nLocation: /loop\r\nContent-Length: 0\r\n\r\n")
+        else:
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n"
+                         b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+    writer.close()
+
+
+async def _probe(url_path, timeout=5):
+    targets = []
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, targets), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    session = new_session()
+    try:
+        result = await probe_url(f"http://127.0.0.1:{port}{url_path}", timeout, session)
+    finally:
+        session.close()
+        server.close()
+        await server.wait_closed()
+    return result, targets, port
+
+
+def _no_proxy(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "https_proxy", "HTTPS_PROXY", "no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_redirect_is_followed_past_interim_response(monkeypatch):
+    _no_proxy(monkeypatch)
+    result, targets, port = asyncio.run(_probe("/old"))
+    assert result["healthy"] is True
+    assert result["status_code"] == 200
+    assert result["redirects"] == 1
+    assert result["final_url"] == f"http://127.0.0.1:{port}/new"
+    assert targets == ["/old", "/new"]
+    # The first hop opened the connection; the redirect reused it
+    assert result["reused_connection"] is False
+    assert result["connect_time_ms"] > 0
+
+
+def test_redirect_loop_is_an_error(monkeypatch):
+    _no_proxy(monkeypatch)
+    result, targets, _ = asyncio.run(_probe("/loop"))
+    assert result["healthy"] is False
+    assert "redirects" in result["error"]
+    assert len(targets) == 11
+
+
+def test_http_proxy_from_environment_is_used(monkeypatch):
+    _no_proxy(monkeypatch)
+
+    async def scenario():
+        targets = []
+        proxy = await asyncio.start_server(lambda r, w: _handle(r, w, targets), "127.0.0.1", 0)
+        port = proxy.sockets[0].getsockname()[1]
+        monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{port}")
+        session = new_session()
+        try:
+            # Nothing listens on the target host: only the proxy can answer
+            result = await probe_url("http://service.invalid/healthz", 5, session)
+        finally:
+            session.close()
+            proxy.close()
+            await proxy.wait_closed()
+        return result, targets
+
+    result, targets = asyncio.run(scenario())
+    assert result["status_code"] == 200
+    assert targets == ["http://service.invalid/healthz"]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Keep-alive stand-in service: /slow takes 200ms, /down answers 503."""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(0.2 if self.path == "/slow" else 0.05)
+            status = 503 if self.path == "/down" else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_concurrency_percentiles_and_connection_reuse(monkeypatch):
+    _no_proxy(monkeypatch)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(health, "_session", new_session())
+    urls = [f"{base}/fast"] * 8 + [f"{base}/slow"] * 2 + [f"{base}/down"] * 2
+    try:
+        first = asyncio.run(check_services_health(urls, timeout=5, max_concurrency=4))
+        second = asyncio.run(check_services_health(urls, timeout=5, max_concurrency=4))
+    finally:
+        health._session.close()
+        server.shutdown()
+        server.server_close()
+
+    assert 1 < _StandIn.peak <= 4
+    assert first["summary"]["total"] == 12
+    assert first["summary"]["healthy"] == 10 and first["summary"]["unhealthy"] == 2
+    assert [r["status_code"] for r in first["results"]] == [200] * 10 + [503] * 2
+
+    latency = first["summary"]["response_time"]
+    assert 50 <= latency["p50_ms"] < 200 <= latency["p95_ms"] <= latency["p99_ms"]
+    # The first batch opened connections; time to first byte excludes that setup
+    assert first["summary"]["connect_time"]["p50_ms"] is not None
+    for r in first["results"]:
+        assert r["response_time_ms"] >= 50
+        assert r["reused_connection"] or r["connect_time_ms"] > 0
+
+    # The second batch finds them all in the pool
+    assert all(r["reused_connection"] and r["connect_time_ms"] == 0 for r in second["results"])
+    assert second["summary"]["connect_time"]["p50_ms"] is None
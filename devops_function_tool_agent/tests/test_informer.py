@@ -0,0 +1,172 @@
+import asyncio
+import stat
+import sys
+import textwrap
+
+from devops_function_tool_agent.async_tools import check_pods_bulk
+from devops_function_tool_agent.informer import (
+    PodInformer,
+    selector_filters,
+    start_pod_informer,
+    stop_pod_informers,
+)
+
+
+# Stands in for kubectl. Like the API server, the watch only replays changes
+# made after the list when it is asked to start from the list's resourceVersion.
+FAKE_KUBECTL = textwrap.dedent("""\
+    #!{python}
+    import json, os, sys, time
+
+    def pod(name):
+        return {{"metadata": {{"name": name, "labels": {{"app": "web"}},
+                              "creationTimestamp": "2024-01-01T00:00:00Z"}},
+                "spec": {{"nodeName": "node-1"}},
+                "status": {{"phase": "Running", "containerStatuses": []}}}}
+
+    mode = os.environ["FAKE_MODE"]
+    url = sys.argv[-1]
+    with open(os.environ["FAKE_CALLS"], "a") as calls:
+        calls.write(url + "\\n")
+
+    if "watch=1" not in url:
+        if mode == "slow-list":
+            time.sleep(5)
+        print(json.dumps({{"kind": "PodList", "metadata": {{"resourceVersion": "100"}},
+                          "items": [pod("web-a")]}}))
+        sys.exit(0)
+
+    if mode == "forbidden":
+        print('Error from server (Forbidden): pods is forbidden: User "ci" cannot watch pods', file=sys.stderr)
+        sys.exit(1)
+    if "resourceVersion=100" in url:
+        # web-b was created after the list was taken but before the watch started
+        print(json.dumps({{"type": "ADDED", "object": pod("web-b")}}), flush=True)
+    time.sleep(30)
+""")
+
+
+def _fake_kubectl(tmp_path, monkeypatch, mode):
+    script = tmp_path / "kubectl"
+    script.write_text(FAKE_KUBECTL.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    calls = tmp_path / "calls"
+    calls.write_text("")
+    monkeypatch.setenv("FAKE_MODE", mode)
+    monkeypatch.setenv("FAKE_CALLS", str(calls))
+    return str(script), calls
+
+
+def test_pod_created_between_list_and_watch_is_seen(tmp_path, monkeypatch):
+    kubectl, calls = _fake_kubectl(tmp_path, monkeypatch, "gap")
+
+    async def scenario():
+        informer = PodInformer("prod", kubectl=kubectl)
+        informer.start()
+        try:
+            assert await informer.wait_synced(timeout=10)
+            # Synced means the list has been applied
+            assert informer.get("web-a") is not None
+            for _ in range(100):
+                if informer.get("web-b") is not None:
+                    break
+                await asyncio.sleep(0.05)
+            return informer.get("web-b"), informer.stats()
+        finally:
+            await informer.stop()
+
+    pod_b, stats = asyncio.run(scenario())
+    assert pod_b is not None
+    assert stats["pods"] == 2
+    assert stats["last_error"] is None
+    assert any("resourceVersion=100" in line for line in calls.read_text().splitlines())
+
+
+def test_watch_stderr_is_reported_in_last_error(tmp_path, monkeypatch):
+    kubectl, _ = _fake_kubectl(tmp_path, monkeypatch, "forbidden")
+
+    async def scenario():
+        informer = PodInformer("prod", kubectl=kubectl, backoff_initial=5.0)
+        informer.start()
+        try:
+            for _ in range(100):
+                if informer.last_error:
+                    break
+                await asyncio.sleep(0.05)
+            return informer.stats()
+        finally:
+            await informer.stop()
+
+    stats = asyncio.run(scenario())
+    assert "Forbidden" in stats["last_error"]
+    assert not stats["synced"]
+
+
+def test_list_timeout_backs_off(tmp_path, monkeypatch):
+    kubectl, calls = _fake_kubectl(tmp_path, monkeypatch, "slow-list")
+
+    async def scenario():
+        informer = PodInformer("prod", kubectl=kubectl, list_timeout=0.3, backoff_initial=5.0)
+        informer.start()
+        try:
+            await asyncio.sleep(1.5)
+            return informer.stats()
+        finally:
+            await informer.stop()
+
+    stats = asyncio.run(scenario())
+    assert "timed out" in stats["last_error"]
+    assert not stats["synced"]
+    # One attempt, then waiting out the backoff instead of relisting in a loop
+    assert len(calls.read_text().splitlines()) == 1
+
+
+def test_watch_failing_right_after_list_keeps_backing_off(tmp_path, monkeypatch):
+    kubectl, calls = _fake_kubectl(tmp_path, monkeypatch, "forbidden")
+
+    async def scenario():
+        informer = PodInformer("prod", kubectl=kubectl, backoff_initial=0.2, stable_after=60)
+        informer.start()
+        try:
+            await asyncio.sleep(2.0)
+            return informer.stats()
+        finally:
+            await informer.stop()
+
+    stats = asyncio.run(scenario())
+    lists = [line for line in calls.read_text().splitlines() if "watch=1" not in line]
+    # Backoff doubles (0.1-0.2s, 0.2-0.4s, 0.4-0.8s, ...) even though every list succeeds
+    assert len(lists) <= 5
+    assert stats["relists"] == len(lists)
+    assert not stats["synced"]
+
+
+def test_selector_filters():
+    assert selector_filters("app=web, tier==frontend", "spec.nodeName=node-1,status.phase=Running") == {
+        "labels": {"app": "web", "tier": "frontend"}, "node": "node-1", "phase": "Running"}
+    assert selector_filters() == {"labels": {}, "node": None, "phase": None}
+    assert selector_filters("app!=web") is None
+    assert selector_filters("env in (prod,staging)") is None
+    assert selector_filters("app=web,app=api") is None
+    assert selector_filters("", "status.phase!=Running") is None
+    assert selector_filters("", "metadata.name=web-a") is None
+
+
+def test_bulk_label_selector_is_served_from_the_informer(tmp_path, monkeypatch):
+    kubectl, calls = _fake_kubectl(tmp_path, monkeypatch, "gap")
+
+    async def scenario():
+        informer = start_pod_informer("prod", kubectl=kubectl)
+        try:
+            assert await informer.wait_synced(timeout=10)
+            listed = len(calls.read_text().splitlines())
+            matching = await check_pods_bulk(["prod"], label_selector="app=web", field_selector="spec.nodeName=node-1")
+            other = await check_pods_bulk(["prod"], label_selector="app=api")
+            return matching, other, len(calls.read_text().splitlines()) - listed
+        finally:
+            await stop_pod_informers()
+
+    matching, other, kubectl_calls = asyncio.run(scenario())
+    assert {pod["name"] for pod in matching["namespaces"]["prod"]["pods"]} >= {"web-a"}
+    assert other["namespaces"]["prod"]["pods"] == []
+    assert kubectl_calls == 0
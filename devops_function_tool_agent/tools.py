@@ -1,7 +1,14 @@
+# Legacy synchronous versions of the tools in async_tools.py. The agent doesn't
+# register them (they block the event loop); they are kept for scripts.
 import subprocess
 import requests
 
+from .commands import output_fields, run_command_sync
+from .metrics import instrument_tool
+from .output import READ_CHUNK, read_output
 
+
+@instrument_tool("namespace")
 def check_pod_status(namespace: str = "default") -> dict:
     """Check the status of pods in a Kubernetes namespace.
 
@@ -16,15 +23,13 @@ def check_pod_status(namespace: str = "default") -> dict:
         and "error" if any errors occurred.
     """
     try:
-        result = subprocess.run(
+        result = run_command_sync(
             ["kubectl", "get", "pods", "-n", namespace, "-o", "json"],
-            capture_output=True,
-            text=True,
             timeout=30
         )
         return {
             "success": result.returncode == 0,
-            "output": result.stdout,
+            **output_fields(result),
             "error": result.stderr if result.stderr else None
         }
     except subprocess.TimeoutExpired:
@@ -35,6 +40,7 @@ def check_pod_status(namespace: str = "default") -> dict:
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
 
+@instrument_tool("project")
 def get_gcp_instance(instance_name: str, zone: str, project: str) -> dict:
     """Get details of a GCP Compute Engine VM instance.
 
@@ -51,16 +57,14 @@ def get_gcp_instance(instance_name: str, zone: str, project: str) -> dict:
         and "error" if any errors occurred.
     """
     try:
-        result = subprocess.run(
+        result = run_command_sync(
             ["gcloud", "compute", "instances", "describe", instance_name,
              "--zone", zone, "--project", project, "--format", "json"],
-            capture_output=True,
-            text=True,
             timeout=30
         )
         return {
             "success": result.returncode == 0,
-            "output": result.stdout,
+            **output_fields(result),
             "error": result.stderr if result.stderr else None
         }
     except subprocess.TimeoutExpired:
@@ -71,6 +75,7 @@ def get_gcp_instance(instance_name: str, zone: str, project: str) -> dict:
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
 
+@instrument_tool("namespace")
 def scale_deployment(deployment: str, replicas: int, namespace: str = "default") -> dict:
     """Scale a Kubernetes deployment to the specified number of replicas.
 
@@ -94,11 +99,9 @@ def scale_deployment(deployment: str, replicas: int, namespace: str = "default")
         }
 
     try:
-        result = subprocess.run(
+        result = run_command_sync(
             ["kubectl", "scale", "deployment", deployment,
              f"--replicas={replicas}", "-n", namespace],
-            capture_output=True,
-            text=True,
             timeout=30
         )
         return {
@@ -113,6 +116,7 @@ def scale_deployment(deployment: str, replicas: int, namespace: str = "default")
         return {"success": False, "message": f"Unexpected error: {str(e)}"}
 
 
+@instrument_tool()
 def check_service_health(url: str, timeout: int = 5) -> dict:
     """Check if an HTTP service endpoint is healthy and responding.
 
@@ -147,3 +151,23 @@ def check_service_health(url: str, timeout: int = 5) -> dict:
         return {"healthy": False, "error": "Connection failed. Check if the URL is correct and accessible."}
     except requests.RequestException as e:
         return {"healthy": False, "error": str(e)}
+
+
+@instrument_tool()
+def read_command_output(handle: str, offset: int = 0, max_bytes: int = READ_CHUNK) -> dict:
+    """Read more of a kubectl/gcloud output that was too large to return at once.
+
+    Use this tool when a previous tool result has "truncated": true and the
+    part you need is not in the head or tail shown. Page through the output
+    by passing "next_offset" back as offset until "eof" is true.
+
+    Args:
+        handle: The "output_handle" from the truncated tool result.
+        offset: Byte offset to start reading from. Defaults to 0.
+        max_bytes: Bytes to read (at most 65536). Defaults to 65536.
+
+    Returns:
+        dict with "output", "next_offset", "total_bytes", "eof",
+        and "error" if the handle is unknown or expired.
+    """
+    return read_output(handle, offset, max_bytes)
@@ -0,0 +1 @@
+from .percentile import percentile
@@ -0,0 +1,14 @@
+from typing import Optional, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (None for an empty list).
+
+    The result is always one of the samples: p50 of [1, 2, 3, 4] is 2 and
+    p99 of a hundred samples is the 99th smallest, with no interpolation.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
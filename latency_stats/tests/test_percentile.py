@@ -0,0 +1,16 @@
+from latency_stats import percentile
+
+
+def test_nearest_rank():
+    values = list(range(100, 0, -1))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([0.4], 99) == 0.4
+
+
+def test_empty_and_low_percentiles():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 0) == 1
@@ -1,16 +1,34 @@
+import os
+
 from google.adk.agents import LoopAgent, SequentialAgent
 
 from .sub_agents.generator import agent as generator
-from .sub_agents.validator import agent as validator
-from .sub_agents.fixer import agent as fixer
+from .sub_agents.validator import agent as llm_validator, lint_agent, per_document_agent
+from .sub_agents.fixer import agent as full_fixer, patch_agent, patch_applier
+from .sub_agents.convergence import agent as convergence_guard
+
+
+# "lint" checks each draft with local rules (no model call); "llm" asks the model
+# about the whole draft; "llm_docs" asks about each changed document concurrently
+VALIDATOR = os.getenv("LOOP_VALIDATOR", "lint")
+validator = {"llm": llm_validator, "llm_docs": per_document_agent}.get(VALIDATOR, lint_agent)
+
+# "patch" has the fixer emit a JSON Patch applied locally; "full" regenerates the manifest
+FIXER_MODE = os.getenv("LOOP_FIXER_MODE", "patch")
+fixer = [patch_agent, patch_applier] if FIXER_MODE == "patch" else [full_fixer]
+
+# Stop the loop once the draft or the validator feedback stops changing
+STOP_ON_CONVERGENCE = os.getenv("LOOP_STOP_ON_CONVERGENCE", "1") == "1"
+
+steps = [validator]
+if STOP_ON_CONVERGENCE:
+    steps.append(convergence_guard)
+steps += fixer
 
 
 improve_loop = LoopAgent(
     name="yaml_improvement_loop",
-    sub_agents=[
-        validator,
-        fixer
-    ],
+    sub_agents=steps,
     max_iterations=3,
     description="Iteratively validates and improves Kubernetes YAML until it meets best practices or max iterations reached"
 )
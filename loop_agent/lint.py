@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import yaml
+
+
+# Kinds whose pods are long-running and need readiness/liveness probes
+LONG_RUNNING_KINDS = {"Deployment", "StatefulSet", "DaemonSet", "ReplicaSet"}
+
+# Where each workload kind keeps its pod template
+POD_TEMPLATE_PATHS = {
+    "Deployment": ["spec", "template"],
+    "StatefulSet": ["spec", "template"],
+    "DaemonSet": ["spec", "template"],
+    "ReplicaSet": ["spec", "template"],
+    "Job": ["spec", "template"],
+    "CronJob": ["spec", "jobTemplate", "spec", "template"],
+}
+
+# Required labels, each satisfied by the short or the recommended key
+REQUIRED_LABELS = {
+    "app": ("app", "app.kubernetes.io/name"),
+    "version": ("version", "app.kubernetes.io/version"),
+    "component": ("component", "app.kubernetes.io/component"),
+}
+
+# Per-document results kept by each validator's content-hash cache
+VALIDATION_CACHE_SIZE = int(os.getenv("LOOP_VALIDATION_CACHE_SIZE", "256"))
+
+_FENCE = re.compile(r"^\s*```[\w-]*\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Issue:
+    """One rule violation, located by a JSON Pointer into its document."""
+
+    rule: str
+    document: str
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"[{self.rule}] {self.document}: {self.message} (at {self.path or '/'})"
+
+
+def strip_fences(text: str) -> str:
+    """Remove markdown code fences a model may have wrapped the YAML in."""
+    return _FENCE.sub("", text or "").strip()
+
+
+def split_documents(text: str) -> list[Any]:
+    """Parse a (multi-document) manifest. Raises yaml.YAMLError on bad syntax."""
+    return [doc for doc in yaml.safe_load_all(strip_fences(text)) if doc is not None]
+
+
+def _pointer(*parts) -> str:
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in parts)
+
+
+def _get(obj: Any, *keys) -> Any:
+    for key in keys:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def document_name(doc: Any, index: int = 0) -> str:
+    """Kind/name for messages, falling back to the document's position."""
+    if isinstance(doc, dict):
+        kind = doc.get("kind") or "Unknown"
+        name = _get(doc, "metadata", "name") or f"#{index + 1}"
+        return f"{kind}/{name}"
+    return f"document #{index + 1}"
+
+
+def document_hash(doc: Any) -> str:
+    """Content hash of a parsed document; key order and formatting don't matter."""
+    canonical = json.dumps(doc, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU of per-document validation results, keyed by document content hash.
+
+    An unchanged document keeps its result across loop iterations (and
+    across requests), so only documents the fixer changed are checked again.
+    """
+
+    def __init__(self, max_size: int = VALIDATION_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    @staticmethod
+    def key(doc: Any, index: int = 0) -> str:
+        # The name is part of the key because unnamed documents are named by position
+        return f"{document_hash(doc)}:{document_name(doc, index)}"
+
+    def get(self, key: str) -> Any:
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _check_labels(issues: list, name: str, labels: Any, path: tuple) -> None:
+    labels = labels if isinstance(labels, dict) else {}
+    for label, keys in REQUIRED_LABELS.items():
+        if not any(labels.get(key) for key in keys):
+            issues.append(Issue("labels", name, _pointer(*path, "labels"), f"missing '{label}' label"))
+
+
+def _check_image(issues: list, name: str, who: str, container: dict, path: tuple) -> None:
+    image = container.get("image")
+    if not image:
+        issues.append(Issue("image", name, _pointer(*path, "image"), f"{who} has no image"))
+    elif "@" not in image:
+        # The tag is after the last ":" of the last path segment (registry ports have one too)
+        tag = image.rpartition("/")[2].partition(":")[2]
+        if not tag or tag == "latest":
+            issues.append(Issue(
+                "image", name, _pointer(*path, "image"),
+                f"{who} image '{image}' uses {'the :latest tag' if tag else 'no tag (implies :latest)'}; "
+                f"pin a specific version",
+            ))
+    if not container.get("imagePullPolicy"):
+        issues.append(Issue("image", name, _pointer(*path, "imagePullPolicy"), f"{who} has no imagePullPolicy"))
+
+
+def _check_container(
+    issues: list, name: str, container: Any, path: tuple, pod_security: dict, needs_probes: bool
+) -> None:
+    if not isinstance(container, dict):
+        issues.append(Issue("schema", name, _pointer(*path), "container is not a mapping"))
+        return
+    who = f"container '{container.get('name', path[-1])}'"
+
+    resources = container.get("resources") if isinstance(container.get("resources"), dict) else {}
+    for section in ("requests", "limits"):
+        values = resources.get(section) if isinstance(resources.get(section), dict) else {}
+        for resource in ("cpu", "memory"):
+            if values.get(resource) in (None, ""):
+                issues.append(Issue(
+                    "resources", name, _pointer(*path, "resources", section, resource),
+                    f"{who} has no {resource} {section[:-1]}",
+                ))
+
+    if needs_probes:
+        for probe in ("readinessProbe", "livenessProbe"):
+            if not container.get(probe):
+                issues.append(Issue("probes", name, _pointer(*path, probe), f"{who} has no {probe}"))
+
+    security = container.get("securityContext") if isinstance(container.get("securityContext"), dict) else {}
+    if security.get("runAsNonRoot", pod_security.get("runAsNonRoot")) is not True:
+        issues.append(Issue(
+            "security", name, _pointer(*path, "securityContext", "runAsNonRoot"),
+            f"{who} does not set securityContext.runAsNonRoot: true",
+        ))
+    if security.get("readOnlyRootFilesystem") is not True:
+        issues.append(Issue(
+            "security", name, _pointer(*path, "securityContext", "readOnlyRootFilesystem"),
+            f"{who} does not set securityContext.readOnlyRootFilesystem: true",
+        ))
+
+    _check_image(issues, name, who, container, path)
+
+
+def lint_document(doc: Any, index: int = 0) -> list[Issue]:
+    """Run every rule against one parsed Kubernetes object."""
+    name = document_name(doc, index)
+    if not isinstance(doc, dict):
+        return [Issue("schema", name, "", "document is not a Kubernetes object (mapping)")]
+
+    issues: list[Issue] = []
+    kind = doc.get("kind")
+    for field in ("apiVersion", "kind"):
+        if not doc.get(field):
+            issues.append(Issue("schema", name, _pointer(field), f"missing {field}"))
+    _check_labels(issues, name, _get(doc, "metadata", "labels"), ("metadata",))
+
+    if kind == "Pod":
+        pod_path: Optional[tuple] = ()
+        pod = doc
+    elif kind in POD_TEMPLATE_PATHS:
+        template_path = tuple(POD_TEMPLATE_PATHS[kind])
+        template = _get(doc, *template_path)
+        _check_labels(issues, name, _get(template, "metadata", "labels"), template_path + ("metadata",))
+        pod_path, pod = template_path, template
+    else:
+        pod_path, pod = None, None
+
+    if pod_path is not None:
+        spec = _get(pod, "spec")
+        spec_path = pod_path + ("spec",)
+        containers = _get(spec, "containers")
+        if not isinstance(containers, list) or not containers:
+            issues.append(Issue("schema", name, _pointer(*spec_path, "containers"), "no containers"))
+            containers = []
+        pod_security = _get(spec, "securityContext") if isinstance(_get(spec, "securityContext"), dict) else {}
+        for i, container in enumerate(containers):
+            _check_container(issues, name, container, spec_path + ("containers", i), pod_security,
+                             needs_probes=kind in LONG_RUNNING_KINDS)
+        init_containers = _get(spec, "initContainers")
+        if init_containers is None:
+            init_containers = []
+        elif not isinstance(init_containers, list):
+            issues.append(Issue("schema", name, _pointer(*spec_path, "initContainers"), "initContainers is not a list"))
+            init_containers = []
+        for i, container in enumerate(init_containers):
+            _check_container(issues, name, container, spec_path + ("initContainers", i), pod_security,
+                             needs_probes=False)
+    return issues
+
+
+def lint_yaml(text: str, cache: Optional[ResultCache] = None) -> list[Issue]:
+    """Lint a whole manifest; a syntax error is reported as a single issue.
+
+    With a cache, documents whose content was already linted reuse their issues.
+    """
+    try:
+        docs = split_documents(text)
+    except yaml.YAMLError as e:
+        return [Issue("syntax", "manifest", "", f"YAML does not parse: {e}")]
+    if not docs:
+        return [Issue("syntax", "manifest", "", "no Kubernetes objects found")]
+    issues = []
+    for index, doc in enumerate(docs):
+        if cache is None:
+            issues.extend(lint_document(doc, index))
+            continue
+        key = cache.key(doc, index)
+        found = cache.get(key)
+        if found is None:
+            found = lint_document(doc, index)
+            cache.put(key, found)
+        issues.extend(found)
+    return issues
+
+
+def format_issues(issues: list[Issue]) -> str:
+    """Validator output for the fixer: APPROVED, or one precise line per issue."""
+    if not issues:
+        return "APPROVED - YAML meets all best practices"
+    lines = [f"NEEDS IMPROVEMENT: {len(issues)} issue{'s' if len(issues) != 1 else ''}"]
+    lines += [f"- {issue}" for issue in issues]
+    return "\n".join(lines)
@@ -0,0 +1,229 @@
+import copy
+import hashlib
+import json
+import re
+from typing import Any
+
+import yaml
+
+from .lint import document_hash, document_name, split_documents, strip_fences
+
+
+class PatchError(ValueError):
+    """A patch that can't be parsed or applied to the draft."""
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _tokens(pointer: str) -> list[str]:
+    if pointer in ("", "/"):
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"path '{pointer}' is not a JSON Pointer (must start with '/')")
+    return [_unescape(token) for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, op: str) -> int:
+    if token == "-" and op in ("add", "move", "copy"):
+        return len(container)
+    if not token.isdigit():
+        raise PatchError(f"'{token}' is not a list index")
+    index = int(token)
+    limit = len(container) if op in ("add", "move", "copy") else len(container) - 1
+    if index > limit:
+        raise PatchError(f"list index {index} out of range")
+    return index
+
+
+def _parent(doc: Any, tokens: list[str], create: bool) -> Any:
+    """Walk to the container holding the last token, creating mappings if asked."""
+    node = doc
+    for i, token in enumerate(tokens[:-1]):
+        if isinstance(node, list):
+            node = node[_index(node, token, "get")]
+        elif isinstance(node, dict):
+            if token not in node or node[token] is None:
+                if not create:
+                    raise PatchError(f"path '/{'/'.join(tokens[:i + 1])}' does not exist")
+                # The next token decides whether the new level is a list or a mapping
+                node[token] = [] if tokens[i + 1] in ("0", "-") else {}
+            node = node[token]
+        else:
+            raise PatchError(f"path '/{'/'.join(tokens[:i + 1])}' is not a mapping or list")
+    return node
+
+
+def _get(doc: Any, pointer: str) -> Any:
+    tokens = _tokens(pointer)
+    if not tokens:
+        return doc
+    parent = _parent(doc, tokens, create=False)
+    key = tokens[-1]
+    if isinstance(parent, list):
+        return parent[_index(parent, key, "get")]
+    if not isinstance(parent, dict) or key not in parent:
+        raise PatchError(f"path '{pointer}' does not exist")
+    return parent[key]
+
+
+def _remove(doc: Any, pointer: str) -> Any:
+    tokens = _tokens(pointer)
+    if not tokens:
+        raise PatchError("can't remove the whole document")
+    parent = _parent(doc, tokens, create=False)
+    key = tokens[-1]
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key, "remove"))
+    if not isinstance(parent, dict) or key not in parent:
+        raise PatchError(f"path '{pointer}' does not exist")
+    return parent.pop(key)
+
+
+def _add(doc: Any, pointer: str, value: Any, replace: bool = False) -> Any:
+    tokens = _tokens(pointer)
+    if not tokens:
+        return value
+    parent = _parent(doc, tokens, create=True)
+    key = tokens[-1]
+    if isinstance(parent, list):
+        index = _index(parent, key, "replace" if replace else "add")
+        if replace:
+            parent[index] = value
+        else:
+            parent.insert(index, value)
+    elif isinstance(parent, dict):
+        parent[key] = value
+    else:
+        raise PatchError(f"can't set '{pointer}': parent is not a mapping or list")
+    return doc
+
+
+def apply_operation(doc: Any, operation: dict) -> Any:
+    """Apply one RFC 6902 operation to a document and return the document.
+
+    Two deliberate leniencies, since models patch from lint paths that may
+    point below fields that don't exist yet: "add" and "replace" create
+    missing parent mappings, and "replace" of a missing mapping key adds it.
+    """
+    op = operation.get("op")
+    path = operation.get("path")
+    if not isinstance(path, str):
+        raise PatchError(f"operation {operation} has no 'path'")
+    if op in ("add", "replace"):
+        if "value" not in operation:
+            raise PatchError(f"'{op}' at '{path}' has no 'value'")
+        return _add(doc, path, copy.deepcopy(operation["value"]), replace=op == "replace")
+    if op == "remove":
+        _remove(doc, path)
+        return doc
+    if op in ("move", "copy"):
+        source = operation.get("from")
+        if not isinstance(source, str):
+            raise PatchError(f"'{op}' to '{path}' has no 'from'")
+        value = _remove(doc, source) if op == "move" else copy.deepcopy(_get(doc, source))
+        return _add(doc, path, value)
+    if op == "test":
+        if _get(doc, path) != operation.get("value"):
+            raise PatchError(f"test failed at '{path}'")
+        return doc
+    raise PatchError(f"unknown op {op!r}")
+
+
+def _target(docs: list, operation: dict) -> int:
+    """Index of the document an operation applies to ("document": Kind/name or index)."""
+    selector = operation.get("document")
+    if selector is None:
+        if len(docs) != 1:
+            raise PatchError(f"operation at '{operation.get('path')}' needs a 'document' "
+                             f"(the manifest has {len(docs)})")
+        return 0
+    if isinstance(selector, int) and 0 <= selector < len(docs):
+        return selector
+    for index, doc in enumerate(docs):
+        if document_name(doc, index) == selector:
+            return index
+    raise PatchError(f"no document {selector!r} in the manifest")
+
+
+def apply_patch(docs: list, operations: list) -> list:
+    """Apply a JSON Patch to a parsed manifest. All-or-nothing: returns new documents."""
+    docs = copy.deepcopy(docs)
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError(f"operation {operation!r} is not an object")
+        index = _target(docs, operation)
+        docs[index] = apply_operation(docs[index], operation)
+    return docs
+
+
+def apply_patch_partial(docs: list, operations: list) -> tuple[list, list[str]]:
+    """Apply every operation that can be applied; return (documents, failures).
+
+    Each operation is tried on a copy of its target document and kept only
+    if it succeeds, so one bad path doesn't throw away the rest of the fix.
+    Failures are "#<n> <op> <path>: <reason>" lines (n counts from 1).
+    """
+    docs = copy.deepcopy(docs)
+    failures = []
+    for number, operation in enumerate(operations, 1):
+        try:
+            if not isinstance(operation, dict):
+                raise PatchError(f"operation {operation!r} is not an object")
+            index = _target(docs, operation)
+            docs[index] = apply_operation(copy.deepcopy(docs[index]), operation)
+        except PatchError as e:
+            described = f"{operation.get('op')} {operation.get('path')}" if isinstance(operation, dict) else "operation"
+            failures.append(f"#{number} {described}: {e}")
+    return docs, failures
+
+
+def dump_documents(docs: list) -> str:
+    """Serialize documents back into a (multi-document) manifest."""
+    return yaml.safe_dump_all(docs, sort_keys=False, default_flow_style=False).strip() + "\n"
+
+
+def parse_fixer_output(text: str) -> tuple[str, Any]:
+    """Classify the fixer's reply as ("patch", operations) or ("manifest", documents).
+
+    A full manifest is accepted too, so a model that ignores the patch
+    format still makes progress. Raises PatchError for anything else.
+    """
+    body = strip_fences(text)
+    if body.startswith("[") or body.startswith("{"):
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise PatchError(f"patch is not valid JSON: {e}") from e
+        if isinstance(data, dict) and isinstance(data.get("patch"), list):
+            data = data["patch"]
+        if isinstance(data, list):
+            return "patch", data
+        if not (isinstance(data, dict) and data.get("kind")):
+            raise PatchError("expected a JSON Patch array of operations")
+    try:
+        docs = split_documents(body)
+    except yaml.YAMLError as e:
+        raise PatchError(f"reply is neither a JSON Patch nor YAML: {e}") from e
+    if docs and all(isinstance(doc, dict) and doc.get("kind") for doc in docs):
+        return "manifest", docs
+    raise PatchError("reply is neither a JSON Patch nor a Kubernetes manifest")
+
+
+def content_hash(value: Any) -> str:
+    """Hash of a draft or of validator feedback that ignores formatting.
+
+    YAML drafts are compared by their parsed content, so re-indenting or
+    re-ordering keys doesn't count as a change. Anything else (feedback,
+    unparseable drafts) is compared with whitespace and case normalized.
+    """
+    text = str(value or "")
+    try:
+        docs = split_documents(text)
+    except yaml.YAMLError:
+        docs = None
+    if docs and all(isinstance(doc, (dict, list)) for doc in docs):
+        return document_hash(docs)
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,81 @@
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import Field
+
+from ..patch import content_hash
+
+
+class ConvergenceGuard(BaseAgent):
+    """Ends the loop once it stops making progress.
+
+    Runs after the validator on every iteration and hashes each watched
+    state key (see patch.content_hash). If any of them has a value already
+    seen in this run (the fixer left the draft unchanged, or the validator
+    repeats the same feedback), it escalates so the LoopAgent stops instead
+    of spending the remaining iterations.
+
+    An iteration whose fix was (partly) rejected, i.e. `retry_key` is set
+    in state, is not recorded: the fixer gets another try with the errors
+    before an unchanged draft counts as converged.
+    """
+
+    watch_keys: list[str] = Field(default_factory=lambda: ["yaml_draft", "validation_result"])
+    """State keys whose repetition means the loop has converged."""
+
+    retry_key: str = "patch_error"
+    """State key that, when set, marks the previous fix as failed rather than finished."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        history_key = f"temp:{self.name}_seen"
+        history = state.get(history_key) or {}
+        if history.get("invocation") != ctx.invocation_id:
+            history = {"invocation": ctx.invocation_id, "seen": {key: [] for key in self.watch_keys}}
+
+        if state.get(self.retry_key):
+            print(f"[{self.name}] the last fix was rejected ({self.retry_key}); not counting this iteration")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={history_key: history}),
+            )
+            return
+
+        seen = {key: list(history["seen"].get(key, [])) for key in self.watch_keys}
+        repeated = []
+        for key in self.watch_keys:
+            digest = content_hash(state.get(key))
+            if digest in seen[key]:
+                repeated.append(f"{key} repeats iteration {seen[key].index(digest) + 1}")
+            seen[key].append(digest)
+        state_delta = {history_key: {"invocation": ctx.invocation_id, "seen": seen}}
+
+        if not repeated:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta=state_delta),
+            )
+            return
+
+        message = f"Stopped early: no progress ({'; '.join(repeated)})"
+        print(f"[{self.name}] {message}")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=message)]),
+            actions=EventActions(state_delta=state_delta, escalate=True),
+        )
+
+
+agent = ConvergenceGuard(
+    name="convergence_guard",
+    description="Stops the improvement loop when the draft or the feedback stops changing",
+)
@@ -1,4 +1,13 @@
-from google.adk.agents import Agent
+from typing import AsyncGenerator
+
+import yaml
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from ..lint import split_documents
+from ..patch import PatchError, apply_patch_partial, dump_documents, parse_fixer_output
 
 agent = Agent(
     name="yaml_fixer",
@@ -8,6 +17,9 @@ agent = Agent(
     instruction="""
 Fix the Kubernetes YAML based on the validation feedback from {validation_result}.
 
+Each issue names the object (Kind/name) and the JSON Pointer path to fix,
+e.g. "(at /spec/template/spec/containers/0/resources/limits/memory)".
+
 Address ALL issues mentioned by the validator:
 - Add missing resource requests and limits
 - Add or improve labels
@@ -19,3 +31,95 @@ Output ONLY the corrected YAML manifest, no explanations or markdown.
 The fixed YAML will be validated again in the next iteration.
 """
 )
+
+
+patch_agent = Agent(
+    name="yaml_fixer",
+    model="gemini-2.0-flash",
+    description="Fixes Kubernetes YAML by emitting a JSON Patch for the validator's issues",
+    output_key="yaml_patch",
+    instruction="""
+Fix the Kubernetes YAML below based on the validation feedback.
+
+Current YAML:
+{yaml_draft}
+
+Validation feedback:
+{validation_result}
+
+Problems with your previous patch (these operations were NOT applied; fix
+their paths or use a different op, and don't repeat operations that worked):
+{patch_error?}
+
+Each issue names the object (Kind/name) and the JSON Pointer path to fix,
+e.g. "(at /spec/template/spec/containers/0/resources/limits/memory)".
+
+Do NOT rewrite the manifest. Output ONLY a JSON Patch (RFC 6902): a JSON
+array of operations that fix ALL the issues, for example:
+[
+  {"op": "add", "path": "/spec/template/spec/containers/0/resources/limits/memory", "value": "256Mi"},
+  {"op": "replace", "path": "/spec/template/spec/containers/0/image", "value": "nginx:1.27"}
+]
+
+- Paths are relative to one document; when the manifest has several
+  documents, add "document": "<Kind/name>" to each operation
+- Missing parent fields are created, so you can add a leaf directly
+- Use "add" for new fields, "replace" for wrong values, "remove" to delete
+- Only "remove"/"replace" paths that exist in the current YAML, and list
+  indexes must be in range
+
+Output ONLY the JSON array, no explanations or markdown.
+The patched YAML will be validated again in the next iteration.
+"""
+)
+
+
+class PatchApplier(BaseAgent):
+    """Applies the fixer's JSON Patch (state["yaml_patch"]) to yaml_draft locally.
+
+    A reply that is a whole manifest instead of a patch replaces the draft.
+    Operations that apply are kept even if others fail. The failures (or
+    the reason the reply couldn't be used at all) go to state["patch_error"],
+    which the fixer sees on the next iteration and which tells the
+    convergence guard not to count that iteration as "no progress".
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        failures = []
+        try:
+            mode, value = parse_fixer_output(str(state.get("yaml_patch", "")))
+            if mode == "patch":
+                docs, failures = apply_patch_partial(split_documents(str(state.get("yaml_draft", ""))), value)
+                print(f"[{self.name}] applied {len(value) - len(failures)} of {len(value)} patch operation(s)")
+            else:
+                docs = value
+                print(f"[{self.name}] fixer returned a full manifest; replacing the draft")
+        except (PatchError, yaml.YAMLError) as e:
+            print(f"[{self.name}] patch not applied: {e}")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=f"Patch not applied: {e}")]),
+                actions=EventActions(state_delta={"patch_error": f"the whole reply was rejected: {e}"}),
+            )
+            return
+
+        patch_error = "\n".join(f"- {failure}" for failure in failures)
+        for failure in failures:
+            print(f"[{self.name}] skipped operation {failure}")
+        draft = dump_documents(docs)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=draft)]),
+            actions=EventActions(state_delta={"yaml_draft": draft, "patch_error": patch_error or None}),
+        )
+
+
+patch_applier = PatchApplier(
+    name="yaml_patch_applier",
+    description="Applies the fixer's JSON Patch to the YAML draft locally",
+)
@@ -1,5 +1,22 @@
-from google.adk.agents import Agent
+import asyncio
+import os
+import time
+from typing import AsyncGenerator, Optional, Union
+
+import yaml
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models import BaseLlm, LLMRegistry, LlmRequest
 from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from pydantic import ConfigDict, Field
+
+from ..lint import ResultCache, document_name, format_issues, lint_yaml, split_documents
+
+
+# Documents the per-document LLM validator checks at the same time
+VALIDATION_CONCURRENCY = int(os.getenv("LOOP_VALIDATION_CONCURRENCY", "4"))
 
 
 def exit_loop(tool_context: ToolContext):
@@ -37,3 +54,168 @@ If problems exist:
 Be thorough but concise.
 """
 )
+
+
+def _result_event(ctx: InvocationContext, author: str, result: str, approved: bool) -> Event:
+    """Validation event: validation_result for the fixer, exit_loop when approved."""
+    tool_context = ToolContext(ctx)
+    if approved:
+        exit_loop(tool_context)
+    actions = tool_context.actions
+    actions.state_delta["validation_result"] = result
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=author,
+        branch=ctx.branch,
+        content=types.Content(role="model", parts=[types.Part(text=result)]),
+        actions=EventActions(
+            state_delta=actions.state_delta,
+            escalate=actions.escalate,
+            skip_summarization=actions.skip_summarization,
+        ),
+    )
+
+
+class LintingValidator(BaseAgent):
+    """Validates yaml_draft with the local rule engine instead of a model call.
+
+    Runs the same checks the LLM validator is asked for (see lint.py) in
+    milliseconds. A clean draft calls exit_loop, ending the loop; otherwise
+    validation_result gets one line per issue, with the path to fix, for
+    the fixer. Issues are cached per document, so later iterations only
+    lint the documents the fixer changed.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cache: ResultCache = Field(default_factory=ResultCache)
+    """Issues per document content hash."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        start = time.perf_counter()
+        misses = self.cache.misses
+        issues = lint_yaml(str(ctx.session.state.get("yaml_draft", "")), self.cache)
+        result = format_issues(issues)
+        print(f"[{self.name}] {len(issues)} issue(s), {self.cache.misses - misses} document(s) linted "
+              f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        yield _result_event(ctx, self.name, result, approved=not issues)
+
+
+DOCUMENT_INSTRUCTION = """
+Validate this single Kubernetes object for best practices.
+
+Check for:
+- Missing or inadequate resource requests and limits
+- Missing or poor labels (app, version, component)
+- Missing readinessProbe and livenessProbe for Deployments
+- Security issues (runAsNonRoot, readOnlyRootFilesystem)
+- Bad practices (using :latest tag, no imagePullPolicy)
+
+Only check what applies to this kind of object.
+
+If it is PERFECT, output exactly: APPROVED
+Otherwise output: NEEDS IMPROVEMENT: followed by one specific issue per line.
+"""
+
+
+class PerDocumentValidator(BaseAgent):
+    """LLM validation of yaml_draft, one concurrent model call per changed document.
+
+    The draft is split into documents (Deployment, Service, Ingress, ...).
+    Each document's verdict is cached by its content hash, so a later
+    iteration only asks the model about documents the fixer changed, and
+    those calls run concurrently (at most `max_concurrency` at once).
+    Latency grows with the number of changed documents, not the bundle size.
+    A document whose model call fails is reported as "could not validate"
+    and left out of the cache, so the next iteration retries it.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: Union[str, BaseLlm] = "gemini-2.0-flash"
+    """Model name (resolved through ADK's registry) or a BaseLlm instance."""
+
+    max_concurrency: int = VALIDATION_CONCURRENCY
+    """Documents validated at the same time."""
+
+    cache: ResultCache = Field(default_factory=ResultCache)
+    """Verdict text per document content hash ("" means approved)."""
+
+    def _llm(self) -> BaseLlm:
+        return self.model if isinstance(self.model, BaseLlm) else LLMRegistry.new_llm(self.model)
+
+    async def _validate(self, llm: BaseLlm, doc) -> str:
+        request = LlmRequest(
+            model=llm.model,
+            contents=[types.Content(role="user", parts=[types.Part(text=yaml.safe_dump(doc, sort_keys=False))])],
+            config=types.GenerateContentConfig(system_instruction=DOCUMENT_INSTRUCTION),
+        )
+        text = ""
+        async for response in llm.generate_content_async(request):
+            if response.content and response.content.parts:
+                text += "".join(part.text or "" for part in response.content.parts if not part.thought)
+        text = text.strip()
+        if text.upper().startswith("APPROVED"):
+            return ""
+        return text.split(":", 1)[1].strip() if text.upper().startswith("NEEDS IMPROVEMENT") else text
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        start = time.perf_counter()
+        try:
+            docs = split_documents(str(ctx.session.state.get("yaml_draft", "")))
+        except yaml.YAMLError as e:
+            docs, error = [], f"YAML does not parse: {e}"
+        else:
+            error = None if docs else "no Kubernetes objects found"
+        if error:
+            yield _result_event(ctx, self.name, f"NEEDS IMPROVEMENT: 1 issue\n- [syntax] manifest: {error}",
+                                approved=False)
+            return
+
+        keys = [self.cache.key(doc, index) for index, doc in enumerate(docs)]
+        verdicts: list[Optional[str]] = [self.cache.get(key) for key in keys]
+        changed = [index for index, verdict in enumerate(verdicts) if verdict is None]
+
+        if changed:
+            llm = self._llm()
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def validate(index: int) -> str:
+                async with semaphore:
+                    return await self._validate(llm, docs[index])
+
+            results = await asyncio.gather(*(validate(index) for index in changed), return_exceptions=True)
+            for index, result in zip(changed, results):
+                if isinstance(result, Exception):
+                    # Reported as an issue but not cached, so the next iteration asks again
+                    print(f"[{self.name}] could not validate {document_name(docs[index], index)}: {result!r}")
+                    verdicts[index] = f"could not validate: {type(result).__name__}: {result}"
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    verdicts[index] = result
+                    self.cache.put(keys[index], result)
+
+        failing = [(document_name(doc, index), verdicts[index]) for index, doc in enumerate(docs) if verdicts[index]]
+        print(f"[{self.name}] {len(changed)} of {len(docs)} document(s) validated "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        if not failing:
+            yield _result_event(ctx, self.name, format_issues([]), approved=True)
+            return
+        lines = [f"NEEDS IMPROVEMENT: issues in {len(failing)} of {len(docs)} documents"]
+        for name, verdict in failing:
+            lines.append(f"{name}:")
+            lines += [f"- {line.strip().lstrip('-* ').strip()}" for line in verdict.splitlines() if line.strip()]
+        yield _result_event(ctx, self.name, "\n".join(lines), approved=False)
+
+
+lint_agent = LintingValidator(
+    name="yaml_validator",
+    description="Validates Kubernetes YAML for best practices with local rules, no model call",
+)
+
+
+per_document_agent = PerDocumentValidator(
+    name="yaml_validator",
+    description="Validates each Kubernetes object in the YAML concurrently, re-checking only changed ones",
+)
@@ -0,0 +1,195 @@
+import copy
+
+import pytest
+import yaml
+
+from loop_agent.lint import ResultCache, format_issues, lint_document, lint_yaml
+
+
+def container(**overrides):
+    base = {
+        "name": "web",
+        "image": "nginx:1.27",
+        "imagePullPolicy": "IfNotPresent",
+        "resources": {"requests": {"cpu": "100m", "memory": "128Mi"},
+                      "limits": {"cpu": "500m", "memory": "256Mi"}},
+        "readinessProbe": {"httpGet": {"path": "/", "port": 80}},
+        "livenessProbe": {"httpGet": {"path": "/", "port": 80}},
+        "securityContext": {"runAsNonRoot": True, "readOnlyRootFilesystem": True},
+    }
+    base.update(overrides)
+    return base
+
+
+LABELS = {"app": "web", "version": "1.27", "component": "frontend"}
+
+
+def deployment(*containers):
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "web", "labels": dict(LABELS)},
+        "spec": {"template": {"metadata": {"labels": dict(LABELS)},
+                              "spec": {"containers": list(containers) or [container()]}}},
+    }
+
+
+def rules(doc):
+    return sorted({issue.rule for issue in lint_document(doc)})
+
+
+def paths(doc, rule):
+    return [issue.path for issue in lint_document(doc) if issue.rule == rule]
+
+
+C = "/spec/template/spec/containers/0"
+
+
+def test_clean_deployment_passes():
+    assert lint_document(deployment()) == []
+
+
+def test_resources():
+    web = container()
+    del web["resources"]["limits"]["memory"]
+    web["resources"]["requests"]["cpu"] = ""
+    assert paths(deployment(web), "resources") == [C + "/resources/requests/cpu", C + "/resources/limits/memory"]
+    assert len(paths(deployment(container(resources=None)), "resources")) == 4
+
+
+def test_probes_only_for_long_running_kinds():
+    web = container()
+    del web["readinessProbe"], web["livenessProbe"]
+    assert paths(deployment(web), "probes") == [C + "/readinessProbe", C + "/livenessProbe"]
+
+    job = deployment(web)
+    job["kind"] = "Job"
+    assert paths(job, "probes") == []
+
+    cron = {**deployment(web), "kind": "CronJob"}
+    cron["spec"] = {"jobTemplate": {"spec": job["spec"]}}
+    assert lint_document(cron) == []
+
+
+def test_labels_accept_short_and_recommended_keys():
+    doc = deployment()
+    doc["metadata"]["labels"] = {"app.kubernetes.io/name": "web", "app.kubernetes.io/version": "1.27",
+                                 "component": "frontend"}
+    assert rules(doc) == []
+
+    doc["metadata"]["labels"] = {"app.kubernetes.io/name": "web"}
+    messages = [issue.message for issue in lint_document(doc)]
+    assert messages == ["missing 'version' label", "missing 'component' label"]
+
+    # The pod template needs them too
+    doc = deployment()
+    del doc["spec"]["template"]["metadata"]
+    assert paths(doc, "labels") == ["/spec/template/metadata/labels"] * 3
+
+
+@pytest.mark.parametrize("image, problem", [
+    ("nginx:1.27", None),
+    ("registry.local:5000/team/web:2.1", None),
+    ("nginx@sha256:" + "a" * 64, None),
+    ("registry.local:5000/team/web", "no tag"),
+    ("nginx", "no tag"),
+    ("nginx:latest", ":latest"),
+    ("registry.local:5000/web:latest", ":latest"),
+])
+def test_image_tags(image, problem):
+    messages = [issue.message for issue in lint_document(deployment(container(image=image)))]
+    if problem is None:
+        assert messages == []
+    else:
+        assert len(messages) == 1 and problem in messages[0]
+
+
+def test_image_pull_policy_and_missing_image():
+    web = container()
+    del web["image"], web["imagePullPolicy"]
+    assert paths(deployment(web), "image") == [C + "/image", C + "/imagePullPolicy"]
+
+
+def test_run_as_non_root_is_inherited_from_the_pod():
+    web = container(securityContext={"readOnlyRootFilesystem": True})
+    doc = deployment(web)
+    assert paths(doc, "security") == [C + "/securityContext/runAsNonRoot"]
+
+    doc["spec"]["template"]["spec"]["securityContext"] = {"runAsNonRoot": True}
+    assert lint_document(doc) == []
+
+    # A container can still override the pod setting
+    web["securityContext"]["runAsNonRoot"] = False
+    assert paths(doc, "security") == [C + "/securityContext/runAsNonRoot"]
+
+
+def test_read_only_root_filesystem():
+    doc = deployment(container(securityContext={"runAsNonRoot": True}))
+    assert paths(doc, "security") == [C + "/securityContext/readOnlyRootFilesystem"]
+
+
+def test_init_containers_are_checked_without_probes():
+    doc = deployment()
+    init = container(name="migrate")
+    del init["readinessProbe"], init["livenessProbe"], init["imagePullPolicy"]
+    doc["spec"]["template"]["spec"]["initContainers"] = [init]
+    assert paths(doc, "probes") == []
+    assert paths(doc, "image") == ["/spec/template/spec/initContainers/0/imagePullPolicy"]
+
+
+def test_init_containers_must_be_a_list():
+    doc = deployment()
+    doc["spec"]["template"]["spec"]["initContainers"] = {"migrate": container(name="migrate")}
+    issues = lint_document(doc)
+    assert [(issue.rule, issue.path, issue.message) for issue in issues] == [
+        ("schema", "/spec/template/spec/initContainers", "initContainers is not a list"),
+    ]
+
+
+@pytest.mark.parametrize("doc, message", [
+    ({"kind": "Deployment", "metadata": {"name": "web", "labels": LABELS}}, "missing apiVersion"),
+    ({**deployment(), "spec": {"template": {"metadata": {"labels": LABELS}, "spec": {"containers": []}}}},
+     "no containers"),
+    (deployment("nginx"), "container is not a mapping"),
+    (["not", "an", "object"], "document is not a Kubernetes object"),
+])
+def test_schema(doc, message):
+    assert any(issue.rule == "schema" and message in issue.message for issue in lint_document(doc))
+
+
+def test_pods_and_other_kinds():
+    pod = {"apiVersion": "v1", "kind": "Pod", "metadata": {"name": "web", "labels": LABELS},
+           "spec": {"containers": [container(readinessProbe=None, livenessProbe=None)]}}
+    assert lint_document(pod) == []
+    service = {"apiVersion": "v1", "kind": "Service", "metadata": {"name": "web", "labels": LABELS}}
+    assert lint_document(service) == []
+
+
+def test_lint_yaml_syntax_and_cache():
+    assert [issue.rule for issue in lint_yaml("kind: [unclosed")] == ["syntax"]
+    assert [issue.message for issue in lint_yaml("```yaml\n```")] == ["no Kubernetes objects found"]
+
+    bad = deployment(container(image="nginx:latest"))
+    bad["metadata"]["name"] = "api"
+    text = "```yaml\n" + yaml.safe_dump_all([deployment(), bad]) + "```"
+    cache = ResultCache()
+    first = lint_yaml(text, cache)
+    assert [issue.document for issue in first] == ["Deployment/api"]
+    assert lint_yaml(text, cache) == first
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+    # Only the changed document is linted again
+    fixed = copy.deepcopy(bad)
+    fixed["spec"]["template"]["spec"]["containers"][0]["image"] = "nginx:1.27"
+    assert lint_yaml(yaml.safe_dump_all([deployment(), fixed]), cache) == []
+    assert cache.stats()["misses"] == 3
+
+
+def test_format_issues():
+    assert format_issues([]).startswith("APPROVED")
+    issues = lint_document(deployment(container(image="nginx")))
+    assert format_issues(issues) == (
+        "NEEDS IMPROVEMENT: 1 issue\n"
+        f"- [image] Deployment/web: container 'web' image 'nginx' uses no tag (implies :latest); "
+        f"pin a specific version (at {C}/image)"
+    )
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from loop_agent.patch import (
+    PatchError,
+    apply_operation,
+    apply_patch,
+    apply_patch_partial,
+    content_hash,
+    parse_fixer_output,
+)
+
+
+def deployment():
+    return {
+        "kind": "Deployment",
+        "metadata": {"name": "web"},
+        "spec": {"template": {"spec": {"containers": [{"name": "web", "image": "nginx:latest"}]}}},
+    }
+
+
+def service():
+    return {"kind": "Service", "metadata": {"name": "web"}, "spec": {"ports": [{"port": 80}]}}
+
+
+C = "/spec/template/spec/containers/0"
+
+
+def test_add_creates_missing_parents():
+    doc = apply_operation(deployment(), {"op": "add", "path": C + "/resources/limits/memory", "value": "256Mi"})
+    assert doc["spec"]["template"]["spec"]["containers"][0]["resources"] == {"limits": {"memory": "256Mi"}}
+
+
+def test_add_inserts_into_lists():
+    doc = apply_operation(service(), {"op": "add", "path": "/spec/ports/0", "value": {"port": 443}})
+    doc = apply_operation(doc, {"op": "add", "path": "/spec/ports/-", "value": {"port": 8080}})
+    assert [p["port"] for p in doc["spec"]["ports"]] == [443, 80, 8080]
+
+
+def test_replace_remove_move_copy_test():
+    doc = apply_operation(deployment(), {"op": "replace", "path": C + "/image", "value": "nginx:1.27"})
+    doc = apply_operation(doc, {"op": "copy", "from": C + "/image", "path": "/metadata/annotations/image"})
+    doc = apply_operation(doc, {"op": "move", "from": "/metadata/annotations/image", "path": "/metadata/image"})
+    doc = apply_operation(doc, {"op": "test", "path": "/metadata/image", "value": "nginx:1.27"})
+    doc = apply_operation(doc, {"op": "remove", "path": "/metadata/annotations"})
+    assert doc["metadata"] == {"name": "web", "image": "nginx:1.27"}
+    assert doc["spec"]["template"]["spec"]["containers"][0]["image"] == "nginx:1.27"
+
+
+def test_pointer_escapes():
+    doc = apply_operation({"metadata": {}}, {"op": "add", "path": "/metadata/labels/app.kubernetes.io~1name",
+                                             "value": "web"})
+    assert doc["metadata"]["labels"] == {"app.kubernetes.io/name": "web"}
+
+
+@pytest.mark.parametrize("operation, message", [
+    ({"op": "remove", "path": "/spec/missing"}, "does not exist"),
+    ({"op": "replace", "path": "/spec/template/spec/containers/5", "value": {}}, "out of range"),
+    ({"op": "test", "path": C + "/image", "value": "nginx:1.27"}, "test failed"),
+    ({"op": "add", "path": C + "/image"}, "has no 'value'"),
+    ({"op": "move", "path": "/x"}, "has no 'from'"),
+    ({"op": "add", "path": "spec", "value": 1}, "JSON Pointer"),
+    ({"op": "upsert", "path": "/spec", "value": 1}, "unknown op"),
+    ({"op": "remove", "path": ""}, "whole document"),
+])
+def test_patch_errors(operation, message):
+    with pytest.raises(PatchError, match=message):
+        apply_operation(deployment(), operation)
+
+
+def test_document_targeting():
+    docs = apply_patch([deployment(), service()], [
+        {"document": "Service/web", "op": "replace", "path": "/spec/ports/0/port", "value": 8080},
+        {"document": 0, "op": "replace", "path": C + "/image", "value": "nginx:1.27"},
+    ])
+    assert docs[1]["spec"]["ports"][0]["port"] == 8080
+    assert docs[0]["spec"]["template"]["spec"]["containers"][0]["image"] == "nginx:1.27"
+
+
+def test_document_required_with_several_documents():
+    with pytest.raises(PatchError, match="needs a 'document'"):
+        apply_patch([deployment(), service()], [{"op": "add", "path": "/metadata/x", "value": 1}])
+    with pytest.raises(PatchError, match="no document"):
+        apply_patch([deployment(), service()], [{"document": "Ingress/web", "op": "remove", "path": "/spec"}])
+
+
+def test_apply_patch_is_all_or_nothing():
+    original = [deployment()]
+    with pytest.raises(PatchError):
+        apply_patch(original, [
+            {"op": "replace", "path": C + "/image", "value": "nginx:1.27"},
+            {"op": "remove", "path": "/spec/missing"},
+        ])
+    assert original == [deployment()]
+
+
+def test_apply_patch_partial_keeps_good_operations():
+    docs, failures = apply_patch_partial([deployment()], [
+        {"op": "replace", "path": C + "/image", "value": "nginx:1.27"},
+        {"op": "remove", "path": "/spec/missing"},
+        {"op": "replace", "path": "/spec/template/spec/containers/3/image", "value": "x"},
+        {"op": "add", "path": C + "/imagePullPolicy", "value": "IfNotPresent"},
+    ])
+    container = docs[0]["spec"]["template"]["spec"]["containers"][0]
+    assert container == {"name": "web", "image": "nginx:1.27", "imagePullPolicy": "IfNotPresent"}
+    assert len(failures) == 2
+    assert failures[0].startswith("#2 remove /spec/missing:")
+    assert failures[1].startswith("#3 replace /spec/template/spec/containers/3/image:")
+
+
+def test_failed_move_leaves_document_intact():
+    docs, failures = apply_patch_partial([deployment()], [
+        {"op": "move", "from": C + "/image", "path": "/spec/template/spec/containers/9"},
+    ])
+    assert docs == [deployment()]
+    assert len(failures) == 1
+
+
+def test_parse_fixer_output():
+    patch = [{"op": "add", "path": "/a", "value": 1}]
+    assert parse_fixer_output("```json\n" + json.dumps(patch) + "\n```") == ("patch", patch)
+    assert parse_fixer_output(json.dumps({"patch": patch})) == ("patch", patch)
+    mode, docs = parse_fixer_output("kind: Service\nmetadata: {name: web}\n---\nkind: ConfigMap\n")
+    assert mode == "manifest" and [doc["kind"] for doc in docs] == ["Service", "ConfigMap"]
+    with pytest.raises(PatchError):
+        parse_fixer_output("[not json")
+    with pytest.raises(PatchError):
+        parse_fixer_output("Sure! Here is the fix.")
+
+
+def test_content_hash_ignores_formatting():
+    assert content_hash("kind: Service\nmetadata: {name: web}\n") == \
+        content_hash("kind: Service\nmetadata:\n  name: web\n")
+    assert content_hash("kind: Service") != content_hash("kind: ConfigMap")
+    assert content_hash("Fix  the   LABELS") == content_hash("fix the labels")
@@ -0,0 +1,2 @@
+from .scheduler import PRIORITIES, Grant, ModelLimits, ModelScheduler, TokenBucket, call_context
+from .llm import ScheduledGemini, ScheduledLlm, estimate_tokens, get_scheduler, install_scheduler
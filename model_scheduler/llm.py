@@ -0,0 +1,116 @@
+from typing import AsyncGenerator, Optional
+
+from google.adk.models import BaseLlm, Gemini, LLMRegistry, LlmRequest, LlmResponse
+
+from .scheduler import ModelScheduler
+
+
+# Output tokens assumed for the up-front TPM charge when the request sets no
+# max_output_tokens; the real usage replaces the estimate afterwards.
+DEFAULT_OUTPUT_TOKENS = 512
+
+_scheduler: Optional[ModelScheduler] = None
+
+
+def get_scheduler() -> ModelScheduler:
+    """The process-wide scheduler (created from the environment on first use)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelScheduler()
+    return _scheduler
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough token count of a request: ~4 characters per token plus the expected output."""
+    chars = 0
+    config = llm_request.config
+    if config is not None and isinstance(config.system_instruction, str):
+        chars += len(config.system_instruction)
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call or part.function_response:
+                chars += len(str(part.function_call or part.function_response))
+    output = (config.max_output_tokens if config is not None else None) or DEFAULT_OUTPUT_TOKENS
+    return chars // 4 + output
+
+
+def _is_quota_error(error: Exception) -> bool:
+    code = getattr(error, "code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+async def scheduled_call(
+    scheduler: ModelScheduler,
+    model: str,
+    llm_request: LlmRequest,
+    responses: AsyncGenerator[LlmResponse, None],
+) -> AsyncGenerator[LlmResponse, None]:
+    """Run one model call (`responses`) inside a scheduler slot.
+
+    The slot is held until the last (streamed) response, then released
+    with the token count the model reported.
+    """
+    async with scheduler.slot(model, estimate_tokens(llm_request)) as grant:
+        try:
+            async for response in responses:
+                if response.usage_metadata and response.usage_metadata.total_token_count:
+                    grant.used_tokens = response.usage_metadata.total_token_count
+                yield response
+        except Exception as e:
+            if _is_quota_error(e):
+                scheduler.report_quota_error(model)
+            raise
+        finally:
+            await responses.aclose()
+
+
+class ScheduledLlm(BaseLlm):
+    """Wraps any BaseLlm so its calls go through a ModelScheduler.
+
+        agent = Agent(model=ScheduledLlm.wrap(MyStubLlm()), ...)
+    """
+
+    llm: BaseLlm
+    scheduler: Optional[ModelScheduler] = None
+
+    @classmethod
+    def wrap(cls, llm: BaseLlm, scheduler: Optional[ModelScheduler] = None) -> "ScheduledLlm":
+        return cls(model=llm.model, llm=llm, scheduler=scheduler)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        responses = self.llm.generate_content_async(llm_request, stream=stream)
+        async for response in scheduled_call(self.scheduler or get_scheduler(), self.model, llm_request, responses):
+            yield response
+
+    def connect(self, llm_request: LlmRequest):
+        # Live sessions are long-lived connections, not per-call quota
+        return self.llm.connect(llm_request)
+
+
+class ScheduledGemini(Gemini):
+    """Gemini whose calls go through the process-wide scheduler."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        responses = super().generate_content_async(llm_request, stream=stream)
+        async for response in scheduled_call(get_scheduler(), self.model, llm_request, responses):
+            yield response
+
+
+def install_scheduler(scheduler: Optional[ModelScheduler] = None) -> ModelScheduler:
+    """Route every agent configured with a "gemini-..." model name through the scheduler.
+
+    Registers ScheduledGemini in ADK's model registry for the process, so
+    agents don't need to change. Call once at startup, before the first
+    model call. Returns the scheduler in use.
+    """
+    global _scheduler
+    if scheduler is not None:
+        _scheduler = scheduler
+    LLMRegistry.register(ScheduledGemini)
+    return get_scheduler()
@@ -0,0 +1,354 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from latency_stats import percentile
+
+
+# Priority classes, most urgent first. Waiting interactive calls are always
+# granted before waiting batch calls.
+PRIORITIES = ("interactive", "batch")
+
+# Defaults for every model without its own ModelLimits. Unset means no limit:
+# quotas differ per model and project, so only enforce one that was configured.
+DEFAULT_RPM = float(os.environ["MODEL_SCHEDULER_RPM"]) if os.getenv("MODEL_SCHEDULER_RPM") else None
+DEFAULT_TPM = float(os.environ["MODEL_SCHEDULER_TPM"]) if os.getenv("MODEL_SCHEDULER_TPM") else None
+
+# Model calls in flight at once, across all models
+DEFAULT_CONCURRENCY = int(os.getenv("MODEL_SCHEDULER_CONCURRENCY", "8"))
+
+# Queue waits kept per priority for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+# Who is calling, set by runners around a turn (see call_context)
+_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("model_scheduler_session", default=None)
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("model_scheduler_priority", default=None)
+
+
+@contextmanager
+def call_context(session_id: Optional[str] = None, priority: Optional[str] = None):
+    """Attribute model calls made inside this block to a session and priority.
+
+    Tasks started inside the block (e.g. ParallelAgent branches) inherit it.
+
+        with call_context(session_id=session.id, priority="batch"):
+            async for event in runner.run_async(...):
+                ...
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+    tokens = []
+    if session_id is not None:
+        tokens.append((_session, _session.set(session_id)))
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@dataclass
+class ModelLimits:
+    """Quota for one model: requests and tokens per minute (None: no limit)."""
+
+    rpm: Optional[float] = DEFAULT_RPM
+    tpm: Optional[float] = DEFAULT_TPM
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute / 60` per second.
+
+    The bucket starts full, so up to a minute's quota can burst. Charges
+    above the balance are allowed after the fact (see adjust), putting the
+    bucket in debt until it refills.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or refund, if negative) `amount` outside of take()."""
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Unlimited:
+    """Stands in for a TokenBucket when a model has no limit configured."""
+
+    tokens = None
+
+    def _refill(self, now: float) -> None:
+        pass
+
+    def delay(self, amount: float, now: float) -> float:
+        return 0.0
+
+    def take(self, amount: float) -> None:
+        pass
+
+    def adjust(self, amount: float) -> None:
+        pass
+
+    def drain(self, now: float) -> None:
+        pass
+
+
+def _bucket(per_minute: Optional[float]):
+    return _Unlimited() if per_minute is None else TokenBucket(per_minute)
+
+
+@dataclass
+class _Waiter:
+    model: str
+    tokens: int
+    priority: str
+    session: str
+    enqueued: float
+    future: asyncio.Future
+
+
+@dataclass
+class Grant:
+    """A granted model call; pass it back to ModelScheduler.release()."""
+
+    id: int
+    model: str
+    tokens: int
+    priority: str
+    session: str
+    wait_s: float
+    used_tokens: Optional[int] = None
+    """Set by the caller once the real token usage is known."""
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds, 4)
+
+
+class ModelScheduler:
+    """Process-wide admission control for model calls.
+
+    A call waits until all of these allow it:
+    - a free slot in the concurrency pool (`max_concurrency` calls in flight)
+    - the model's request bucket (RPM) and token bucket (TPM, charged with
+      an estimate up front and corrected with the real usage afterwards),
+      where a limit is configured
+
+    Waiting calls are served by priority class first ("interactive" before
+    "batch"), then round-robin across sessions within a class, so one
+    session with a hundred queued calls can't starve the others. A call
+    whose model is out of quota doesn't block calls to other models.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        default_priority: str = "interactive",
+    ):
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.max_concurrency = max_concurrency
+        self.default_priority = default_priority
+        self.in_flight = 0
+
+        self._requests: dict[str, TokenBucket] = {}
+        self._tokens: dict[str, TokenBucket] = {}
+        # priority -> session -> waiters, sessions kept in round-robin order
+        self._queues: dict[str, "OrderedDict[str, deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._ids = itertools.count(1)
+
+        self.granted = 0
+        self._granted_by: dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.throttled = 0
+        self.quota_errors = 0
+        self._waits: dict[str, deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITIES}
+        self._max_wait: dict[str, float] = {p: 0.0 for p in PRIORITIES}
+
+    def _buckets(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._requests:
+            limits = self.limits.get(model, self.default_limits)
+            self._requests[model] = _bucket(limits.rpm)
+            self._tokens[model] = _bucket(limits.tpm)
+        return self._requests[model], self._tokens[model]
+
+    async def acquire(
+        self,
+        model: str,
+        tokens: int = 0,
+        priority: Optional[str] = None,
+        session: Optional[str] = None,
+    ) -> Grant:
+        """Wait for permission to call `model` with about `tokens` tokens.
+
+        `priority` and `session` default to the surrounding call_context().
+        """
+        priority = priority or _priority.get() or self.default_priority
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+        session = session or _session.get() or "default"
+
+        waiter = _Waiter(model, tokens, priority, session, time.monotonic(),
+                         asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(session, deque()).append(waiter)
+        self._dispatch()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.release(waiter.future.result())
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self, grant: Grant, used_tokens: Optional[int] = None) -> None:
+        """Return the call's concurrency slot; `used_tokens` corrects the TPM charge."""
+        self.in_flight -= 1
+        if used_tokens is not None:
+            self._buckets(grant.model)[1].adjust(used_tokens - grant.tokens)
+        self._dispatch()
+
+    def report_quota_error(self, model: str) -> None:
+        """The model rejected a call for quota: stop granting it until the buckets refill."""
+        self.quota_errors += 1
+        now = time.monotonic()
+        requests, tokens = self._buckets(model)
+        requests.drain(now)
+        tokens.drain(now)
+
+    @asynccontextmanager
+    async def slot(self, model: str, tokens: int = 0, priority: Optional[str] = None, session: Optional[str] = None):
+        """`async with scheduler.slot(model, tokens) as grant:` around one model call."""
+        grant = await self.acquire(model, tokens, priority, session)
+        try:
+            yield grant
+        finally:
+            self.release(grant, grant.used_tokens)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        sessions = self._queues[waiter.priority]
+        queue = sessions.get(waiter.session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del sessions[waiter.session]
+
+    def _dispatch(self) -> None:
+        """Grant as many waiting calls as the pool and buckets allow."""
+        now = time.monotonic()
+        retry_in = None
+        for priority in PRIORITIES:
+            sessions = self._queues[priority]
+            blocked = set()
+            while sessions and len(blocked) < len(sessions):
+                if self.in_flight >= self.max_concurrency:
+                    return
+                session = next(s for s in sessions if s not in blocked)
+                waiter = sessions[session][0]
+                requests, tokens = self._buckets(waiter.model)
+                delay = max(requests.delay(1, now), tokens.delay(waiter.tokens, now))
+                if delay > 0:
+                    blocked.add(session)
+                    retry_in = delay if retry_in is None else min(retry_in, delay)
+                    continue
+                sessions[session].popleft()
+                if sessions[session]:
+                    sessions.move_to_end(session)
+                else:
+                    del sessions[session]
+                if waiter.future.done():
+                    continue
+                requests.take(1)
+                tokens.take(waiter.tokens)
+                self._grant(waiter, now)
+        if retry_in is not None:
+            self._wake_in(retry_in)
+
+    def _grant(self, waiter: _Waiter, now: float) -> None:
+        wait = now - waiter.enqueued
+        self.in_flight += 1
+        self.granted += 1
+        self._granted_by[waiter.priority] += 1
+        if wait > 0.001:
+            self.throttled += 1
+        self._waits[waiter.priority].append(wait)
+        self._max_wait[waiter.priority] = max(self._max_wait[waiter.priority], wait)
+        waiter.future.set_result(Grant(next(self._ids), waiter.model, waiter.tokens, waiter.priority,
+                                       waiter.session, wait))
+
+    def _wake_in(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer.when() <= when:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Queue and quota snapshot, including queue-wait percentiles per priority."""
+        now = time.monotonic()
+        waits = {}
+        for priority in PRIORITIES:
+            samples = list(self._waits[priority])
+            waits[priority] = {
+                "queued": sum(len(q) for q in self._queues[priority].values()),
+                "granted": self._granted_by[priority],
+                "wait_p50_s": _round(percentile(samples, 50)),
+                "wait_p95_s": _round(percentile(samples, 95)),
+                "wait_max_s": round(self._max_wait[priority], 4),
+            }
+        models = {}
+        for model, requests in self._requests.items():
+            tokens = self._tokens[model]
+            requests._refill(now)
+            tokens._refill(now)
+            models[model] = {
+                "requests_available": None if requests.tokens is None else round(requests.tokens, 1),
+                "tokens_available": None if tokens.tokens is None else round(tokens.tokens),
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "quota_errors": self.quota_errors,
+            "priorities": waits,
+            "models": models,
+        }
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from model_scheduler import ModelLimits, ModelScheduler, ScheduledLlm, call_context
+from model_scheduler.scheduler import DEFAULT_RPM, DEFAULT_TPM
+
+
+class StubLlm(BaseLlm):
+    """Answers at once, records the prompt of each call and reports `usage` tokens."""
+
+    model: str = "stub"
+    calls: list[str] = []
+    usage: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls.append(llm_request.contents[-1].parts[0].text)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text="ok")]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(total_token_count=self.usage or None),
+        )
+
+
+def request(text: str, max_output_tokens: int = 0) -> LlmRequest:
+    config = types.GenerateContentConfig(max_output_tokens=max_output_tokens or None)
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=text)])], config=config)
+
+
+async def call(llm: ScheduledLlm, text: str, max_output_tokens: int = 0) -> None:
+    async for _ in llm.generate_content_async(request(text, max_output_tokens)):
+        pass
+
+
+def start(llm: ScheduledLlm, text: str, **context) -> asyncio.Task:
+    # Tasks copy the context they are created in, like ParallelAgent branches
+    with call_context(**context):
+        return asyncio.create_task(call(llm, text))
+
+
+async def queue_behind_one_slot(scheduler: ModelScheduler, llm: ScheduledLlm, calls: list) -> None:
+    """Hold the only slot while `calls` queue up, then let them through."""
+    held = await scheduler.acquire("stub")
+    tasks = [start(llm, text, **context) for text, context in calls]
+    await asyncio.sleep(0)
+    scheduler.release(held)
+    await asyncio.gather(*tasks)
+
+
+def test_no_rate_limit_unless_configured():
+    if DEFAULT_RPM is not None or DEFAULT_TPM is not None:
+        pytest.skip("MODEL_SCHEDULER_RPM/TPM set in the environment")
+
+    async def scenario():
+        scheduler = ModelScheduler(max_concurrency=500)
+        grants = [await scheduler.acquire("gemini-2.0-flash", tokens=100_000) for _ in range(500)]
+        return scheduler.stats(), grants
+
+    stats, grants = asyncio.run(scenario())
+    assert len(grants) == 500
+    assert stats["throttled"] == 0
+    assert stats["models"]["gemini-2.0-flash"] == {"requests_available": None, "tokens_available": None}
+
+
+def test_interactive_calls_go_before_batch():
+    scheduler = ModelScheduler(max_concurrency=1)
+    llm = ScheduledLlm.wrap(StubLlm(calls=[]), scheduler)
+    asyncio.run(queue_behind_one_slot(scheduler, llm, [
+        ("batch-1", {"priority": "batch"}),
+        ("batch-2", {"priority": "batch"}),
+        ("chat-1", {"priority": "interactive"}),
+        ("chat-2", {"priority": "interactive"}),
+    ]))
+    assert llm.llm.calls == ["chat-1", "chat-2", "batch-1", "batch-2"]
+    priorities = scheduler.stats()["priorities"]
+    # The held slot was an interactive grant too
+    assert priorities["interactive"]["granted"] == 3 and priorities["batch"]["granted"] == 2
+
+
+def test_sessions_take_turns_within_a_priority():
+    scheduler = ModelScheduler(max_concurrency=1)
+    llm = ScheduledLlm.wrap(StubLlm(calls=[]), scheduler)
+    asyncio.run(queue_behind_one_slot(scheduler, llm, [
+        ("a1", {"session_id": "a"}),
+        ("a2", {"session_id": "a"}),
+        ("a3", {"session_id": "a"}),
+        ("b1", {"session_id": "b"}),
+        ("b2", {"session_id": "b"}),
+        ("c1", {"session_id": "c"}),
+    ]))
+    assert llm.llm.calls == ["a1", "b1", "c1", "a2", "b2", "a3"]
+
+
+def test_rpm_holds_calls_once_the_burst_is_spent():
+    async def scenario():
+        scheduler = ModelScheduler(limits={"stub": ModelLimits(rpm=3)})
+        llm = ScheduledLlm.wrap(StubLlm(calls=[]), scheduler)
+        for i in range(3):
+            await call(llm, f"call-{i}")
+        # The fourth request needs 20s of refill
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(call(llm, "call-3"), 0.2)
+        return scheduler.stats(), llm.llm.calls
+
+    stats, calls = asyncio.run(scenario())
+    assert calls == ["call-0", "call-1", "call-2"]
+    assert stats["granted"] == 3
+    # The cancelled call left the queue
+    assert stats["priorities"]["interactive"]["queued"] == 0
+
+
+def test_quota_error_pauses_the_model_until_it_refills():
+    async def scenario():
+        scheduler = ModelScheduler(limits={"stub": ModelLimits(rpm=600)})
+        llm = ScheduledLlm.wrap(StubLlm(calls=[]), scheduler)
+        scheduler.report_quota_error("stub")
+        # 600 RPM refills one request every 0.1s
+        await asyncio.gather(call(llm, "first"), call(llm, "second"))
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert stats["quota_errors"] == 1 and stats["throttled"] == 2
+    assert 0.15 <= stats["priorities"]["interactive"]["wait_max_s"] < 1
+
+
+def test_tpm_charges_the_estimate_and_refunds_unused_tokens():
+    async def scenario(usage):
+        # 1200 TPM refills 20 tokens a second
+        scheduler = ModelScheduler(limits={"stub": ModelLimits(tpm=1200)})
+        llm = ScheduledLlm.wrap(StubLlm(calls=[], usage=usage), scheduler)
+        await call(llm, "first", max_output_tokens=1000)
+        try:
+            await asyncio.wait_for(call(llm, "second", max_output_tokens=1000), 0.2)
+        except asyncio.TimeoutError:
+            pass
+        return llm.llm.calls
+
+    # The model reported the estimate: the second call needs ~40s of refill
+    assert asyncio.run(scenario(usage=1000)) == ["first"]
+    # It reported 100 tokens: the unused 900 are refunded and the second call goes at once
+    assert asyncio.run(scenario(usage=100)) == ["first", "second"]
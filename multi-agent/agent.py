@@ -1,30 +1,30 @@
 from google.adk.agents import Agent
+from google.adk.apps import App
+from .compaction import compaction_config
+from .fast_router import GREETING_PHRASES, TECHNICAL_KEYWORDS, fast_route
 from .sub_agents.greeting_agent.agent import agent as greeting_agent
 from .sub_agents.incident_analysis_agent.agent import agent as incident_analysis_agent
 
 
+# Keyword lists live in fast_router.py, which also matches them without the LLM
+_TECHNICAL_RULES = "\n".join(f"- {group}: {', '.join(words)}" for group, words in TECHNICAL_KEYWORDS.items())
+_GREETING_RULES = ", ".join(GREETING_PHRASES)
+
 # Externalized router instruction for better maintainability
-ROUTER_INSTRUCTION = """
+ROUTER_INSTRUCTION = f"""
 You are a routing agent. Read the user's message and delegate to the correct specialist agent.
 
 ROUTING RULES:
 
 RULE 1 - TECHNICAL ISSUES (use incident_analysis_agent):
 Check if the message contains ANY of these technical keywords:
-- Problems: issue, problem, error, failed, down, broken, not working, crash, outage, timeout
-- Connectivity: connect, connecting, connectivity, unable to, can't access, unreachable
-- Cloud/Infra: GKE, GCP, GCE, AWS, Azure, cloud, VM, server, cluster, container, pod, Kubernetes
-- Networking: VPC, subnet, network, firewall, DNS, routing, load balancer, ingress
-- Data: database, SQL, Redis, storage, backup, replication
-- DevOps: deployment, configuration, YAML, helm, terraform, CI/CD, pipeline
-- Environment: onprem, on-premise, hybrid, production, staging
-- Actions: troubleshoot, debug, fix, help with, investigate
+{_TECHNICAL_RULES}
 
 If ANY technical keyword is found → delegate to: incident_analysis_agent
 
 RULE 2 - GREETINGS (use greeting_agent):
 If the message is ONLY a casual greeting with NO technical content:
-- hello, hi, hey, good morning, good afternoon, good evening, how are you, what's up
+- {_GREETING_RULES}
 
 If ONLY greeting words → delegate to: greeting_agent
 
@@ -55,5 +55,16 @@ root_agent = Agent(
         incident_analysis_agent
     ],
     description="Routes user requests to greeting or incident analysis specialists based on message content",
-    instruction=ROUTER_INSTRUCTION
+    instruction=ROUTER_INSTRUCTION,
+    # Clear-cut messages are transferred by keyword match, skipping the model call
+    before_model_callback=fast_route
+)
+
+
+# Long incident sessions: old turns are replaced by a rolling summary (incident
+# reports kept verbatim), so the prompt stays bounded. See compaction.py.
+app = App(
+    name="multi-agent",
+    root_agent=root_agent,
+    events_compaction_config=compaction_config()
 )
@@ -0,0 +1,106 @@
+import json
+import os
+from typing import Optional
+
+from google.adk.apps.app import EventsCompactionConfig
+from google.adk.apps.llm_event_summarizer import LlmEventSummarizer
+from google.adk.events import Event
+from google.adk.models import Gemini
+from google.genai import types
+
+
+# Compaction triggers. Either one starts a compaction after a turn:
+# - the last prompt reached COMPACTION_TOKEN_THRESHOLD tokens; everything but
+#   the last COMPACTION_EVENT_RETENTION events is summarized
+# - COMPACTION_INTERVAL new turns happened since the last compaction; the
+#   summary overlaps the previous one by COMPACTION_OVERLAP turns
+COMPACTION_TOKEN_THRESHOLD = int(os.getenv("COMPACTION_TOKEN_THRESHOLD", "16000"))
+COMPACTION_EVENT_RETENTION = int(os.getenv("COMPACTION_EVENT_RETENTION", "6"))
+COMPACTION_INTERVAL = int(os.getenv("COMPACTION_INTERVAL", "20"))
+COMPACTION_OVERLAP = int(os.getenv("COMPACTION_OVERLAP", "2"))
+
+# Most recent incident reports carried verbatim through every summary.
+COMPACTION_KEEP_REPORTS = int(os.getenv("COMPACTION_KEEP_REPORTS", "3"))
+
+SUMMARIZER_MODEL = os.getenv("COMPACTION_MODEL", "gemini-2.0-flash")
+
+# Marks a verbatim report inside a summary, so the next compaction finds it again
+REPORT_HEADER = "Incident report (verbatim):\n"
+
+SUMMARY_PROMPT = """The following is an incident troubleshooting conversation between a user and an
+incident copilot (a router plus an incident analysis agent). It may start with a
+summary of earlier turns.
+
+Write a rolling summary that a support engineer could pick up from:
+- The systems, environments and symptoms the user reported
+- What was already checked or tried, and what was ruled out
+- Decisions made and open questions or pending actions
+- The user's name and preferred language if known
+
+Do not restate incident reports; they are kept separately. Be concise.
+
+{conversation_history}"""
+
+
+def _reports_in(events: list[Event]) -> list[str]:
+    """Incident reports in `events`, oldest first, as JSON strings."""
+    reports = []
+    for event in events:
+        if event.actions and event.actions.compaction:
+            content = event.actions.compaction.compacted_content
+            for part in (content.parts if content else None) or []:
+                if part.text and part.text.startswith(REPORT_HEADER):
+                    reports.append(part.text[len(REPORT_HEADER):])
+        elif event.actions and event.actions.state_delta.get("incident_report") is not None:
+            report = event.actions.state_delta["incident_report"]
+            reports.append(report if isinstance(report, str) else json.dumps(report, indent=2))
+    return reports
+
+
+class IncidentSummarizer(LlmEventSummarizer):
+    """Summarizes old turns, but keeps structured incident reports verbatim.
+
+    The LLM writes the narrative summary. The most recent
+    COMPACTION_KEEP_REPORTS incident reports found in the compacted range
+    (including those already carried by an earlier summary) are appended to
+    it unchanged, so later turns can still quote severity, components and
+    actions exactly. Older reports fall out, keeping the summary bounded.
+    """
+
+    def __init__(self, llm=None, keep_reports: int = COMPACTION_KEEP_REPORTS):
+        super().__init__(llm or Gemini(model=SUMMARIZER_MODEL), prompt_template=SUMMARY_PROMPT)
+        self.keep_reports = keep_reports
+
+    def _format_events_for_prompt(self, events: list[Event]) -> str:
+        # Reports are appended verbatim afterwards; don't pay to summarize them
+        return super()._format_events_for_prompt([
+            event for event in events
+            if not (event.actions and event.actions.state_delta.get("incident_report") is not None)
+        ])
+
+    async def maybe_summarize_events(self, *, events: list[Event]) -> Optional[Event]:
+        summary = await super().maybe_summarize_events(events=events)
+        if summary is None:
+            return None
+
+        reports = []
+        for report in reversed(_reports_in(events)):
+            if report not in reports:
+                reports.append(report)
+            if len(reports) == self.keep_reports:
+                break
+        content = summary.actions.compaction.compacted_content
+        content.parts = [part for part in content.parts if part.text and not part.thought]
+        content.parts += [types.Part(text=REPORT_HEADER + report) for report in reversed(reports)]
+        return summary
+
+
+def compaction_config(summarizer: Optional[LlmEventSummarizer] = None) -> EventsCompactionConfig:
+    """EventsCompactionConfig for the incident copilot app, from the settings above."""
+    return EventsCompactionConfig(
+        summarizer=summarizer or IncidentSummarizer(),
+        token_threshold=COMPACTION_TOKEN_THRESHOLD,
+        event_retention_size=COMPACTION_EVENT_RETENTION,
+        compaction_interval=COMPACTION_INTERVAL,
+        overlap_size=COMPACTION_OVERLAP,
+    )
@@ -0,0 +1,128 @@
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+
+# Routing rules shared by ROUTER_INSTRUCTION and the keyword fast path, so the
+# LLM router and the matcher can't drift apart.
+TECHNICAL_KEYWORDS = {
+    "Problems": ["issue", "problem", "error", "failed", "down", "broken", "not working", "crash", "outage", "timeout"],
+    "Connectivity": ["connect", "connecting", "connectivity", "unable to", "can't access", "unreachable"],
+    "Cloud/Infra": ["GKE", "GCP", "GCE", "AWS", "Azure", "cloud", "VM", "server", "cluster", "container", "pod",
+                    "Kubernetes"],
+    "Networking": ["VPC", "subnet", "network", "firewall", "DNS", "routing", "load balancer", "ingress"],
+    "Data": ["database", "SQL", "Redis", "storage", "backup", "replication"],
+    "DevOps": ["deployment", "configuration", "YAML", "helm", "terraform", "CI/CD", "pipeline"],
+    "Environment": ["onprem", "on-premise", "hybrid", "production", "staging"],
+    "Actions": ["troubleshoot", "debug", "fix", "help with", "investigate"],
+}
+
+GREETING_PHRASES = [
+    "hello", "hi", "hey", "good morning", "good afternoon", "good evening", "how are you", "what's up",
+]
+
+# Words that may accompany a greeting without making it something else
+_GREETING_FILLER = ["there", "all", "everyone", "folks", "team", "friend", "again", "bot", "copilot"]
+
+# Set ROUTER_FAST_PATH=0 to send every message through the LLM router
+FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH", "1") != "0"
+
+INCIDENT_AGENT = "incident_analysis_agent"
+GREETING_AGENT = "greeting_agent"
+
+
+def _alternation(phrases: list[str]) -> str:
+    # Longest first, so "connectivity" wins over "connect"; spaces match any whitespace
+    ordered = sorted(set(phrases), key=len, reverse=True)
+    return "|".join(re.escape(p).replace(r"\ ", r"\s+").replace("'", "['’]?") for p in ordered)
+
+
+class KeywordRouter:
+    """Routes clear-cut messages with one compiled regex per rule.
+
+    - Any technical keyword (RULE 1)            -> incident_analysis_agent
+    - Nothing but greetings and filler (RULE 2) -> greeting_agent
+    - Anything else                             -> None (ask the LLM router)
+
+    Matching is case-insensitive on word boundaries, so "pods" and "servers"
+    match but "download" doesn't match "down".
+    """
+
+    def __init__(self, technical: list[str], greetings: list[str], filler: list[str] = _GREETING_FILLER):
+        self._technical = re.compile(rf"(?<!\w)(?:{_alternation(technical)})(?:e?s)?(?!\w)", re.IGNORECASE)
+        # A whole message made of greetings, filler, punctuation and emoji
+        self._greeting_only = re.compile(
+            rf"^(?:[\W_]*(?:{_alternation(greetings + filler)})(?!\w))+[\W_]*$", re.IGNORECASE
+        )
+        self._has_greeting = re.compile(rf"(?<!\w)(?:{_alternation(greetings)})(?!\w)", re.IGNORECASE)
+
+    def route(self, text: str) -> Optional[str]:
+        """Return the agent name for a clear-cut message, or None if ambiguous."""
+        if self._technical.search(text):
+            return INCIDENT_AGENT
+        if self._greeting_only.match(text) and self._has_greeting.search(text):
+            return GREETING_AGENT
+        return None
+
+
+keyword_router = KeywordRouter(
+    [keyword for keywords in TECHNICAL_KEYWORDS.values() for keyword in keywords],
+    GREETING_PHRASES,
+)
+
+# How often each path was taken: "fast:<agent>" or "llm"
+route_counts: Counter = Counter()
+
+
+def route_stats() -> dict:
+    """Counts per routing path plus the share of messages that skipped the LLM router."""
+    total = sum(route_counts.values())
+    fast = total - route_counts["llm"]
+    return {
+        "total": total,
+        "paths": dict(route_counts),
+        "fast_path_ratio": round(fast / total, 3) if total else None,
+    }
+
+
+def _user_text(llm_request: LlmRequest) -> Optional[str]:
+    """The user's message if it is what the router is about to answer."""
+    if not llm_request.contents:
+        return None
+    last = llm_request.contents[-1]
+    if last.role != "user" or not last.parts or any(part.function_response for part in last.parts):
+        return None
+    return " ".join(part.text for part in last.parts if part.text)
+
+
+def fast_route(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback for router_agent.
+
+    For a clear-cut message, answers the router's model call itself with a
+    transfer_to_agent call, so the specialist starts without an LLM round
+    trip. Returns None (call the model as usual) for anything ambiguous.
+    The chosen path is recorded in route_counts and in the event's
+    custom_metadata["route"].
+    """
+    text = _user_text(llm_request)
+    if text is None:
+        return None
+    target = keyword_router.route(text) if FAST_PATH_ENABLED else None
+    if target is None:
+        route_counts["llm"] += 1
+        return None
+    route_counts[f"fast:{target}"] += 1
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[types.Part(function_call=types.FunctionCall(
+                name="transfer_to_agent", args={"agent_name": target}
+            ))],
+        ),
+        custom_metadata={"route": f"fast:{target}"},
+    )
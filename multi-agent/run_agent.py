@@ -1,40 +1,91 @@
+import os
+import sys
+import json
 import uuid
+import time
 import asyncio
+import argparse
+from typing import Optional
 from dotenv import load_dotenv
 
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types
 
+# Shared helpers from the repository root (run with the root on PYTHONPATH)
+from latency_stats import percentile
+from model_scheduler import call_context, get_scheduler, install_scheduler
+from session_store import SQLiteSessionService
+from terminal_runner import STREAMING_RUN_CONFIG, event_text, stream_turn
+
 try:
-    from .agent import root_agent
+    from .agent import app
+    from .fast_router import route_stats
 except ImportError:
-    from agent import root_agent
+    from agent import app
+    from fast_router import route_stats
 
 
 load_dotenv()
 
+APP_NAME = "Incident Copilot"
 
-async def main():
-    session_service = InMemorySessionService()
+# Sessions survive restarts in this file (override with --session-db)
+SESSION_DB = os.getenv("SESSION_DB", "sessions.db")
 
-    APP_NAME = "Incident Copilot"
-    USER_ID = "user_1"
-    SESSION_ID = str(uuid.uuid4())
 
-    # Create session with initial state
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        state={}
-    )
+def _event_route(event) -> Optional[str]:
+    # Set by the router's keyword fast path ("fast:<agent>")
+    return (event.custom_metadata or {}).get("route")
+
+
+async def stream_routed_turn(runner: Runner, user_id: str, session_id: str, message: types.Content) -> dict:
+    """Run one turn with stream_turn and report how it was routed.
+
+    Returns:
+        stream_turn's timing dict plus "route" ("fast:<agent>" if the
+        keyword fast path routed the turn, else "llm").
+    """
+    routes = []
+
+    def record_route(event) -> None:
+        route = _event_route(event)
+        if route:
+            routes.append(route)
+
+    timing = await stream_turn(runner, user_id, session_id, message, on_event=record_route)
+    timing["route"] = routes[-1] if routes else "llm"
+    return timing
+
+
+async def main(session_db: str = SESSION_DB, resume: Optional[str] = None):
+    session_service = SQLiteSessionService(session_db)
 
-    print(f"Session created: {session.id}")
+    USER_ID = "user_1"
+    SESSION_ID = resume or str(uuid.uuid4())
+
+    session = None
+    if resume:
+        session = await session_service.get_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=SESSION_ID
+        )
+    if session is not None:
+        print(f"Session resumed: {session.id} ({len(session.events)} events)")
+    else:
+        # Create session with initial state
+        session = await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=SESSION_ID,
+            state={}
+        )
+        print(f"Session created: {session.id}")
     print("Type 'exit' to quit\n")
 
     runner = Runner(
-        agent=root_agent,
+        app=app,
         app_name=APP_NAME,
         session_service=session_service,
     )
@@ -55,23 +106,15 @@ async def main():
                 parts=[types.Part(text=user_input)]
             )
 
-            response_received = False
-            for event in runner.run(
-                user_id=USER_ID,
-                session_id=SESSION_ID,
-                new_message=message,
-            ):
-                if event.is_final_response():
-                    if event.content and event.content.parts:
-                        print(f"Agent: {event.content.parts[0].text}")
-                        response_received = True
-                    else:
-                        print("Agent: [No response content]")
-                        response_received = True
-
-            if not response_received:
+            with call_context(session_id=SESSION_ID, priority="interactive"):
+                timing = await stream_routed_turn(runner, USER_ID, SESSION_ID, message)
+            if not timing["responded"]:
                 print("Agent: [No response generated]")
 
+            # Per-turn latency: time to first token vs. the whole turn
+            ttft = "-" if timing["ttft_s"] is None else f"{timing['ttft_s']:.2f}s"
+            print(f"[first token {ttft} | total {timing['total_s']:.2f}s | route {timing['route']}]\n")
+
         except KeyboardInterrupt:
             print("\nInterrupted. Goodbye!")
             break
@@ -79,6 +122,196 @@ async def main():
             print(f"Error: {type(e).__name__}: {e}")
             print("Please try again or type 'exit' to quit.")
 
+    await session_service.close()
+
+
+def load_requests(path: str) -> list[dict]:
+    """Read batch requests from a JSONL file.
+
+    Each line is {"prompt": ...} with optional "id", "user_id" and
+    "session_id". Lines sharing a session_id are replayed in file order in
+    one session; lines without one each get a fresh session.
+    """
+    requests = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if not isinstance(request, dict) or not str(request.get("prompt", "")).strip():
+                raise ValueError(f"{path}:{line_no}: expected an object with a non-empty \"prompt\"")
+            request.setdefault("id", line_no)
+            request.setdefault("user_id", "batch_user")
+            request.setdefault("session_id", f"batch-{uuid.uuid4()}")
+            requests.append(request)
+    return requests
+
+
+async def run_batch_request(runner: Runner, request: dict) -> dict:
+    """Run one batch request and return its result record (never raises)."""
+    message = types.Content(role="user", parts=[types.Part(text=request["prompt"])])
+    start = time.perf_counter()
+    first_token_at = None
+    events = 0
+    responses = []
+    route = "llm"
+    error = None
+    try:
+        with call_context(session_id=request["session_id"], priority="batch"):
+            async for event in runner.run_async(
+                user_id=request["user_id"],
+                session_id=request["session_id"],
+                new_message=message,
+                run_config=STREAMING_RUN_CONFIG,
+            ):
+                events += 1
+                route = _event_route(event) or route
+                text = event_text(event)
+                if text and first_token_at is None:
+                    first_token_at = time.perf_counter()
+                if not event.partial and event.is_final_response() and text:
+                    responses.append(text)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    latency = time.perf_counter() - start
+    return {
+        "id": request["id"],
+        "session_id": request["session_id"],
+        "prompt": request["prompt"],
+        "response": "\n".join(responses) or None,
+        "latency_s": round(latency, 4),
+        "ttft_s": None if first_token_at is None else round(first_token_at - start, 4),
+        "events": events,
+        "route": route,
+        "error": error,
+    }
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = 8, session_db: str = SESSION_DB) -> dict:
+    """Replay prompts from a JSONL file across many sessions concurrently.
+
+    At most `concurrency` turns run at once. Results are written to
+    `output_path` as JSONL in completion order, one record per request.
+
+    Returns:
+        dict with request/error counts, wall time, throughput and latency
+        percentiles.
+    """
+    requests = load_requests(input_path)
+    session_service = SQLiteSessionService(session_db)
+    runner = Runner(
+        app=app,
+        app_name=APP_NAME,
+        session_service=session_service,
+    )
+
+    # Requests in the same session run in order; sessions run in parallel
+    sessions: dict[tuple[str, str], list[dict]] = {}
+    for request in requests:
+        sessions.setdefault((request["user_id"], request["session_id"]), []).append(request)
+    slots = asyncio.Semaphore(concurrency)
+    results = []
+
+    with open(output_path, "w") as out:
+        async def replay(user_id: str, session_id: str, session_requests: list[dict]) -> None:
+            # Replaying into an existing session continues it
+            existing = await session_service.get_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id,
+                config=GetSessionConfig(num_recent_events=0),
+            )
+            if existing is None:
+                await session_service.create_session(
+                    app_name=APP_NAME, user_id=user_id, session_id=session_id, state={}
+                )
+            for request in session_requests:
+                async with slots:
+                    result = await run_batch_request(runner, request)
+                results.append(result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            replay(user_id, session_id, session_requests)
+            for (user_id, session_id), session_requests in sessions.items()
+        ))
+        wall = time.perf_counter() - start
+    await session_service.close()
+
+    latencies = [r["latency_s"] for r in results if r["error"] is None]
+    ttfts = [r["ttft_s"] for r in results if r["ttft_s"] is not None]
+    routes = {}
+    for r in results:
+        if r["error"] is None:
+            routes.setdefault(r["route"], []).append(r["latency_s"])
+    return {
+        "requests": len(results),
+        "errors": sum(1 for r in results if r["error"] is not None),
+        "sessions": len(sessions),
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(results) / wall, 2) if wall > 0 else None,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "latency_p99_s": percentile(latencies, 99),
+        "ttft_p50_s": percentile(ttfts, 50),
+        "ttft_p95_s": percentile(ttfts, 95),
+        "routes": {
+            route: {
+                "requests": len(values),
+                "latency_p50_s": percentile(values, 50),
+                "latency_p95_s": percentile(values, 95),
+            }
+            for route, values in sorted(routes.items())
+        },
+        "router": route_stats(),
+        "model_calls": get_scheduler().stats(),
+    }
+
+
+def print_batch_summary(summary: dict) -> None:
+    def seconds(value):
+        return "-" if value is None else f"{value:.3f}s"
+
+    print(f"Requests:   {summary['requests']} ({summary['errors']} errors) "
+          f"in {summary['sessions']} sessions, concurrency {summary['concurrency']}")
+    print(f"Wall time:  {summary['wall_s']:.2f}s")
+    print(f"Throughput: {summary['throughput_rps']} req/s")
+    print(f"Latency:    p50 {seconds(summary['latency_p50_s'])} | "
+          f"p95 {seconds(summary['latency_p95_s'])} | p99 {seconds(summary['latency_p99_s'])}")
+    print(f"First token: p50 {seconds(summary['ttft_p50_s'])} | p95 {seconds(summary['ttft_p95_s'])}")
+    for route, stats in summary["routes"].items():
+        print(f"Route {route}: {stats['requests']} req | p50 {seconds(stats['latency_p50_s'])} | "
+              f"p95 {seconds(stats['latency_p95_s'])}")
+    ratio = summary["router"]["fast_path_ratio"]
+    if ratio is not None:
+        print(f"Fast path:  {ratio:.0%} of router decisions skipped the LLM")
+    calls = summary["model_calls"]
+    waits = calls["priorities"]["batch"]
+    print(f"Model queue: p50 {seconds(waits['wait_p50_s'])} | p95 {seconds(waits['wait_p95_s'])} | "
+          f"max {seconds(waits['wait_max_s'])} ({calls['granted']} calls, {calls['throttled']} queued, "
+          f"{calls['quota_errors']} quota errors)")
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Incident Copilot runner")
+    parser.add_argument("--batch", metavar="PROMPTS.jsonl",
+                        help="Run prompts from a JSONL file instead of interactively")
+    parser.add_argument("--output", metavar="RESULTS.jsonl", default="results.jsonl",
+                        help="Where to write batch results (default: results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Maximum turns running at once in batch mode (default: 8)")
+    parser.add_argument("--session-db", default=SESSION_DB,
+                        help=f"SQLite file for sessions (default: {SESSION_DB})")
+    parser.add_argument("--resume", metavar="SESSION_ID",
+                        help="Continue an earlier interactive session")
+    args = parser.parse_args()
+
+    # Every Gemini call in this process shares one rate-limited, prioritized queue
+    install_scheduler()
+
+    if args.batch:
+        summary = asyncio.run(run_batch(args.batch, args.output, max(1, args.concurrency), args.session_db))
+        print_batch_summary(summary)
+        sys.exit(1 if summary["errors"] else 0)
+    asyncio.run(main(args.session_db, args.resume))
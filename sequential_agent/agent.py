@@ -1,10 +1,34 @@
+import os
+
 from google.adk.agents import SequentialAgent
+from .cache import remember_response, serve_from_cache
+from .speculative import SpeculativeCommandAgent
 from .sub_agents.intent import agent as intent
 from .sub_agents.command_gen import agent as cmd
-from .sub_agents.formatter import agent as fmt
+from .sub_agents.formatter import agent as fmt, local_agent as local_fmt
+
+# Format the command locally from tool_type/raw_command instead of a third model call
+LOCAL_FORMAT = os.getenv("COMMAND_HELPER_LOCAL_FORMAT", "1") != "0"
+
+# Start generating the command for the keyword-guessed tool type while the
+# intent agent classifies; keep it if the classification agrees
+SPECULATE = os.getenv("COMMAND_HELPER_SPECULATE", "1") != "0"
+
+if SPECULATE:
+    steps = [SpeculativeCommandAgent(
+        name="intent_and_command",
+        sub_agents=[intent, cmd],
+        description="Classifies the tool type while speculatively generating the command",
+    )]
+else:
+    steps = [intent, cmd]
+steps.append(local_fmt if LOCAL_FORMAT else fmt)
 
 root_agent = SequentialAgent(
     name="command_helper_agent",
-    sub_agents=[intent, cmd, fmt],
-    description="Generates properly formatted command-line commands through a 3-step process: classify tool, generate command, format output"
+    sub_agents=steps,
+    description="Generates properly formatted command-line commands through a 3-step process: classify tool, generate command, format output",
+    # Repeated and near-duplicate requests are answered from a local cache
+    before_agent_callback=serve_from_cache,
+    after_agent_callback=remember_response
 )
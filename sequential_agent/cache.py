@@ -0,0 +1,335 @@
+import hashlib
+import os
+import random
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .sub_agents.formatter import format_command
+from .sub_agents.intent import TOOL_TYPES, normalize_tool_type
+
+
+# Cached requests kept; the least recently used is evicted first.
+CACHE_SIZE = int(os.getenv("COMMAND_CACHE_SIZE", "512"))
+
+# Minimum Jaccard similarity (word uni- and bigrams of the normalized
+# request) for a near-duplicate to be served from the cache.
+SIMILARITY_THRESHOLD = float(os.getenv("COMMAND_CACHE_THRESHOLD", "0.8"))
+
+# Set COMMAND_CACHE=0 to always run the pipeline
+CACHE_ENABLED = os.getenv("COMMAND_CACHE", "1") != "0"
+
+# MinHash signature size and LSH banding (BANDS * ROWS == NUM_PERM)
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Words naming a resource, and the slot kind the following identifier gets
+IDENTIFIER_KINDS = {
+    "namespace": "namespace", "ns": "namespace",
+    "project": "project",
+    "cluster": "cluster",
+    "pod": "pod",
+    "deployment": "deployment", "deploy": "deployment",
+    "service": "service", "svc": "service",
+    "node": "node",
+    "zone": "zone",
+    "region": "region",
+    "bucket": "bucket",
+    "instance": "instance", "vm": "instance",
+    "container": "container",
+    "image": "image",
+    "file": "file", "directory": "file", "folder": "file", "dir": "file",
+    "user": "user",
+    "port": "port",
+    "named": "name", "called": "name",
+}
+
+# Kinds whose following word is always a name ("namespace production"), not
+# just identifier-looking tokens ("cluster prod-1" but not "cluster credentials")
+_ALWAYS_NAMES = {"namespace", "project", "bucket", "zone", "region", "name", "port"}
+
+# Words that are never identifiers, and are dropped when comparing requests
+STOPWORDS = {
+    "a", "an", "the", "please", "can", "could", "would", "you", "i", "me", "my", "how", "do", "to", "is", "what",
+    "want", "need", "give", "command", "just", "for", "in", "on", "of", "from", "with", "and", "or", "this", "that",
+}
+_NOT_NAMES = STOPWORDS | {"all", "every", "each", "its", "their", "credentials", "logs", "status", "details",
+                          "info", "names", "using", "by", "which", "where", "running", "list"}
+
+_TOKEN = r"""["'`]?([A-Za-z0-9/~*][\w./:@*~-]*)["'`]?"""
+_KIND_WORDS = "|".join(sorted(IDENTIFIER_KINDS, key=len, reverse=True))
+_after_kind = re.compile(rf"(?<!\w)({_KIND_WORDS})s?\s+((?:named|called)\s+)?{_TOKEN}", re.IGNORECASE)
+_before_kind = re.compile(rf"(?<![\w-])the\s+{_TOKEN}\s+({_KIND_WORDS})(?!\w)", re.IGNORECASE)
+_quoted = re.compile(r"""["'`]([^"'`\s]+)["'`]""")
+# Tokens that look like names on their own: paths, globs, hostnames, my-app-2, 8080
+_identifier_like = re.compile(r"(?<![\w./-])((?=[\w./:~*-]*[\d./_:~*-])[\w./:~*-]*\w[\w./:~*-]*)(?![\w-])")
+_word = re.compile(r"<\w+>|[a-z0-9]+")
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+
+def _looks_like_identifier(value: str) -> bool:
+    return bool(re.search(r"[\d./_:~*-]", value))
+
+
+def mask_identifiers(text: str) -> tuple[str, list[tuple[str, str]]]:
+    """Replace resource names in `text` with <kind> placeholders.
+
+    Returns:
+        (masked text, [(kind, value), ...] in order of appearance).
+    """
+    spans = []
+
+    def claim(start: int, end: int, kind: str, value: str) -> None:
+        if value.lower() in _NOT_NAMES or value.lower() in IDENTIFIER_KINDS:
+            return
+        if any(start < s_end and s_start < end for s_start, s_end, _, _ in spans):
+            return
+        spans.append((start, end, kind, value))
+
+    for match in _quoted.finditer(text):
+        claim(match.start(1), match.end(1), "name", match.group(1))
+    for match in _after_kind.finditer(text):
+        kind, value = IDENTIFIER_KINDS[match.group(1).lower()], match.group(3)
+        # "pod named api": "named" makes any word a name
+        if kind in _ALWAYS_NAMES or match.group(2) or _looks_like_identifier(value):
+            claim(match.start(3), match.end(3), kind, value)
+    for match in _before_kind.finditer(text):
+        kind, value = IDENTIFIER_KINDS[match.group(2).lower()], match.group(1)
+        if kind in _ALWAYS_NAMES or _looks_like_identifier(value):
+            claim(match.start(1), match.end(1), kind, value)
+    for match in _identifier_like.finditer(text):
+        value = match.group(1)
+        claim(match.start(1), match.end(1), "number" if value.isdigit() else "id", value)
+
+    spans.sort()
+    masked, pos = [], 0
+    for start, end, kind, _ in spans:
+        masked.append(text[pos:start])
+        masked.append(f"<{kind}>")
+        pos = end
+    masked.append(text[pos:])
+    return "".join(masked), [(kind, value) for _, _, kind, value in spans]
+
+
+def normalize(text: str) -> tuple[str, list[tuple[str, str]]]:
+    """Lowercased, masked, stopword-free request plus the masked identifiers."""
+    masked, slots = mask_identifiers(text)
+    words = [word for word in _word.findall(masked.lower()) if word not in STOPWORDS]
+    return " ".join(words), slots
+
+
+def _shingles(normalized: str) -> frozenset:
+    words = normalized.split()
+    return frozenset(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def _minhash(shingles: frozenset) -> tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    if not hashes:
+        return (0,) * NUM_PERM
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _bands(signature: tuple[int, ...]) -> list[tuple]:
+    return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def _placeholder(index: int) -> str:
+    return f"\x00{index}\x00"
+
+
+def _value_pattern(value: str) -> re.Pattern:
+    # The value as a whole token, so "web" doesn't match inside "web-2"
+    return re.compile(rf"(?<![\w.-]){re.escape(value)}(?![\w-]|\.\w)")
+
+
+@dataclass
+class CacheEntry:
+    normalized: str
+    kinds: tuple[str, ...]
+    shingles: frozenset
+    signature: tuple[int, ...]
+    tool_type: str
+    command_template: str
+    words: frozenset = field(default_factory=frozenset)
+
+
+class CommandCache:
+    """Near-duplicate cache from requests to (tool_type, raw_command).
+
+    Requests are normalized (lowercased, identifiers such as namespace and
+    project names masked as <namespace>/<project>, filler words dropped)
+    and indexed by MinHash LSH over word uni- and bigrams. A lookup returns
+    the command of the most similar cached request whose masked
+    identifiers have the same kinds in the same order, with the new
+    request's identifiers put back in. Everything runs in-process.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE, threshold: float = SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._exact: dict[tuple[str, tuple[str, ...]], int] = {}
+        self._buckets: dict[tuple, set[int]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, request: str) -> Optional[dict]:
+        """Return {"tool_type", "raw_command", "similarity"} for a cached near-duplicate, or None."""
+        normalized, slots = normalize(request)
+        kinds = tuple(kind for kind, _ in slots)
+
+        entry_id = self._exact.get((normalized, kinds))
+        similarity = 1.0
+        if entry_id is None:
+            entry_id, similarity = self._most_similar(normalized, kinds)
+        if entry_id is None:
+            self.misses += 1
+            return None
+
+        entry = self._entries[entry_id]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        if similarity < 1.0:
+            self.near_hits += 1
+        command = entry.command_template
+        for index, (_, value) in enumerate(slots):
+            command = command.replace(_placeholder(index), value)
+        return {"tool_type": entry.tool_type, "raw_command": command, "similarity": round(similarity, 3)}
+
+    def _most_similar(self, normalized: str, kinds: tuple[str, ...]) -> tuple[Optional[int], float]:
+        shingles = _shingles(normalized)
+        candidates = set()
+        for band in _bands(_minhash(shingles)):
+            candidates |= self._buckets.get(band, set())
+
+        words = set(normalized.split())
+        best_id, best = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.kinds != kinds:
+                continue
+            similarity = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+            # Words that differ must be phrasing, not arguments of the cached command
+            if similarity < self.threshold or (words ^ entry.words) & _command_words(entry.command_template):
+                continue
+            if similarity > best:
+                best_id, best = entry_id, similarity
+        return best_id, best
+
+    def store(self, request: str, tool_type: str, raw_command: str) -> None:
+        """Cache the pipeline's result for `request`."""
+        tool_type = normalize_tool_type(tool_type)
+        if tool_type not in TOOL_TYPES or not str(raw_command or "").strip():
+            return
+        normalized, slots = normalize(request)
+        kinds = tuple(kind for kind, _ in slots)
+        template = raw_command
+        # Longest values first, so "web" doesn't claim part of "web-frontend"
+        for index, (_, value) in sorted(enumerate(slots), key=lambda item: -len(item[1][1])):
+            template = _value_pattern(value).sub(_placeholder(index), template)
+
+        old_id = self._exact.get((normalized, kinds))
+        if old_id is not None:
+            self._remove(old_id)
+        shingles = _shingles(normalized)
+        entry = CacheEntry(
+            normalized=normalized,
+            kinds=kinds,
+            shingles=shingles,
+            signature=_minhash(shingles),
+            tool_type=tool_type,
+            command_template=template,
+            words=frozenset(normalized.split()),
+        )
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._exact[(normalized, kinds)] = entry_id
+        for band in _bands(entry.signature):
+            self._buckets.setdefault(band, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        del self._exact[(entry.normalized, entry.kinds)]
+        for band in _bands(entry.signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._exact.clear()
+        self._buckets.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def _command_words(command_template: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", command_template.lower()))
+
+
+command_cache = CommandCache()
+
+
+def _request_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    return " ".join(part.text for part in (content.parts if content else None) or [] if part.text)
+
+
+def serve_from_cache(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback for command_helper_agent.
+
+    On a cache hit, sets tool_type/raw_command in state and returns the
+    formatted command, which skips the whole pipeline.
+    """
+    if not CACHE_ENABLED:
+        return None
+    cached = command_cache.lookup(_request_text(callback_context))
+    if cached is None:
+        return None
+    callback_context.state["tool_type"] = cached["tool_type"]
+    callback_context.state["raw_command"] = cached["raw_command"]
+    return types.Content(
+        role="model",
+        parts=[types.Part(text=format_command(cached["tool_type"], cached["raw_command"]))],
+    )
+
+
+def remember_response(callback_context: CallbackContext) -> None:
+    """after_agent_callback for command_helper_agent: cache the pipeline's result."""
+    if not CACHE_ENABLED:
+        return None
+    state = callback_context.state
+    command_cache.store(_request_text(callback_context), state.get("tool_type", ""), state.get("raw_command", ""))
+    return None
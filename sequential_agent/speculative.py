@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from .sub_agents.intent import guess_tool_type, normalize_tool_type
+
+
+logger = logging.getLogger(__name__)
+
+# "hit" when the speculative command was kept, "miss" when it was thrown away
+speculation_counts: Counter = Counter()
+
+
+class SpeculativeCommandAgent(BaseAgent):
+    """Runs intent classification and command generation at the same time.
+
+    sub_agents must be [intent_agent, command_generator]. While intent_agent
+    classifies the request, command_generator already runs for the tool type
+    guessed from keywords (guess_tool_type). If the classification agrees,
+    the speculative command is kept, so both steps cost one model round trip.
+    Otherwise it is discarded and command_generator runs again with the
+    classified tool type, the same as the plain sequential pipeline.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        intent_agent, command_generator = self.sub_agents
+        user_text = " ".join(
+            part.text for part in (ctx.user_content.parts if ctx.user_content else None) or [] if part.text
+        )
+        guess = guess_tool_type(user_text)
+
+        # The speculative run sees a copy of the session with the guessed
+        # tool_type; its events are held back until the guess is confirmed.
+        speculative_ctx = ctx.model_copy(update={
+            "session": ctx.session.model_copy(update={
+                "state": {**ctx.session.state, "tool_type": guess},
+                "events": list(ctx.session.events),
+            }),
+        })
+        speculative_events: list[Event] = []
+
+        async def speculate() -> bool:
+            try:
+                async for event in command_generator.run_async(speculative_ctx):
+                    speculative_events.append(event)
+                return True
+            except Exception as e:
+                # Not fatal: the command is generated again after classification
+                logger.warning("Speculative command generation failed: %s", e)
+                return False
+
+        speculation = asyncio.create_task(speculate())
+        try:
+            async for event in intent_agent.run_async(ctx):
+                yield event
+
+            tool_type = normalize_tool_type(ctx.session.state.get("tool_type"))
+            if tool_type == guess and await speculation:
+                speculation_counts["hit"] += 1
+                for event in speculative_events:
+                    yield event
+                return
+        finally:
+            if not speculation.done():
+                speculation.cancel()
+
+        speculation_counts["miss"] += 1
+        logger.info("Speculative %s command discarded; intent_agent chose %r", guess, tool_type)
+        async for event in command_generator.run_async(ctx):
+            yield event
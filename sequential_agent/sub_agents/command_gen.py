@@ -14,9 +14,11 @@ Requirements:
 - Use best practices and safe flags where applicable
 - For complex tasks, provide multiple commands separated by newlines
 - Include commonly used flags (e.g., -l for ls, -f for kubectl, --format for gcloud)
-- NO explanations, NO markdown, NO prose - ONLY the command(s)
+- Start with ONE comment line briefly describing what the command(s) do
+- NO other explanations, NO markdown, NO prose - ONLY the comment and the command(s)
 
 Output format:
+# Short description
 command1
 command2
 """
@@ -1,4 +1,17 @@
-from google.adk.agents import Agent
+from typing import AsyncGenerator
+
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+
+# Code block language per tool type
+LANGUAGE_TAGS = {
+    "linux": "bash",
+    "kubectl": "bash",
+    "gcloud": "bash",
+    "docker": "bash",
+}
 
 agent = Agent(
     name="formatter",
@@ -15,6 +28,7 @@ Use the tool type ({tool_type}) to determine the language tag:
 
 Format:
 1. Brief one-line description explaining what the command does
+   (use the leading # comment from the previous step if there is one)
 2. Code block with the command(s)
 
 Example:
@@ -24,3 +38,54 @@ kubectl get pods
 ```
 """
 )
+
+
+def format_command(tool_type: str, raw_command: str) -> str:
+    """Render raw_command the way the formatter agent would, without a model call.
+
+    The leading "# ..." comment written by command_generator becomes the
+    description line; any markdown fences the model added are dropped.
+    """
+    lines = [line.rstrip() for line in str(raw_command or "").strip().splitlines()]
+    lines = [line for line in lines if not line.lstrip().startswith("```")]
+    description = []
+    while lines and (not lines[0].strip() or lines[0].lstrip().startswith("#")):
+        comment = lines.pop(0).lstrip("# ").strip()
+        if comment:
+            description.append(comment)
+    while lines and not lines[-1].strip():
+        lines.pop()
+
+    tool_type = str(tool_type or "").strip().lower()
+    if description:
+        title = " ".join(description).rstrip(".:")
+    else:
+        title = f"{tool_type or 'Shell'} command{'s' if len(lines) > 1 else ''}"
+    title = title[:1].upper() + title[1:]
+    language = LANGUAGE_TAGS.get(tool_type, "bash")
+    return f"{title}:\n```{language}\n" + "\n".join(lines) + "\n```"
+
+
+class LocalFormatter(BaseAgent):
+    """Drop-in replacement for the formatter agent that formats locally.
+
+    Reads tool_type and raw_command from state and emits the same
+    description + code block the LLM formatter produces, saving a model
+    call per request.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        text = format_command(state.get("tool_type", ""), state.get("raw_command", ""))
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+        )
+
+
+local_agent = LocalFormatter(
+    name="formatter",
+    description="Formats the generated command in a markdown code block without a model call",
+)
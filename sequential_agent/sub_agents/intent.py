@@ -1,5 +1,47 @@
+import re
+
 from google.adk.agents import Agent
 
+TOOL_TYPES = ["linux", "kubectl", "gcloud", "docker"]
+
+# Words that point at a tool type without asking the model. Used only to pick
+# which command to start generating speculatively; intent_agent still decides.
+TOOL_HINTS = {
+    "kubectl": ["kubectl", "kubernetes", "k8s", "pod", "deployment", "namespace", "service", "ingress", "configmap",
+                "secret", "daemonset", "statefulset", "replicaset", "node", "helm", "rollout", "cronjob", "gke"],
+    "gcloud": ["gcloud", "gcp", "google cloud", "gce", "compute engine", "bucket", "gcs", "project", "iam",
+               "cloud run", "cloud sql", "vm instance", "instance", "firewall rule", "zone", "region"],
+    "docker": ["docker", "container", "image", "dockerfile", "compose", "registry", "volume", "tag"],
+    "linux": ["file", "directory", "folder", "process", "disk", "memory", "cpu", "permission", "chmod", "grep",
+              "find", "port", "log", "user", "cron", "archive", "tar", "ssh", "bash", "shell"],
+}
+
+_hint_patterns = {
+    tool_type: re.compile(
+        r"(?<!\w)(?:" + "|".join(re.escape(hint).replace(r"\ ", r"\s+") for hint in hints) + r")s?(?!\w)",
+        re.IGNORECASE,
+    )
+    for tool_type, hints in TOOL_HINTS.items()
+}
+
+
+def guess_tool_type(text: str) -> str:
+    """Most likely tool type for `text` by keyword count.
+
+    Ties go to the more specific tool (kubectl, gcloud, docker before linux);
+    with no hints at all, "linux" is the broadest guess.
+    """
+    scores = {tool_type: len(pattern.findall(text)) for tool_type, pattern in _hint_patterns.items()}
+    best = max(TOOL_TYPES[1:] + TOOL_TYPES[:1], key=lambda tool_type: scores[tool_type])
+    return best if scores[best] else "linux"
+
+
+def normalize_tool_type(value) -> str:
+    """intent_agent's answer as one of TOOL_TYPES ("" if it isn't one)."""
+    words = re.findall(r"[a-z]+", str(value or "").lower())
+    return next((word for word in words if word in TOOL_TYPES), "")
+
+
 agent = Agent(
     name="intent_agent",
     model="gemini-2.0-flash",
@@ -1,21 +1,39 @@
-from google.adk.agents import ParallelAgent, SequentialAgent
+import os
 
+from google.adk.agents import SequentialAgent
+
+from .deadline_parallel import DeadlineParallelAgent
 from .sub_agents.gcp_arch import agent as gcp
 from .sub_agents.aws_arch import agent as aws
 from .sub_agents.k8s_arch import agent as k8s
-from .sub_agents.formatter import agent as formatter
+from .sub_agents.formatter import agent as formatter, summary_agent
+
+
+# Seconds each architect may take before its result is marked as timed out
+ARCHITECT_TIMEOUT = float(os.getenv("ARCHITECT_TIMEOUT", "60"))
 
+# Stream each architect's section as soon as it lands; the formatter then
+# only writes the summary
+PROGRESSIVE = os.getenv("ARCHITECTS_PROGRESSIVE", "0") == "1"
 
-# Step 1 → run all architects in parallel
-parallel_architects = ParallelAgent(
+# Step 1 → run all architects in parallel, each with its own deadline
+parallel_architects = DeadlineParallelAgent(
     name="parallel_architects",
     sub_agents=[gcp, aws, k8s],
-    description="Runs GCP, AWS, and Kubernetes architects in parallel to provide multi-cloud solutions"
+    description="Runs GCP, AWS, and Kubernetes architects in parallel to provide multi-cloud solutions",
+    branch_timeout=ARCHITECT_TIMEOUT,
+    progressive=PROGRESSIVE,
+    section_titles={
+        "gcp_arch_agent": "GCP Solution",
+        "aws_arch_agent": "AWS Solution",
+        "k8s_arch_agent": "Kubernetes Solution",
+    },
+    status_key="architect_status",
 )
 
 # Step 2 → merge results
 root_agent = SequentialAgent(
     name="multi_cloud_architecture_advisor",
-    sub_agents=[parallel_architects, formatter],
+    sub_agents=[parallel_architects, summary_agent if PROGRESSIVE else formatter],
     description="Provides multi-cloud architecture recommendations by consulting GCP, AWS, and Kubernetes experts in parallel, then formatting the combined advice"
 )
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import Field
+
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class DeadlineParallelAgent(BaseAgent):
+    """ParallelAgent with a deadline per branch and optional progressive output.
+
+    Sub-agents run concurrently on their own branches, like ParallelAgent.
+    A branch still running when its deadline passes (counted from the
+    fan-out) is cancelled, and its output_key is set to a "timed out"
+    marker so later steps can say the result is missing. A branch that
+    raises is handled the same way with a "failed" marker instead of
+    failing the whole request. Each branch's outcome ("ok", "timeout" or
+    "error") is recorded in state under `status_key`.
+
+    With `progressive=True`, each branch's result is emitted as a titled
+    markdown section (custom_metadata["section"]) the moment it lands, so
+    clients can render sections before the summary is built. The branch's
+    own final text is then withheld (its state_delta is still applied), so
+    each result appears once, inside its section.
+    """
+
+    branch_timeout: float = 60.0
+    """Seconds each branch may run, unless overridden in branch_timeouts."""
+
+    branch_timeouts: dict[str, float] = Field(default_factory=dict)
+    """Per sub-agent deadline overrides, by agent name."""
+
+    progressive: bool = False
+    """Emit each branch's section as soon as it finishes."""
+
+    section_titles: dict[str, str] = Field(default_factory=dict)
+    """Section heading per sub-agent name (defaults to the agent name)."""
+
+    status_key: str = "branch_status"
+    """State key for the {agent name: "ok" | "timeout" | "error"} outcome map."""
+
+    def _timeout_for(self, agent: BaseAgent) -> float:
+        return self.branch_timeouts.get(agent.name, self.branch_timeout)
+
+    @staticmethod
+    def _final_text(event: Event) -> Optional[str]:
+        if event.partial or not event.is_final_response() or not event.content or not event.content.parts:
+            return None
+        text = "".join(part.text or "" for part in event.content.parts if not part.thought)
+        return text or None
+
+    def _without_text(self, event: Event) -> Optional[Event]:
+        """The branch event minus its text, which the section event repeats."""
+        if event.partial and event.content:
+            return None
+        if self._final_text(event) is None:
+            return event
+        if not (event.actions.state_delta or event.actions.artifact_delta or event.actions.escalate
+                or event.actions.transfer_to_agent):
+            return None
+        return event.model_copy(update={"content": None})
+
+    def _section_event(self, ctx: InvocationContext, agent: BaseAgent, text: str, status: str) -> Event:
+        title = self.section_titles.get(agent.name, agent.name)
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"### {title}\n{text}")]),
+            custom_metadata={"section": agent.name, "status": status},
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_branch(agent: BaseAgent) -> None:
+            branch = f"{self.name}.{agent.name}"
+            branch_ctx = ctx.model_copy(update={"branch": f"{ctx.branch}.{branch}" if ctx.branch else branch})
+            error: Optional[BaseException] = None
+            try:
+                async for event in agent.run_async(branch_ctx):
+                    # Wait until the event is persisted before producing the next one
+                    consumed = asyncio.Event()
+                    await queue.put((agent, event, consumed))
+                    await consumed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            await queue.put((agent, _DONE, error))
+
+        start = time.monotonic()
+        deadlines = {agent.name: start + self._timeout_for(agent) for agent in self.sub_agents}
+        tasks = {agent.name: asyncio.create_task(run_branch(agent)) for agent in self.sub_agents}
+        status: dict[str, str] = {}
+        final_texts: dict[str, str] = {}
+
+        try:
+            while len(status) < len(self.sub_agents):
+                running = [name for name in tasks if name not in status]
+                wait = max(0.0, min(deadlines[name] for name in running) - time.monotonic())
+                try:
+                    agent, event, payload = await asyncio.wait_for(queue.get(), wait)
+                except asyncio.TimeoutError:
+                    agent, event, payload = None, None, None
+
+                if agent is not None and event is not _DONE:
+                    if agent.name in status:
+                        # Already timed out; drop what it produced meanwhile
+                        payload.set()
+                        continue
+                    if self.progressive:
+                        final_text = self._final_text(event)
+                        if final_text is not None:
+                            final_texts[agent.name] = final_text
+                        event = self._without_text(event)
+                    if event is not None:
+                        yield event
+                    payload.set()
+                    continue
+
+                if agent is not None:
+                    if agent.name in status:
+                        continue
+                    outcome = "ok" if payload is None else "error"
+                    if payload is not None:
+                        logger.warning("Branch %s failed: %s", agent.name, payload)
+                    finished = [agent]
+                else:
+                    outcome = "timeout"
+                    now = time.monotonic()
+                    finished = [a for a in self.sub_agents if a.name not in status and deadlines[a.name] <= now]
+
+                for agent in finished:
+                    status[agent.name] = outcome
+                    if outcome == "timeout":
+                        tasks[agent.name].cancel()
+                        logger.warning("Branch %s timed out after %.1fs", agent.name, self._timeout_for(agent))
+                    output_key = getattr(agent, "output_key", None)
+                    state_delta = {self.status_key: dict(status)}
+                    if outcome == "ok":
+                        text = (str(ctx.session.state.get(output_key, "")) if output_key
+                                else final_texts.get(agent.name, ""))
+                    else:
+                        reason = (f"timed out after {self._timeout_for(agent):g}s" if outcome == "timeout"
+                                  else "failed")
+                        text = f"[No result: {agent.name} {reason}]"
+                        if output_key:
+                            state_delta[output_key] = text
+                    if self.progressive:
+                        event = self._section_event(ctx, agent, text, outcome)
+                        event.actions = EventActions(state_delta=state_delta)
+                        yield event
+                    else:
+                        yield Event(
+                            invocation_id=ctx.invocation_id,
+                            author=self.name,
+                            branch=ctx.branch,
+                            actions=EventActions(state_delta=state_delta),
+                        )
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
@@ -31,3 +31,24 @@ Provide a brief 1-2 sentence summary comparing the approaches or highlighting ke
 Keep formatting clean and readable. If any solution is missing or empty, note it briefly.
 """
 )
+
+# Progressive mode: the three sections were already streamed to the user as
+# each architect finished, so only the summary is left to write.
+summary_agent = Agent(
+    name="formatter_agent",
+    model="gemini-2.0-flash",
+    description="Writes the closing summary for multi-cloud architecture recommendations already shown to the user",
+    instruction="""
+The user has already received these architecture recommendations, one section per cloud perspective:
+- GCP recommendations: {gcp_solution}
+- AWS recommendations: {aws_solution}
+- Kubernetes recommendations: {k8s_solution}
+
+Do NOT repeat them. Write only:
+
+### Summary
+Provide a brief 1-2 sentence summary comparing the approaches or highlighting key differences.
+
+If any solution is missing (e.g. it timed out), note it briefly.
+"""
+)
@@ -0,0 +1 @@
+from .sqlite import COMPACT_EVERY, SQLiteSessionService
@@ -0,0 +1,476 @@
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Optional
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from pydantic_core import to_jsonable_python
+
+
+# Session-scoped state deltas are folded into the session's state snapshot
+# once this many have accumulated.
+COMPACT_EVERY = 50
+
+# State changes buffered per subscriber; a subscriber that falls further
+# behind loses the oldest ones.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name     TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    session_id   TEXT NOT NULL,
+    state        TEXT NOT NULL,              -- compacted session state
+    state_seq    INTEGER NOT NULL DEFAULT 0, -- last delta folded into state
+    pending      INTEGER NOT NULL DEFAULT 0, -- deltas not folded yet
+    last_seq     INTEGER NOT NULL DEFAULT 0, -- sequence number of the last event
+    create_time  REAL NOT NULL,
+    update_time  REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_by_update ON sessions (app_name, update_time);
+
+CREATE TABLE IF NOT EXISTS events (
+    app_name     TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    session_id   TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    event_id     TEXT NOT NULL,
+    timestamp    REAL NOT NULL,
+    event_data   TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS state_deltas (
+    app_name     TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    session_id   TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    delta        TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name     TEXT PRIMARY KEY,
+    state        TEXT NOT NULL,
+    update_time  REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name     TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    state        TEXT NOT NULL,
+    update_time  REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=to_jsonable_python, separators=(",", ":"))
+
+
+def _split_state(state: dict[str, Any]) -> tuple[dict, dict, dict]:
+    """Split a state dict into (app, user, session) parts; temp: keys are dropped."""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _merge_state(app: dict, user: dict, session: dict) -> dict[str, Any]:
+    merged = dict(session)
+    merged.update({State.APP_PREFIX + key: value for key, value in app.items()})
+    merged.update({State.USER_PREFIX + key: value for key, value in user.items()})
+    return merged
+
+
+class SQLiteSessionService(BaseSessionService):
+    """Session service that persists sessions to a local SQLite file.
+
+    A drop-in replacement for InMemorySessionService:
+
+        runner = Runner(agent=root_agent, app_name=APP_NAME,
+                        session_service=SQLiteSessionService("sessions.db"))
+
+    - The database runs in WAL mode, so reads don't wait for writes and other
+      processes can inspect it while the agent is running.
+    - Events are append-only, numbered per session. Resuming a session reads
+      only the rows for that (app, user, session) key, optionally just the
+      most recent ones (GetSessionConfig.num_recent_events).
+    - Session state is stored as a snapshot plus the deltas written since.
+      Every `compact_every` deltas are folded into the snapshot, so loading
+      state never replays the whole history.
+    - app: and user: state live in their own tables and are shared by every
+      session of the app/user, as with the built-in services. temp: state is
+      never persisted.
+
+    All database work runs on one background thread that owns the
+    connection: SQLite allows a single writer anyway, and the event loop
+    never blocks on disk I/O.
+    """
+
+    def __init__(self, db_path: str = "sessions.db", compact_every: int = COMPACT_EVERY):
+        self.db_path = db_path
+        self.compact_every = compact_every
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-sessions")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._subscribers: list[tuple[tuple, asyncio.Queue]] = []
+
+    # Connection handling
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _call(self, fn, args):
+        if self._conn is None:
+            self._conn = self._connect()
+        return fn(self._conn, *args)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    async def close(self) -> None:
+        """Close the database connection and stop the background thread."""
+        def close(conn):
+            conn.close()
+        if self._conn is not None:
+            await self._run(close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # State helpers (run on the database thread)
+
+    @staticmethod
+    def _load_state(conn, table: str, where: str, params: tuple) -> dict:
+        row = conn.execute(f"SELECT state FROM {table} WHERE {where}", params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _app_state(self, conn, app_name: str) -> dict:
+        return self._load_state(conn, "app_states", "app_name=?", (app_name,))
+
+    def _user_state(self, conn, app_name: str, user_id: str) -> dict:
+        return self._load_state(conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id))
+
+    def _update_shared_state(self, conn, app_name: str, user_id: str, app: dict, user: dict, now: float) -> None:
+        if app:
+            state = self._app_state(conn, app_name)
+            state.update(app)
+            conn.execute(
+                "INSERT INTO app_states (app_name, state, update_time) VALUES (?, ?, ?) "
+                "ON CONFLICT(app_name) DO UPDATE SET state=excluded.state, update_time=excluded.update_time",
+                (app_name, _dumps(state), now),
+            )
+        if user:
+            state = self._user_state(conn, app_name, user_id)
+            state.update(user)
+            conn.execute(
+                "INSERT INTO user_states (app_name, user_id, state, update_time) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(app_name, user_id) DO UPDATE SET state=excluded.state, update_time=excluded.update_time",
+                (app_name, user_id, _dumps(state), now),
+            )
+
+    @staticmethod
+    def _session_state(conn, key: tuple, snapshot: str, state_seq: int) -> dict:
+        """Snapshot plus every delta written after it."""
+        state = json.loads(snapshot)
+        for (delta,) in conn.execute(
+            "SELECT delta FROM state_deltas WHERE app_name=? AND user_id=? AND session_id=? AND seq>? ORDER BY seq",
+            (*key, state_seq),
+        ):
+            state.update(json.loads(delta))
+        return state
+
+    def _compact(self, conn, key: tuple) -> None:
+        snapshot, state_seq, last_seq = conn.execute(
+            "SELECT state, state_seq, last_seq FROM sessions WHERE app_name=? AND user_id=? AND session_id=?",
+            key,
+        ).fetchone()
+        state = self._session_state(conn, key, snapshot, state_seq)
+        conn.execute(
+            "UPDATE sessions SET state=?, state_seq=?, pending=0 WHERE app_name=? AND user_id=? AND session_id=?",
+            (_dumps(state), last_seq, *key),
+        )
+        conn.execute(
+            "DELETE FROM state_deltas WHERE app_name=? AND user_id=? AND session_id=? AND seq<=?",
+            (*key, last_seq),
+        )
+
+    # BaseSessionService
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        app, user, session_state = _split_state(state)
+        now = time.time()
+
+        def create(conn):
+            with self._transaction(conn):
+                try:
+                    conn.execute(
+                        "INSERT INTO sessions (app_name, user_id, session_id, state, create_time, update_time) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (app_name, user_id, session_id, _dumps(session_state), now, now),
+                    )
+                except sqlite3.IntegrityError:
+                    raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+                self._update_shared_state(conn, app_name, user_id, app, user, now)
+                return self._app_state(conn, app_name), self._user_state(conn, app_name, user_id)
+
+        app_state, user_state = await self._run(create)
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(app_state, user_state, session_state),
+            events=[],
+            last_update_time=now,
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+
+        def get(conn):
+            # One read transaction, so state and events come from the same snapshot
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT state, state_seq, update_time FROM sessions "
+                    "WHERE app_name=? AND user_id=? AND session_id=?",
+                    key,
+                ).fetchone()
+                if row is None:
+                    return None
+                snapshot, state_seq, update_time = row
+                session_state = self._session_state(conn, key, snapshot, state_seq)
+
+                query = "SELECT event_data FROM events WHERE app_name=? AND user_id=? AND session_id=?"
+                params: list[Any] = list(key)
+                if config and config.after_timestamp:
+                    query += " AND timestamp>=?"
+                    params.append(config.after_timestamp)
+                query += " ORDER BY seq DESC"
+                if config and config.num_recent_events is not None:
+                    query += " LIMIT ?"
+                    params.append(config.num_recent_events)
+                event_rows = conn.execute(query, params).fetchall()
+
+                return (
+                    session_state,
+                    self._app_state(conn, app_name),
+                    self._user_state(conn, app_name, user_id),
+                    [data for (data,) in reversed(event_rows)],
+                    update_time,
+                )
+            finally:
+                conn.execute("COMMIT")
+
+        result = await self._run(get)
+        if result is None:
+            return None
+        session_state, app_state, user_state, events, update_time = result
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(app_state, user_state, session_state),
+            events=[Event.model_validate_json(data) for data in events],
+            last_update_time=update_time,
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        """List sessions, oldest update first. Events and state are not loaded."""
+        def list_rows(conn):
+            if user_id is None:
+                return conn.execute(
+                    "SELECT user_id, session_id, update_time FROM sessions WHERE app_name=? "
+                    "ORDER BY update_time, user_id, session_id",
+                    (app_name,),
+                ).fetchall()
+            return conn.execute(
+                "SELECT user_id, session_id, update_time FROM sessions WHERE app_name=? AND user_id=? "
+                "ORDER BY update_time, session_id",
+                (app_name, user_id),
+            ).fetchall()
+
+        rows = await self._run(list_rows)
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=row_user, id=row_session, state={}, events=[], last_update_time=update_time)
+            for row_user, row_session, update_time in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+
+        def delete(conn):
+            with self._transaction(conn):
+                for table in ("events", "state_deltas", "sessions"):
+                    conn.execute(f"DELETE FROM {table} WHERE app_name=? AND user_id=? AND session_id=?", key)
+
+        await self._run(delete)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict[str, Any]:
+        return await self._run(self._user_state, app_name, user_id)
+
+    # State-only reads and subscriptions
+
+    async def get_state(self, *, app_name: str, user_id: str, session_id: str, key: Optional[str] = None):
+        """Read a session's state without loading its events.
+
+        Args:
+            key: Return only this key ("user_name", "user:plan", "app:flag").
+                app:/user: keys read just their table.
+
+        Returns:
+            The merged state dict, or the value of `key` (None if it isn't
+            set). None if the session doesn't exist and no key was given.
+        """
+        session_key = (app_name, user_id, session_id)
+
+        def read(conn):
+            if key is not None and key.startswith(State.APP_PREFIX):
+                return self._app_state(conn, app_name).get(key[len(State.APP_PREFIX):])
+            if key is not None and key.startswith(State.USER_PREFIX):
+                return self._user_state(conn, app_name, user_id).get(key[len(State.USER_PREFIX):])
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT state, state_seq FROM sessions WHERE app_name=? AND user_id=? AND session_id=?",
+                    session_key,
+                ).fetchone()
+                if row is None:
+                    return None
+                session_state = self._session_state(conn, session_key, *row)
+                if key is not None:
+                    return session_state.get(key)
+                return _merge_state(
+                    self._app_state(conn, app_name), self._user_state(conn, app_name, user_id), session_state
+                )
+            finally:
+                conn.execute("COMMIT")
+
+        return await self._run(read)
+
+    async def subscribe_state(
+        self, *, app_name: str, user_id: Optional[str] = None, session_id: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """Yield state changes as events that carry them are appended.
+
+        Each item is {"app_name", "user_id", "session_id", "delta",
+        "timestamp"}, where "delta" holds the changed keys with their app:/
+        user: prefixes. Leave user_id or session_id unset to watch every
+        user or session of the app. Only changes made through this service
+        instance are seen. Closing the generator unsubscribes; wrap it in
+        contextlib.aclosing() to do that as soon as the loop exits:
+
+            async with aclosing(session_service.subscribe_state(app_name="Greeting Bot")) as changes:
+                async for change in changes:
+                    print(change["session_id"], change["delta"])
+        """
+        subscriber = ((app_name, user_id, session_id), asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+        self._subscribers.append(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            self._subscribers.remove(subscriber)
+
+    def _publish(self, session: Session, delta: dict, timestamp: float) -> None:
+        change = {
+            "app_name": session.app_name,
+            "user_id": session.user_id,
+            "session_id": session.id,
+            "delta": delta,
+            "timestamp": timestamp,
+        }
+        for (app_name, user_id, session_id), queue in self._subscribers:
+            if app_name != session.app_name or user_id not in (None, session.user_id) \
+                    or session_id not in (None, session.id):
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(change)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+
+        key = (session.app_name, session.user_id, session.id)
+        app, user, session_delta = _split_state(event.actions.state_delta if event.actions else {})
+        event_data = event.model_dump_json(exclude_none=True)
+        timestamp = event.timestamp
+
+        def append(conn):
+            with self._transaction(conn):
+                row = conn.execute(
+                    "UPDATE sessions SET last_seq=last_seq+1, update_time=?, pending=pending+? "
+                    "WHERE app_name=? AND user_id=? AND session_id=? RETURNING last_seq, pending",
+                    (timestamp, 1 if session_delta else 0, *key),
+                ).fetchone()
+                if row is None:
+                    raise ValueError(f"Session {session.id} not found.")
+                seq, pending = row
+                conn.execute(
+                    "INSERT INTO events (app_name, user_id, session_id, seq, event_id, timestamp, event_data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, seq, event.id, timestamp, event_data),
+                )
+                if session_delta:
+                    conn.execute(
+                        "INSERT INTO state_deltas (app_name, user_id, session_id, seq, delta) VALUES (?, ?, ?, ?, ?)",
+                        (*key, seq, _dumps(session_delta)),
+                    )
+                    if pending >= self.compact_every:
+                        self._compact(conn, key)
+                self._update_shared_state(conn, session.app_name, session.user_id, app, user, timestamp)
+
+        await self._run(append)
+        session.last_update_time = timestamp
+        if self._subscribers and (app or user or session_delta):
+            self._publish(session, _merge_state(app, user, session_delta), timestamp)
+        return self._commit_event_to_session(session, event)
@@ -1,34 +1,48 @@
+import os
+import sys
 import uuid
 import asyncio
 from dotenv import load_dotenv
 
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 from agent import root_agent
+# Shared session service and streaming helper from the repository root (run with the root on PYTHONPATH)
+from session_store import SQLiteSessionService
+from terminal_runner import stream_turn
 
 
 load_dotenv()
 
+# Sessions (and the user_name saved in them) survive restarts in this file
+SESSION_DB = os.getenv("SESSION_DB", "sessions.db")
+
 
 async def main():
-    session_service = InMemorySessionService()
+    session_service = SQLiteSessionService(SESSION_DB)
 
     APP_NAME = "Greeting Bot"
     USER_ID = "user_001"
-    SESSION_ID = str(uuid.uuid4())
+    # Resume an earlier session with: python run_agent.py <session_id>
+    SESSION_ID = sys.argv[1] if len(sys.argv) > 1 else str(uuid.uuid4())
 
-    # ✅ await (async fix)
-    session = await session_service.create_session(
+    session = await session_service.get_session(
         app_name=APP_NAME,
         user_id=USER_ID,
-        session_id=SESSION_ID,
-        state={}
+        session_id=SESSION_ID
     )
-
-    # ✅ .id (field fix)
-    print("Created session:", session.id)
+    if session is not None:
+        print(f"Resumed session: {session.id} ({len(session.events)} events)")
+        print(f"📊 Current State: {session.state}")
+    else:
+        session = await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=SESSION_ID,
+            state={}
+        )
+        print("Created session:", session.id)
 
     runner = Runner(
         agent=root_agent,
@@ -46,23 +60,20 @@ async def main():
             parts=[types.Part(text=user_input)]
         )
 
-        for event in runner.run(
-            user_id=USER_ID,
-            session_id=SESSION_ID,
-            new_message=message,
-        ):
-            if event.is_final_response():
-                # Check if content exists and has text parts (not just function calls)
-                if event.content and event.content.parts and event.content.parts[0].text:
-                    print("Agent:", event.content.parts[0].text)
-        
+        timing = await stream_turn(runner, USER_ID, SESSION_ID, message)
+        ttft = "-" if timing["ttft_s"] is None else f"{timing['ttft_s']:.2f}s"
+        print(f"⏱️  First token: {ttft} | Total: {timing['total_s']:.2f}s")
+
         # Print state after each turn to verify it's being updated
-        current_state = await session_service.get_session(
+        # (state-only read: the session's events are not loaded)
+        current_state = await session_service.get_state(
             app_name=APP_NAME,
             user_id=USER_ID,
             session_id=SESSION_ID
         )
-        print(f"📊 Current State: {current_state.state}")
+        print(f"📊 Current State: {current_state}")
+
+    await session_service.close()
 
 
 asyncio.run(main())
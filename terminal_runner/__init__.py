@@ -0,0 +1 @@
+from .streaming import STREAMING_RUN_CONFIG, event_text, stream_turn
@@ -0,0 +1,83 @@
+import time
+from typing import Callable, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.genai import types
+
+
+# Stream partial responses (token chunks) instead of waiting for the final event
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+def event_text(event: Event) -> str:
+    """The event's response text, without thoughts ("" if it has none)."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+
+async def stream_turn(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    message: types.Content,
+    run_config: RunConfig = STREAMING_RUN_CONFIG,
+    on_event: Optional[Callable[[Event], None]] = None,
+) -> dict:
+    """Run one turn, printing the response to the terminal as it streams in.
+
+    Args:
+        on_event: Called with every event of the turn, e.g. to read
+            custom_metadata the runner wants to report.
+
+    Returns:
+        dict with "responded" (False if the agent produced no final response),
+        "ttft_s" (time to the first response text, None if there was none)
+        and "total_s" (time until the runner finished the turn).
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    streaming = False
+    responded = False
+
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=message,
+        run_config=run_config,
+    ):
+        if on_event is not None:
+            on_event(event)
+        text = event_text(event)
+        if event.partial:
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                if not streaming:
+                    print("Agent: ", end="", flush=True)
+                    streaming = True
+                print(text, end="", flush=True)
+            continue
+
+        if not event.is_final_response():
+            continue
+        responded = True
+        if streaming:
+            # The final event repeats the streamed text in full
+            print()
+            streaming = False
+        elif text:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            print(f"Agent: {text}")
+        else:
+            print("Agent: [No response content]")
+
+    total = time.perf_counter() - start
+    return {
+        "responded": responded,
+        "ttft_s": None if first_token_at is None else first_token_at - start,
+        "total_s": total,
+    }